@@ -0,0 +1,114 @@
+"""فصل كامل: كل صورة شغلانة لوحدها (القديم) مقابل شغلانة فصل واحدة
+
+الفصل صفحات بنفس العرض وفي آخر كل صفحة نفس شريط الـ credits، وصفحة مرفوعة مرتين.
+الصفحات كلها في قناة واحدة بـ bucket الـ rate limit بتاع Discord، وبيتقاس: الوقت لحد آخر
+رسالة، طلبات OCR والترجمة، مرات كشف اللغة، ورسائل وتعديلات و 429 القناة.
+
+التشغيل:
+    python benchmarks/bench_chapter.py [عدد الصفحات]
+"""
+import asyncio
+import io
+import logging
+import os
+import sys
+import time
+
+# من غير كاش عشان كل تشغيل يعدي على الـ APIs فعلاً
+os.environ['OCR_CACHE_PATH'] = ''
+os.environ['TRANSLATION_MEMORY_PATH'] = ''
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+os.environ['METRICS_PORT'] = ''
+os.environ.setdefault('JOB_WORKERS', '3')
+os.environ.setdefault('CHAPTER_PAGE_CONCURRENCY', '3')
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from fakes import (  # noqa: E402
+    FakeAttachment, FakeChannel, FakeFileServer, FakeMessage, FakeOCRServer,
+    FakeTranslateServer, make_webtoon_page,
+)
+import bot as bot_module  # noqa: E402
+
+
+def make_chapter(count, width=800):
+    """صفحات الفصل، وكل صفحة في آخرها نفس شريط الـ credits"""
+    banner = Image.new('RGB', (width, 2000), (255, 255, 255))
+    draw = ImageDraw.Draw(banner)
+    draw.rectangle((0, 300, width, 1700), fill=(30, 30, 60))
+    for n in range(6):
+        draw.text((120, 500 + n * 150), f"scanlation credits line {n}", fill=(255, 255, 255))
+
+    pages = {}
+    for i in range(count - 1):
+        page = Image.open(io.BytesIO(make_webtoon_page(8000 + (i % 3) * 2000, width, 'PNG', seed=i)))
+        full = Image.new('RGB', (width, page.height + banner.height), (255, 255, 255))
+        full.paste(page.convert('RGB'), (0, 0))
+        full.paste(banner, (0, page.height))
+        buf = io.BytesIO()
+        full.save(buf, format='PNG')
+        pages[f"page{i:02d}.png"] = buf.getvalue()
+    # نفس الصفحة اتبعتت مرتين
+    pages[f"page{count - 1:02d}.png"] = pages['page00.png']
+    return pages
+
+
+async def get_stats(bot, url):
+    session = await bot.http_client.get_session()
+    async with session.get(url.rsplit('/', 2)[0] + '/stats') as resp:
+        return await resp.json()
+
+
+async def run(label, chapter, urls, files, rate_limit):
+    bot = bot_module.ManhwaBot()
+    bot.ocr.url, bot.translator.url = urls
+    await bot.setup_hook()
+    ocr_before = await get_stats(bot, urls[0])
+    translate_before = await get_stats(bot, urls[1])
+
+    channel = FakeChannel(rate_limit=rate_limit)
+    attachments = [FakeAttachment(files.url(name), filename=name) for name in files.files]
+    message = FakeMessage(channel, attachments)
+    start = time.monotonic()
+    if chapter:
+        await bot.enqueue_chapter(message, attachments)
+        jobs = 1
+    else:
+        for attachment in attachments:
+            await bot.enqueue_image(message, attachment)
+        jobs = len(attachments)
+    while bot.scheduler.completed < jobs:
+        await asyncio.sleep(0.05)
+    elapsed = time.monotonic() - start
+    await asyncio.sleep(bot.status_interval)
+
+    ocr = await get_stats(bot, urls[0])
+    translate = await get_stats(bot, urls[1])
+    stages = bot.metrics.stage_summary()
+    first = channel.first_embed_time()
+    edits = sum(1 for _, kind, _ in channel.events if kind == 'edit')
+    print(f"{label:>15} {elapsed:7.2f}s {first - start:7.2f}s {ocr['calls'] - ocr_before['calls']:>6} "
+          f"{translate['calls'] - translate_before['calls']:>6} {stages.get('detect', (0,))[0]:>7} "
+          f"{len(channel.sent):>6} {edits:>6} {channel.rate_limited:>5}")
+    await bot.close()
+
+
+async def main(page_count=12, rate_limit=(5, 5.0)):
+    chapter = make_chapter(page_count)
+    async with FakeOCRServer(latency=0.3, jitter=0.3, text="말풍선 텍스트 " * 10, seed=0) as ocr, \
+            FakeTranslateServer(latency=0.1, seed=0) as translate, \
+            FakeFileServer(chapter) as files:
+        urls = (ocr.url, translate.url)
+        print(f"{page_count} pages (1 uploaded twice, shared credits strip)")
+        print(f"{'mode':>15} {'total':>8} {'first':>8} {'ocr':>6} {'trans':>6} {'detect':>7} {'sent':>6} {'edits':>6} {'429s':>5}")
+        # مع bucket القناة، ومن غيره عشان فرق الـ pipeline نفسه يبان لوحده
+        for limit in (rate_limit, None):
+            print(f"channel bucket: {f'{limit[0]} per {limit[1]}s' if limit else 'none'}")
+            await run('per-attachment', False, urls, files, limit)
+            await run('chapter', True, urls, files, limit)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 12))
@@ -0,0 +1,108 @@
+"""مقارنة التحميل القديم (resp.read كامل) بالـ ImageDownloader على ملفات محلية
+
+بيقيس البايتات اللي اتقرت قبل القرار، وأعلى ذاكرة بـ tracemalloc، والوقت.
+
+التشغيل:
+    python benchmarks/bench_download.py
+"""
+import asyncio
+import io
+import logging
+import time
+import tracemalloc
+
+import aiohttp
+from aiohttp import web
+from PIL import Image
+
+import fakes  # noqa: F401  (بيضيف جذر المشروع للـ path)
+from config import SUPPORTED_FORMATS
+from downloader import DownloadError, ImageDownloader
+
+MAX_BYTES = 50 * 1024 * 1024
+
+
+def make_files():
+    png = io.BytesIO()
+    Image.new('RGB', (800, 12000), 'white').save(png, format='PNG')
+    wide = io.BytesIO()
+    Image.new('L', (30000, 100)).save(wide, format='PNG')
+    # صورة حقيقية وبعدها حشو عشان الحجم يعدي 50 ميجا
+    big = png.getvalue() + b'\0' * (80 * 1024 * 1024)
+    return {
+        'ok.png': png.getvalue(),
+        'huge.png': big,
+        'fake.png': b'%PDF-1.4' + b'\0' * (30 * 1024 * 1024),
+        'wide.png': wide.getvalue() + b'\0' * (20 * 1024 * 1024),
+    }
+
+
+async def serve(files):
+    async def handler(request):
+        # chunked من غير content-length زي ما Discord CDN ساعات بيعمل
+        resp = web.StreamResponse()
+        resp.enable_chunked_encoding()
+        await resp.prepare(request)
+        data = files[request.match_info['name']]
+        view = memoryview(data)
+        try:
+            for i in range(0, len(data), 1024 * 1024):
+                await resp.write(view[i:i + 1024 * 1024])
+            await resp.write_eof()
+        except ConnectionError:
+            pass  # العميل قفل الاتصال بدري، وده المطلوب
+        return resp
+    
+    app = web.Application()
+    app.router.add_get('/{name}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+async def old_download(url):
+    """نسخة من download_image القديم"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            content_length = resp.headers.get('content-length')
+            if content_length and int(content_length) > MAX_BYTES:
+                return None, int(content_length)
+            data = await resp.read()
+            return data, len(data)
+
+
+async def measure(coro):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        outcome = await coro
+    except DownloadError as e:
+        outcome = e.code
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return outcome, elapsed, peak
+
+
+async def main():
+    files = make_files()
+    runner, base = await serve(files)
+    downloader = ImageDownloader(MAX_BYTES, 20000, SUPPORTED_FORMATS)
+    print(f"{'file':>9} | {'old result':>12} {'old ms':>7} {'old peak':>9} | {'new result':>12} {'new ms':>7} {'new peak':>9}")
+    for name in files:
+        url = f"{base}/{name}"
+        old, old_time, old_peak = await measure(old_download(url))
+        new, new_time, new_peak = await measure(downloader.download(url))
+        old_label = f"{len(old[0]) // 1024}KB read" if old[0] else "rejected"
+        new_label = new if isinstance(new, str) else f"{new[1]['format']} ok"
+        print(f"{name:>9} | {old_label:>12} {old_time * 1000:>7.0f} {old_peak / 2**20:>7.1f}MB | "
+              f"{new_label:>12} {new_time * 1000:>7.0f} {new_peak / 2**20:>7.1f}MB")
+    await downloader.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""زمن الطلب الواحد مع جلسة جديدة لكل طلب (القديم) مقابل HttpClient المشترك
+
+بيشغل سيرفر HTTPS محلي بشهادة self-signed عشان الـ TLS handshake يبان في القياس.
+
+التشغيل:
+    python benchmarks/bench_http_pool.py
+"""
+import asyncio
+import logging
+import os
+import ssl
+import statistics
+import subprocess
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+import fakes  # noqa: F401  (بيضيف جذر المشروع للـ path)
+from http_client import HttpClient
+
+
+def make_certificate(directory):
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-addext', 'subjectAltName=IP:127.0.0.1',
+         '-keyout', key, '-out', cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+async def start_tls_server(cert, key, latency):
+    async def handler(request):
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response({'IsErroredOnProcessing': False, 'ParsedResults': [{'ParsedText': 'ok'}]})
+    
+    app = web.Application()
+    app.router.add_post('/parse/image', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    site = web.TCPSite(runner, '127.0.0.1', 0, ssl_context=context)
+    await site.start()
+    return runner, f"https://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/parse/image"
+
+
+async def fresh_session_request(url, client_ssl, payload):
+    """زي extract_part القديم: ClientSession جديدة لكل جزء"""
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=client_ssl)) as session:
+        async with session.post(url, data=payload) as resp:
+            return await resp.json()
+
+
+async def pooled_request(client, url, payload):
+    session = await client.get_session()
+    async with session.post(url, data=payload) as resp:
+        return await resp.json()
+
+
+def summarize(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:>14}: mean {statistics.mean(samples) * 1000:6.1f}ms  p50 {statistics.median(samples) * 1000:6.1f}ms  p95 {p95 * 1000:6.1f}ms")
+
+
+async def main(requests=100, latency=0.01):
+    payload = {'base64Image': 'x' * 200_000}
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        client_ssl = ssl.create_default_context(cafile=cert)
+        runner, url = await start_tls_server(cert, key, latency)
+        
+        print(f"{requests} sequential POSTs over TLS, server latency {latency * 1000:.0f}ms")
+        fresh = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await fresh_session_request(url, client_ssl, payload)
+            fresh.append(time.perf_counter() - start)
+        summarize("new session", fresh)
+        
+        client = HttpClient(ssl=client_ssl)
+        pooled = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await pooled_request(client, url, payload)
+            pooled.append(time.perf_counter() - start)
+        summarize("shared pool", pooled)
+        
+        await client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
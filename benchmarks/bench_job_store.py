@@ -0,0 +1,108 @@
+"""الطابور الدائم: jobs/s مع عدد مختلف من processes الـ worker، وشغلانة worker اتقتل بترجع لغيره
+
+الصفحات بتدخل JobStore على ملف SQLite مؤقت، وكل worker process لوحدها (Pipeline كامل
+على سيرفرات OCR وترجمة وملفات وهمية في الـ process الأساسية). الـ processes بتتوزع
+على الـ cores، فالزيادة في jobs/s على قد عدد الـ cores اللي على الجهاز.
+في سيناريو القتل أول worker بياخد SIGKILL وهو شغال، والمفروض كل الصفحات تخلص برضه
+بعد ما الـ lease بتاعه يخلص.
+
+التشغيل:
+    python benchmarks/bench_job_store.py [عدد الصفحات]
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+
+os.environ['OCR_CACHE_PATH'] = ''
+os.environ['TRANSLATION_MEMORY_PATH'] = ''
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+from fakes import FakeFileServer, FakeOCRServer, FakeTranslateServer, make_corpus  # noqa: E402
+from job_store import JobStore  # noqa: E402
+
+
+def run_worker(store_path, worker_id, concurrency, processes, lease_seconds, ocr_url, translate_url):
+    """الـ worker process: نفس worker.py بس على السيرفرات الوهمية"""
+    logging.basicConfig(level=logging.CRITICAL)
+    from pipeline import Pipeline
+    from worker import Worker
+
+    async def serve():
+        # نفس نصيب الـ process من المفاتيح والذاكرة اللي LocalWorkers بيديه
+        pipeline = Pipeline(share=1 / processes)
+        pipeline.ocr.url = ocr_url
+        pipeline.translator.url = translate_url
+        store = JobStore(store_path)
+        worker = Worker(store, pipeline, worker_id, concurrency, lease_seconds, poll_interval=0.05)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, worker.stop)
+        await worker.run()
+        await pipeline.close()
+        store.close()
+
+    asyncio.run(serve())
+
+
+async def run(label, pages, urls, processes, concurrency, lease_seconds=60.0, kill_after=None):
+    tmpdir = tempfile.mkdtemp(prefix='bench_job_store_')
+    store = JobStore(os.path.join(tmpdir, 'jobs.sqlite3'))
+    for i, (name, url) in enumerate(pages):
+        store.enqueue(i % 4, 0, {'url': url, 'filename': name, 'ext': 'png'})
+
+    context = multiprocessing.get_context('spawn')
+    procs = [
+        context.Process(target=run_worker, args=(store.path, f"w{i}", concurrency, processes, lease_seconds, *urls), daemon=True)
+        for i in range(processes)
+    ]
+    start = time.monotonic()
+    for proc in procs:
+        proc.start()
+
+    killed = None
+    while True:
+        stats = store.stats()
+        if stats['done'] + stats['failed'] >= len(pages):
+            break
+        if kill_after is not None and killed is None and stats['done'] >= kill_after:
+            # الـ worker بيموت فجأة وهو شايل شغلانات
+            killed = time.monotonic() - start
+            os.kill(procs[0].pid, signal.SIGKILL)
+        await asyncio.sleep(0.05)
+    elapsed = time.monotonic() - start
+
+    for proc in procs:
+        if proc.is_alive():
+            proc.terminate()
+    await asyncio.gather(*(asyncio.to_thread(proc.join) for proc in procs))
+    results = [job.result['status'] for job in store.finished(limit=len(pages)) if job.result]
+    store.close()
+
+    line = (f"{label:>22}: {elapsed:6.1f}s  {len(pages) / elapsed:5.2f} jobs/s  "
+            f"ok {results.count('ok')}/{len(pages)}  failed {stats['failed']}  retried {stats['retried']}")
+    if killed is not None:
+        line += f"  (killed w0 at {killed:.1f}s, lease {lease_seconds:.0f}s)"
+    print(line)
+
+
+async def main(page_count=16, concurrency=2):
+    corpus = make_corpus(min(page_count, 8))
+    async with FakeOCRServer(latency=0.3, jitter=0.3, text="말풍선 텍스트 " * 10, seed=0) as ocr, \
+            FakeTranslateServer(latency=0.1, seed=0) as translate, \
+            FakeFileServer(corpus) as files:
+        names = list(corpus)
+        pages = [(names[i % len(names)], files.url(names[i % len(names)])) for i in range(page_count)]
+        urls = (ocr.url, translate.url)
+        print(f"{page_count} pages, {concurrency} jobs per worker process, {os.cpu_count()} cores")
+        for processes in (1, 2, 4):
+            await run(f"{processes} process", pages, urls, processes, concurrency)
+        await run("2 process, kill w0", pages, urls, 2, concurrency, lease_seconds=3.0, kill_after=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 16))
@@ -0,0 +1,82 @@
+"""مقارنة عدد الضغطات والوقت بين اللوب القديم (85، 75، 65...) و encode_to_budget
+
+التشغيل:
+    python benchmarks/bench_jpeg_encoder.py
+"""
+import io
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+import fakes  # noqa: F401  (بيضيف جذر المشروع للـ path)
+from jpeg_encoder import encode_to_budget
+
+MAX_BYTES = 900 * 1024
+
+
+def linear_loop(image, max_bytes):
+    """نسخة من compress_part القديم"""
+    quality = 85
+    encodes = 0
+    output = io.BytesIO()
+    while True:
+        output.seek(0)
+        output.truncate()
+        image.save(output, format='JPEG', quality=quality)
+        encodes += 1
+        if output.tell() <= max_bytes or quality <= 30:
+            break
+        quality -= 10
+    return output.tell(), encodes
+
+
+def make_strips():
+    """شرايح تمثيلية: نص على أبيض، رسم ملون مفصل، خلفية غامقة، وشرايح مليانة تفاصيل"""
+    rng = np.random.default_rng(0)
+    strips = {}
+    
+    text = Image.new('RGB', (800, 2000), 'white')
+    draw = ImageDraw.Draw(text)
+    for y in range(40, 2000, 30):
+        draw.text((40, y), "The quick brown fox jumps over the lazy dog " * 2, fill='black')
+    strips['text'] = text
+    
+    art = Image.fromarray(rng.integers(0, 255, (250, 100, 3), dtype=np.uint8)).resize((1000, 2000), Image.BICUBIC)
+    strips['art'] = art.filter(ImageFilter.DETAIL)
+    
+    dark = Image.fromarray((rng.random((2000, 1000)) * 60).astype(np.uint8)).convert('RGB')
+    strips['dark-noisy'] = dark
+    
+    busy = Image.fromarray(rng.integers(0, 255, (500, 300, 3), dtype=np.uint8)).resize((1200, 2000), Image.NEAREST)
+    strips['busy'] = busy
+    
+    noise = Image.fromarray(rng.integers(0, 255, (2000, 1000, 3), dtype=np.uint8))
+    strips['noise'] = noise
+    
+    # أكبر من الحد حتى عند أقل جودة: اللوب القديم كان بيرجعها أكبر من الحد
+    strips['huge-noise'] = Image.fromarray(rng.integers(0, 255, (2000, 1600, 3), dtype=np.uint8))
+    return strips
+
+
+def main(repeat=3):
+    print(f"budget {MAX_BYTES // 1024}KB")
+    print(f"{'strip':>11} | {'old enc':>7} {'old ms':>7} {'old KB':>7} | {'new enc':>7} {'new ms':>7} {'new KB':>7} {'q':>3} {'mode':>4}")
+    for name, strip in make_strips().items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            old_bytes, old_encodes = linear_loop(strip, MAX_BYTES)
+        old_ms = (time.perf_counter() - start) / repeat * 1000
+        
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = encode_to_budget(strip, MAX_BYTES)
+        new_ms = (time.perf_counter() - start) / repeat * 1000
+        
+        print(f"{name:>11} | {old_encodes:>7} {old_ms:>7.0f} {old_bytes / 1024:>7.0f} | "
+              f"{result.encodes:>7} {new_ms:>7.0f} {result.nbytes / 1024:>7.0f} "
+              f"{result.quality:>3} {result.mode:>4}")
+
+
+if __name__ == "__main__":
+    main()
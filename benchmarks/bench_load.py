@@ -0,0 +1,189 @@
+"""حمل كامل على البوت: corpus صفحات طويلة بيدخل الطابور بتزامن معين، على سيرفرات OCR وترجمة وملفات وهمية
+
+السيرفرات شغالة في process تانية عشان أقصى RSS يبقى بتاع البوت بس. الصفحات بتدخل
+من enqueue_image زي on_message (كل صفحة في قناة لوحدها ومن مستخدمين مختلفين)،
+والأوقات من مقاييس البوت نفسه (metrics). بيطبع jobs/s و p50/p95/p99 وطلبات الـ APIs
+لكل صفحة ورسائل Discord وأقصى ذاكرة، و --json بيكتب نفس الأرقام لمقارنتها بين التشغيلات.
+
+التشغيل:
+    python benchmarks/bench_load.py --pages 40 --concurrency 4
+    python benchmarks/bench_load.py --ocr-error-rate 0.05 --ocr-rate-limit 10/1 --ocr-key-rate 9 --json run.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="load benchmark لـ ManhwaBot.process_image")
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=4, help="JOB_WORKERS")
+    parser.add_argument('--users', type=int, default=8, help="عدد المستخدمين اللي بيبعتوا الصفحات")
+    parser.add_argument('--corpus', type=int, default=12, help="عدد الصفحات المختلفة (بتتكرر لحد --pages)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ocr-latency', type=float, default=0.3)
+    parser.add_argument('--ocr-jitter', type=float, default=0.3)
+    parser.add_argument('--ocr-error-rate', type=float, default=0.0)
+    parser.add_argument('--ocr-rate-limit', default=None, help="عدد/ثواني لكل مفتاح، زي 10/1")
+    parser.add_argument('--ocr-key-rate', default='1000', help="OCR_KEY_RATE للبوت")
+    parser.add_argument('--translate-latency', type=float, default=0.1)
+    parser.add_argument('--translate-error-rate', type=float, default=0.0)
+    parser.add_argument('--translate-rate-limit', default=None, help="عدد/ثواني للسيرفر كله")
+    parser.add_argument('--channel-rate-limit', default='5/5', help="bucket كل قناة Discord (فاضي = من غير حد)")
+    parser.add_argument('--cache', action='store_true', help="كاش OCR وذاكرة الترجمة مفتوحين (في ملفات مؤقتة)")
+    parser.add_argument('--json', default=None, help="ملف لكتابة النتيجة")
+    return parser.parse_args()
+
+
+def rate(value):
+    if not value:
+        return None
+    count, per = value.split('/')
+    return int(count), float(per)
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def serve(conn, args):
+    """الـ process التانية: الـ corpus والسيرفرات الوهمية"""
+    from fakes import FakeFileServer, FakeOCRServer, FakeTranslateServer, make_corpus
+
+    async def run():
+        corpus = make_corpus(args.corpus, args.seed)
+        ocr = FakeOCRServer(latency=args.ocr_latency, jitter=args.ocr_jitter, error_rate=args.ocr_error_rate,
+                            rate_limit=rate(args.ocr_rate_limit), text="말풍선 텍스트 " * 10, seed=args.seed)
+        translate = FakeTranslateServer(latency=args.translate_latency, error_rate=args.translate_error_rate,
+                                        rate_limit=rate(args.translate_rate_limit), seed=args.seed)
+        async with ocr, translate, FakeFileServer(corpus) as files:
+            conn.send({
+                'ocr': ocr.url,
+                'translate': translate.url,
+                'pages': [(name, files.url(name)) for name in corpus],
+                'corpus_mb': sum(len(data) for data in corpus.values()) / 1024 / 1024,
+            })
+            await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def configure_env(args, tmpdir):
+    # لازم قبل import bot عشان config بيتقري وقت الـ import
+    os.environ['OCR_CACHE_PATH'] = os.path.join(tmpdir, 'ocr.sqlite3') if args.cache else ''
+    os.environ['TRANSLATION_MEMORY_PATH'] = os.path.join(tmpdir, 'tm.sqlite3') if args.cache else ''
+    os.environ['OCR_KEY_RATE'] = args.ocr_key_rate
+    os.environ.setdefault('OCR_KEY_BURST', '1' if args.ocr_rate_limit else '1000')
+    os.environ['JOB_WORKERS'] = str(args.concurrency)
+    os.environ['JOB_QUEUE_MAX'] = str(max(50, args.pages))
+    os.environ['METRICS_PORT'] = ''
+    os.environ['METRICS_WINDOW'] = str(max(500, args.pages))
+
+
+async def get_stats(session, url):
+    async with session.get(url.rsplit('/', 2)[0] + '/stats') as resp:
+        return await resp.json()
+
+
+async def run(args, info):
+    from fakes import FakeAttachment, FakeChannel, FakeMessage
+    import bot as bot_module
+
+    bot = bot_module.ManhwaBot()
+    bot.ocr.url = info['ocr']
+    bot.translator.url = info['translate']
+    await bot.setup_hook()
+    session = await bot.http_client.get_session()
+    baseline = rss_mb()
+
+    pages = [info['pages'][i % len(info['pages'])] for i in range(args.pages)]
+    channels = []
+    start = time.monotonic()
+    for i, (name, url) in enumerate(pages):
+        channel = FakeChannel(rate_limit=rate(args.channel_rate_limit))
+        channels.append(channel)
+        user = i % args.users
+        message = FakeMessage(channel, [FakeAttachment(url, filename=name)], author_id=user, guild_id=user % 2)
+        await bot.enqueue_image(message, message.attachments[0])
+    while bot.scheduler.completed < args.pages:
+        await asyncio.sleep(0.05)
+    elapsed = time.monotonic() - start
+
+    ocr = await get_stats(session, info['ocr'])
+    translate = await get_stats(session, info['translate'])
+    stages = bot.metrics.stage_summary()
+    jobs = {dict(labels)['result']: value for labels, value in bot.metrics.counters.get('jobs_total', {}).items()}
+    result = {
+        'pages': args.pages,
+        'concurrency': args.concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'jobs_per_s': round(args.pages / elapsed, 3),
+        'jobs': jobs,
+        'latency_s': {
+            stage: dict(zip(('count', 'p50', 'p95', 'p99'), (stages[stage][0], *(round(v, 3) for v in stages[stage][1:]))))
+            for stage in bot_module.STAGES if stage in stages
+        },
+        'per_page': {
+            'ocr_calls': round(ocr['calls'] / args.pages, 2),
+            'ocr_throttled': round(ocr['throttled'] / args.pages, 2),
+            'ocr_errors': round(ocr['errors'] / args.pages, 2),
+            'ocr_upload_kb': round(ocr['bytes_received'] / args.pages / 1024, 1),
+            'translate_calls': round(translate['calls'] / args.pages, 2),
+            'translate_chars': round(translate['chars'] / args.pages),
+            'discord_messages': round(sum(len(c.sent) for c in channels) / args.pages, 2),
+            'discord_edits': round(sum(1 for c in channels for _, kind, _ in c.events if kind == 'edit') / args.pages, 2),
+            'discord_429s': round(sum(c.rate_limited for c in channels) / args.pages, 2),
+        },
+        'memory_mb': {
+            'peak_rss': round(rss_mb(), 1),
+            'peak_rss_over_idle': round(rss_mb() - baseline, 1),
+            'budget_peak': round(bot.memory_budget.stats()['peak'] / 1024 / 1024, 1),
+        },
+    }
+    await bot.close()
+    return result
+
+
+def report(result, info):
+    print(f"{result['pages']} pages ({len(info['pages'])} distinct, {info['corpus_mb']:.1f} MB), "
+          f"concurrency {result['concurrency']}")
+    print(f"elapsed {result['elapsed_s']:.1f}s  →  {result['jobs_per_s']:.2f} jobs/s   results {result['jobs']}")
+    print(f"\n{'stage':>18} {'count':>6} {'p50':>7} {'p95':>7} {'p99':>7}")
+    for stage, values in result['latency_s'].items():
+        print(f"{stage:>18} {values['count']:>6} {values['p50']:7.2f} {values['p95']:7.2f} {values['p99']:7.2f}")
+    print("\nper page:")
+    for name, value in result['per_page'].items():
+        print(f"{name:>18} {value}")
+    print("\nmemory (MB):")
+    for name, value in result['memory_mb'].items():
+        print(f"{name:>18} {value}")
+
+
+def main():
+    args = parse_args()
+    tmpdir = tempfile.mkdtemp(prefix='bench_load_')
+    configure_env(args, tmpdir)
+
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=serve, args=(child, args), daemon=True)
+    proc.start()
+    info = parent.recv()
+    try:
+        result = asyncio.run(run(args, info))
+    finally:
+        proc.terminate()
+    report(result, info)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    main()
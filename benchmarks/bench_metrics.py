@@ -0,0 +1,127 @@
+"""تكلفة الـ instrumentation: ns لكل عملية، وعدد العمليات ونسبتها من وقت الصفحة في البوت كله
+
+بيشغل نفس الصفحات على البوت بالمقاييس مقفولة ومفتوحة، وبيقرا /metrics من الـ endpoint
+في الآخر للتأكد إن الصيغة سليمة.
+
+التشغيل:
+    python benchmarks/bench_metrics.py [عدد الصفحات]
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+import timeit
+
+os.environ['OCR_CACHE_PATH'] = ''
+os.environ['TRANSLATION_MEMORY_PATH'] = ''
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+os.environ['METRICS_PORT'] = '0'
+
+from fakes import (  # noqa: E402
+    FakeAttachment, FakeChannel, FakeFileServer, FakeMessage, FakeOCRServer,
+    FakeTranslateServer, make_tall_page,
+)
+import bot as bot_module  # noqa: E402
+from metrics import Metrics  # noqa: E402
+
+
+class CountingMetrics(Metrics):
+    """نفس الـ registry بس بيعد كام مرة اتنادى"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    def observe(self, stage, seconds):
+        self.calls += 1
+        super().observe(stage, seconds)
+
+    def inc(self, name, value=1, **labels):
+        self.calls += 1
+        super().inc(name, value, **labels)
+
+
+def micro(n=200_000):
+    metrics = Metrics()
+    for stage in bot_module.STAGES:
+        metrics.observe(stage, 0.1)
+
+    def timer():
+        with metrics.time('compress'):
+            pass
+
+    results = {
+        'observe': timeit.timeit(lambda: metrics.observe('ocr_request', 0.3), number=n),
+        'time()': timeit.timeit(timer, number=n),
+        'inc': timeit.timeit(lambda: metrics.inc('ocr_requests_total', outcome='ok'), number=n),
+        'count_bytes': timeit.timeit(lambda: metrics.count_bytes('out', 'ocr', 1000), number=n),
+    }
+    for name, total in results.items():
+        print(f"{name:>12}: {total / n * 1e9:6.0f} ns")
+    render = timeit.timeit(metrics.render, number=200) / 200
+    summary = timeit.timeit(metrics.stage_summary, number=200) / 200
+    print(f"{'render':>12}: {render * 1e6:6.0f} µs (بيتنادى مع كل scrape بس)")
+    print(f"{'!stats':>12}: {summary * 1e6:6.0f} µs (window {metrics.window})")
+    return max(results.values()) / n
+
+
+def use_metrics(bot, metrics):
+    bot.metrics = bot.ocr.metrics = bot.translator.metrics = bot.metrics_server.metrics = metrics
+    bot.register_gauges()
+
+
+async def run(bot, url, pages):
+    durations = []
+    for _ in range(pages):
+        channel = FakeChannel()
+        message = FakeMessage(channel, [FakeAttachment(url)])
+        start = time.perf_counter()
+        await bot.process_image(message, message.attachments[0])
+        durations.append(time.perf_counter() - start)
+    return sum(durations) / len(durations)
+
+
+async def main(pages=20, strips=6):
+    per_op = micro()
+    page = make_tall_page(strips * 2000)
+    async with FakeOCRServer(latency=0.05, text="말풍선 텍스트 " * 20) as ocr, \
+            FakeTranslateServer(latency=0.02) as translate, \
+            FakeFileServer({'page.png': page}) as files:
+        bot = bot_module.ManhwaBot()
+        bot.ocr.url = ocr.url
+        bot.translator.url = translate.url
+        bot.status_interval = 0
+        await bot.metrics_server.start()
+        url = files.url('page.png')
+        await run(bot, url, 2)  # تسخين
+
+        print(f"\n{pages} pages x {strips} strips")
+        results = {}
+        for label, enabled in (('off', False), ('on', True), ('off', False), ('on', True)):
+            metrics = CountingMetrics(enabled=enabled)
+            use_metrics(bot, metrics)
+            mean = await run(bot, url, pages)
+            results.setdefault(label, []).append(mean)
+            print(f"metrics {label:>3}: {mean * 1000:7.1f} ms/page  calls/page {metrics.calls / pages:5.1f}")
+
+        calls = metrics.calls / pages
+        page_time = min(results['on'])
+        print(f"\ncost ≈ {calls:.0f} calls x {per_op * 1e9:.0f} ns = {calls * per_op * 1e6:.0f} µs/page "
+              f"({calls * per_op / page_time:.4%} of {page_time * 1000:.0f} ms)")
+        print(f"measured on - off: {(min(results['on']) - min(results['off'])) * 1000:+.1f} ms/page (noise من الـ loop)")
+
+        session = await bot.http_client.get_session()
+        async with session.get(f"http://127.0.0.1:{bot.metrics_server.port}/metrics") as resp:
+            body = await resp.text()
+        print(f"\n/metrics: HTTP {resp.status}, {len(body.splitlines())} lines")
+        for line in body.splitlines():
+            if line.startswith(('manhwa_stage_seconds_count', 'manhwa_bytes_total', 'manhwa_ocr_requests_total')):
+                print("  " + line)
+        await bot.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
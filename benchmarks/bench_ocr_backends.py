@@ -0,0 +1,128 @@
+"""وقت الجزء و strips/s لكل محرك OCR على نفس الأجزاء، والـ router لما OCR.Space بيفشل أو حصته بتخلص
+
+OCR.Space هنا السيرفر الوهمي (latency مظبوطة على قد الـ API الحقيقي تقريباً)، و Tesseract
+حقيقي لو متثبت. لو مش متثبت سيناريوهات الـ router بتستخدم محرك محلي بديل بوقت ثابت
+لكل جزء عشان سلوك الاختيار والـ fallback يتقاس (أرقامه مش أرقام Tesseract).
+
+التشغيل:
+    python benchmarks/bench_ocr_backends.py [عدد الصفحات]
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+from fakes import FakeOCRServer, make_corpus  # noqa: E402
+from ocr_backends import BackendRouter, OCRSpaceBackend, TesseractBackend  # noqa: E402
+from ocr_engine import OCREngine, PageStrip  # noqa: E402
+from worker_pool import WorkerPool  # noqa: E402
+
+
+class StandInBackend:
+    """محرك محلي بديل: وقت ثابت لكل جزء على pool بعدد الـ cores"""
+
+    name = 'standin'
+
+    def __init__(self, cost, workers=None):
+        self.cost = cost
+        self.pool = WorkerPool('thread', workers)
+        self.in_flight = 0
+
+    def available(self):
+        return True
+
+    def load(self):
+        return self.in_flight / self.pool.size
+
+    def quota_left(self):
+        return True
+
+    async def recognize(self, part_bytes, part_num, total_parts, deadline, fallback_after=None):
+        self.in_flight += 1
+        try:
+            await self.pool.run(time.sleep, self.cost)
+        finally:
+            self.in_flight -= 1
+        return True, f"local {part_num}"
+
+    def close(self):
+        self.pool.close()
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def prepare_strips(pages):
+    engine = OCREngine()
+    strips = []
+    for page in pages:
+        parts, total, blank, duplicate, _ = engine.prepare_parts(page)
+        for part, y_start, y_end in parts:
+            image = part.load() if isinstance(part, PageStrip) else part
+            buffer, size_kb, encodes = engine.compress_part(image)
+            strips.append(buffer.getvalue())
+    return strips
+
+
+async def run(label, strips, server_args, backends, parallel):
+    async with FakeOCRServer(**server_args) as server:
+        engine = OCREngine(max_concurrency=parallel)
+        engine.url = server.url
+        engine.retry_base_delay = 0.2
+        engine.keys.throttle_pause = 5.0
+        engine.router = BackendRouter([make(engine) for make in backends], failure_threshold=3, cooldown=5.0)
+        semaphore = asyncio.Semaphore(parallel)
+        latencies, missing = [], 0
+
+        async def one(i, strip):
+            nonlocal missing
+            async with semaphore:
+                stats = {}
+                start = time.monotonic()
+                await engine.extract_part(strip, i, len(strips), stats=stats)
+                latencies.append(time.monotonic() - start)
+                missing += len(stats.get('missing', []))
+
+        start = time.monotonic()
+        await asyncio.gather(*(one(i, strip) for i, strip in enumerate(strips, 1)))
+        elapsed = time.monotonic() - start
+        mix = ", ".join(f"{b['name']}={b['ok']}" + (f"(+{b['fallback']} fallback)" if b['fallback'] else "")
+                        for b in engine.router.stats())
+        await engine.close()
+    print(f"{label:>28}: p50 {percentile(latencies, 0.5):5.2f}s  p95 {percentile(latencies, 0.95):5.2f}s  "
+          f"{len(strips) / elapsed:5.1f} strips/s  missing {missing:2d}  api calls {server.calls:3d}  [{mix}]")
+
+
+async def main(page_count=6, parallel=8, remote_latency=1.0, standin_cost=2.0, standin_workers=4):
+    pages = list(make_corpus(page_count).values())
+    strips = prepare_strips(pages)
+    print(f"{len(strips)} strips from {page_count} pages, {parallel} at a time, OCR.Space latency ~{remote_latency}s")
+
+    tesseract = TesseractBackend()
+    if tesseract.available():
+        local = lambda engine: TesseractBackend(workers=tesseract.workers)  # noqa: E731
+        local_label = 'tesseract'
+    else:
+        print(f"(tesseract مش متثبت: سيناريوهات الـ router بمحرك بديل {standin_cost}s لكل جزء × {standin_workers} workers)")
+        local = lambda engine: StandInBackend(standin_cost, standin_workers)  # noqa: E731
+        local_label = 'standin'
+
+    remote = dict(latency=remote_latency, jitter=0.3, seed=1)
+    await run('ocrspace', strips, remote, [OCRSpaceBackend], parallel)
+    if tesseract.available():
+        await run('tesseract', strips, remote, [local], parallel)
+    await run('ocrspace only (errors 30%)', strips, dict(remote, error_rate=0.3), [OCRSpaceBackend], parallel)
+    await run(f'ocrspace→{local_label} (errors 30%)', strips, dict(remote, error_rate=0.3), [OCRSpaceBackend, local], parallel)
+    await run(f'ocrspace→{local_label} (quota 2/s)', strips, dict(remote, rate_limit=(2, 1.0)), [OCRSpaceBackend, local], parallel)
+    await run('ocrspace only (quota 2/s)', strips, dict(remote, rate_limit=(2, 1.0)), [OCRSpaceBackend], parallel)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 6))
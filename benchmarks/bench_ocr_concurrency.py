@@ -0,0 +1,49 @@
+"""قياس الوقت الكلي لـ extract_text في الوضع التسلسلي مقابل المتوازي
+
+التشغيل:
+    python benchmarks/bench_ocr_concurrency.py
+"""
+import asyncio
+import logging
+import os
+import time
+
+# الـ token bucket مفتوح هنا عشان القياس يبقى للتزامن بس (حدود المفاتيح في bench_ocr_rate_limit)
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+from fakes import FakeOCRServer, make_tall_page  # noqa: E402
+from ocr_engine import OCREngine  # noqa: E402
+
+
+async def time_extract(engine, image_bytes):
+    start = time.perf_counter()
+    text = await engine.extract_text(image_bytes)
+    return time.perf_counter() - start, text
+
+
+async def main(latency=0.3, concurrency=4):
+    async with FakeOCRServer(latency=latency) as server:
+        print(f"latency={latency}s concurrency={concurrency}")
+        print(f"{'strips':>6} {'sequential':>12} {'concurrent':>12} {'speedup':>8}")
+        for strips in (2, 4, 8, 12):
+            page = make_tall_page(strips * 2000)
+            
+            sequential = OCREngine(max_concurrency=1)
+            sequential.url = server.url
+            seq_time, seq_text = await time_extract(sequential, page)
+            
+            concurrent = OCREngine(max_concurrency=concurrency)
+            concurrent.url = server.url
+            con_time, con_text = await time_extract(concurrent, page)
+            
+            await sequential.close()
+            await concurrent.close()
+            assert seq_text and con_text
+            print(f"{strips:>6} {seq_time:>11.2f}s {con_time:>11.2f}s {seq_time / con_time:>7.1f}x")
+        print(f"max in-flight seen by server: {server.max_in_flight}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""OCR تحت rate limit: تزامن ثابت من غير limiter مقابل token bucket + AIMD بمفتاح ومفتاحين
+
+السيرفر الوهمي بيقبل عدد محدود من الطلبات لكل apikey في الثانية وبيرجع 403 زي OCR.Space
+للطلب الزيادة. الجزء اللي اتعمله throttle في الوضع الثابت بيضيع.
+
+التشغيل:
+    python benchmarks/bench_ocr_rate_limit.py
+"""
+import asyncio
+import logging
+import time
+
+from fakes import FakeOCRServer, make_tall_page
+from ocr_engine import OCREngine
+from rate_limiter import AdaptiveLimiter, KeyPool
+
+
+class _SingleShotPool(KeyPool):
+    """طلب واحد لكل جزء من غير أي إعادة بعد الـ throttle زي الأول"""
+    
+    def __len__(self):
+        return 0
+
+
+def make_engine(url, mode, rate):
+    if mode == 'fixed':
+        # زي الأول: مفتاح واحد من غير bucket، وتزامن ثابت لكل صورة
+        engine = OCREngine(max_concurrency=3, keys=_SingleShotPool(['alpha'], rate=1000, burst=1000))
+        engine.limiter = AdaptiveLimiter(1000, minimum=1000, maximum=1000)
+        engine.max_retries = 0
+    elif mode == 'over-rate':
+        # bucket متظبط ضعف حد السيرفر: الـ AIMD والإيقاف بعد 403 هما اللي بيلحقوا
+        engine = OCREngine(max_concurrency=3, keys=KeyPool(['alpha'], rate=rate * 2, burst=2))
+    else:
+        keys = ['alpha'] if mode == 'adaptive-1key' else ['alpha', 'bravo']
+        # الـ bucket مظبوط على 90% من حد السيرفر زي ما المفروض يتظبط OCR_KEY_RATE
+        engine = OCREngine(max_concurrency=3, keys=KeyPool(keys, rate=rate * 0.9, burst=1))
+    engine.url = url
+    return engine
+
+
+async def run(mode, pages, rate, latency):
+    async with FakeOCRServer(latency=latency, rate_limit=(int(rate), 1.0)) as server:
+        engine = make_engine(server.url, mode, rate)
+        start = time.monotonic()
+        results = await asyncio.gather(*(engine.extract_text(page) for page in pages))
+        elapsed = time.monotonic() - start
+        strips = sum(len(text.split('\n\n---\n\n')) for text in results if text)
+        keys = ", ".join(f"{k['key']}={k['ok']}" for k in engine.keys.stats())
+        limiter = engine.limiter.stats()
+        await engine.close()
+    print(f"{mode:>14}: strips {strips:3d}  throttled {server.throttled:3d}  "
+          f"{elapsed:5.2f}s  keys [{keys}]  limit {limiter['limit']} backoffs {limiter['backoffs']}")
+
+
+async def main(page_count=4, strips=9, rate=4, latency=0.1):
+    pages = [make_tall_page(strips * 2000) for _ in range(page_count)]
+    print(f"{page_count} pages x {strips} strips, server limit {rate}/s per key, latency {latency}s")
+    for mode in ('fixed', 'over-rate', 'adaptive-1key', 'adaptive-2keys'):
+        await run(mode, pages, rate, latency)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""p50/p95/p99 لوقت OCR الصفحة مع سيرفر بيرمي أخطاء وبيعلق أحياناً
+
+بيقارن: من غير إعادة (زي الأول)، إعادة مع backoff، إعادة + hedging عند p95،
+وإعادة + hedging + مهلة للصفحة. الأجزاء الناقصة = اللي ما اتقرتش خالص.
+
+التشغيل:
+    python benchmarks/bench_ocr_tail.py [عدد الصفحات]
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+# الـ token bucket مفتوح هنا عشان القياس يبقى للأعطال بس
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+from fakes import FakeOCRServer, make_tall_page  # noqa: E402
+from ocr_engine import OCREngine  # noqa: E402
+
+MODES = {
+    'no-retry': dict(max_retries=0, hedge=False),
+    'retry': dict(max_retries=3, hedge=False),
+    'retry+hedge': dict(max_retries=3, hedge=True),
+    'retry+hedge+deadline': dict(max_retries=3, hedge=True, job_deadline=2.5),
+}
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def run(mode, page, page_count, parallel, server_args):
+    async with FakeOCRServer(**server_args) as server:
+        engine = OCREngine(max_concurrency=4)
+        engine.url = server.url
+        for name, value in MODES[mode].items():
+            setattr(engine, name, value)
+        engine.retry_base_delay = 0.2
+
+        latencies, missing = [], 0
+        semaphore = asyncio.Semaphore(parallel)
+
+        async def one():
+            nonlocal missing
+            async with semaphore:
+                stats = {}
+                start = time.monotonic()
+                await engine.extract_text(page, stats=stats)
+                latencies.append(time.monotonic() - start)
+                missing += len(stats.get('missing', []))
+
+        # تسخين: الـ hedging محتاج 20 وقت طلب على الأقل قبل ما يحسب p95
+        await asyncio.gather(*(engine.extract_text(page) for _ in range(5)))
+        await asyncio.gather(*(one() for _ in range(page_count)))
+        await engine.close()
+
+    print(f"{mode:>21}: p50 {percentile(latencies, 0.5):5.2f}s  p95 {percentile(latencies, 0.95):5.2f}s  "
+          f"p99 {percentile(latencies, 0.99):5.2f}s  missing {missing:3d}  "
+          f"requests {server.calls:4d}  hedged {engine.hedged:3d}  limit {engine.limiter.stats()['limit']}")
+
+
+async def main(page_count=100, parallel=4):
+    # صفحة رفيعة عشان الضغط ما ياخدش من وقت القياس
+    page = make_tall_page(8000, width=300)
+    server_args = dict(latency=0.2, jitter=0.3, error_rate=0.08, stall_rate=0.04, stall_time=4.0, seed=7)
+    print(f"{page_count} pages x 4 strips, {parallel} pages at a time, "
+          f"errors {server_args['error_rate']:.0%}, stalls {server_args['stall_rate']:.0%} x {server_args['stall_time']}s")
+    for mode in MODES:
+        await run(mode, page, page_count, parallel, server_args)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
@@ -0,0 +1,78 @@
+"""عدد رسائل Discord و 429 لكل صورة: embed في كل رسالة (القديم) مقابل التجميع + throttler
+
+القناة الوهمية بتقلد bucket الـ rate limit بتاع القناة (5 طلبات كل 5 ثواني افتراضياً)،
+وكل send/edit/delete بيتحسب منه.
+
+التشغيل:
+    python benchmarks/bench_output.py
+"""
+import asyncio
+import logging
+import os
+import time
+
+# من غير كاش عشان كل تشغيل يعدي على الـ APIs فعلاً
+os.environ['OCR_CACHE_PATH'] = ''
+os.environ['TRANSLATION_MEMORY_PATH'] = ''
+# و token bucket مفاتيح OCR مفتوح (حدود المفاتيح في bench_ocr_rate_limit)
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+from fakes import (  # noqa: E402
+    FakeAttachment, FakeChannel, FakeFileServer, FakeMessage, FakeOCRServer,
+    FakeTranslateServer, make_tall_page,
+)
+import bot as bot_module  # noqa: E402
+
+
+def configure(bot, packed):
+    if packed:
+        bot.embeds_per_message = bot_module.MAX_EMBEDS
+        bot.max_result_messages = bot_module.RESULT_MAX_MESSAGES
+        bot.status_interval = bot_module.STATUS_EDIT_INTERVAL
+    else:
+        # السلوك القديم: embed واحد في كل رسالة، 10 أجزاء + الملخص، وكل تعديل بيتبعت على طول
+        bot.embeds_per_message = 1
+        bot.max_result_messages = 11
+        bot.status_interval = 0
+
+
+async def run_once(bot, file_url, stream, packed, rate_limit):
+    bot_module.STREAM_RESULTS = stream
+    configure(bot, packed)
+    channel = FakeChannel(rate_limit=rate_limit)
+    message = FakeMessage(channel, [FakeAttachment(file_url)])
+    start = time.monotonic()
+    await bot.process_image(message, message.attachments[0])
+    total = time.monotonic() - start
+    # نستنى أي تعديل متأجل عشان يتحسب
+    await asyncio.sleep(bot.status_interval)
+    edits = sum(1 for _, kind, _ in channel.events if kind == 'edit')
+    embeds = sum(len(m.embeds) for m in channel.sent)
+    files = sum(1 for m in channel.sent if m.file)
+    return len(channel.sent), edits, embeds, files, channel.rate_limited, total
+
+
+async def main(strips=9, ocr_latency=0.2, translate_latency=0.1, rate_limit=(5, 5.0)):
+    page = make_tall_page(strips * 2000)
+    async with FakeOCRServer(latency=ocr_latency, text="말풍선 텍스트 " * 20) as ocr, \
+            FakeTranslateServer(latency=translate_latency) as translate, \
+            FakeFileServer({'page.png': page}) as files:
+        bot = bot_module.ManhwaBot()
+        bot.ocr.url = ocr.url
+        bot.translator.url = translate.url
+
+        print(f"{strips} strips, channel bucket {rate_limit[0]} per {rate_limit[1]}s")
+        print(f"{'mode':>15} {'messages':>9} {'edits':>6} {'embeds':>7} {'files':>6} {'429s':>5} {'total':>7}")
+        for stream in (False, True):
+            for packed in (False, True):
+                sent, edits, embeds, files_sent, limited, total = await run_once(
+                    bot, files.url('page.png'), stream, packed, rate_limit)
+                label = f"{'stream' if stream else 'batch'}/{'packed' if packed else 'legacy'}"
+                print(f"{label:>15} {sent:>9} {edits:>6} {embeds:>7} {files_sent:>6} {limited:>5} {total:>6.2f}s")
+        await bot.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
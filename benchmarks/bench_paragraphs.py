@@ -0,0 +1,101 @@
+"""مقارنة split_into_paragraphs الجديد بالقديم: نفس النتيجة بالظبط وسرعة أعلى
+
+بيجرب آلاف النصوص العشوائية (فيها كل الفواصل) ويتأكد إن النتيجة متطابقة،
+وبعدين بيقيس الوقت على نصوص OCR أكبر من 100 KB.
+
+التشغيل:
+    python benchmarks/bench_paragraphs.py
+"""
+import random
+import sys
+import time
+
+import fakes  # noqa: F401  (بيضيف جذر المشروع للـ path)
+from paragraphs import align_paragraphs, split_into_paragraphs
+
+
+def legacy_split(text, max_length=1500):
+    """نسخة حرفية من ManhwaBot.split_into_paragraphs القديمة"""
+    if not text:
+        return []
+    delimiters = ['\n\n', '\n', '. ', '! ', '? ', '。', '！', '？']
+    paragraphs = []
+    current = ""
+    for char in text:
+        current += char
+        if any(current.endswith(d) for d in delimiters) and len(current) > 50:
+            if len(current) > max_length:
+                words = current.split()
+                temp = ""
+                for word in words:
+                    if len(temp) + len(word) < max_length:
+                        temp += " " + word
+                    else:
+                        if temp:
+                            paragraphs.append(temp.strip())
+                        temp = word
+                if temp:
+                    paragraphs.append(temp.strip())
+            else:
+                paragraphs.append(current.strip())
+            current = ""
+    if current:
+        paragraphs.append(current.strip())
+    return paragraphs
+
+
+ALPHABET = list("abc 안녕하세요 こんにちは") + ['.', '!', '?', ' ', '\n', '\n\n', '。', '！', '？', '. ', '---']
+
+
+def random_text(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def check_equivalence(cases=3000, seed=0):
+    rng = random.Random(seed)
+    for case in range(cases):
+        text = random_text(rng, rng.randint(0, 600))
+        max_length = rng.choice([20, 60, 120, 1500])
+        expected = legacy_split(text, max_length)
+        actual = split_into_paragraphs(text, max_length)
+        if expected != actual:
+            print(f"MISMATCH case {case} max_length={max_length}: {text!r}")
+            return False
+    print(f"{cases} random cases: identical output")
+    return True
+
+
+def make_dump(size, seed=1):
+    """نص شبه ناتج OCR: سطور كوري وإنجليزي وفواصل أجزاء"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = rng.choice(["안녕하세요 여러분!", "What are you doing here?", "그래. 가자", "No way...", "---", "..."])
+        lines.append(line)
+        total += len(line) + 1
+    return '\n'.join(lines)
+
+
+def main():
+    ok = check_equivalence()
+    for size in (100_000, 200_000):
+        text = make_dump(size)
+        start = time.perf_counter()
+        legacy = legacy_split(text)
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        new = split_into_paragraphs(text)
+        new_time = time.perf_counter() - start
+        ok &= legacy == new
+        print(f"{size // 1000}KB: legacy {legacy_time * 1000:7.1f}ms  new {new_time * 1000:6.1f}ms  ({legacy_time / new_time:.0f}x)")
+    
+    segments = [make_dump(800, seed) for seed in range(8)]
+    start = time.perf_counter()
+    pairs = align_paragraphs(segments, segments)
+    print(f"align 8 segments: {len(pairs)} pairs in {(time.perf_counter() - start) * 1000:.1f}ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""وقت أول Embed مقابل الوقت الكلي لـ process_image في وضع الدفعة والوضع المتدفق
+
+بيشغل ManhwaBot على سيرفرات OCR وترجمة وملفات محلية وقناة Discord وهمية.
+
+التشغيل:
+    python benchmarks/bench_pipeline.py
+"""
+import asyncio
+import logging
+import os
+import time
+
+# من غير كاش عشان كل تشغيل يعدي على الـ APIs فعلاً
+os.environ['OCR_CACHE_PATH'] = ''
+os.environ['TRANSLATION_MEMORY_PATH'] = ''
+# و token bucket مفاتيح OCR مفتوح (حدود المفاتيح في bench_ocr_rate_limit)
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+from fakes import (  # noqa: E402
+    FakeAttachment, FakeChannel, FakeFileServer, FakeMessage, FakeOCRServer,
+    FakeTranslateServer, make_tall_page,
+)
+import bot as bot_module  # noqa: E402
+
+
+async def run_once(bot, file_url, stream):
+    bot_module.STREAM_RESULTS = stream
+    channel = FakeChannel()
+    message = FakeMessage(channel, [FakeAttachment(file_url)])
+    start = time.monotonic()
+    await bot.process_image(message, message.attachments[0])
+    total = time.monotonic() - start
+    first = channel.first_embed_time()
+    return (first - start) if first else None, total
+
+
+async def main(strips=8, ocr_latency=0.8, translate_latency=0.3):
+    page = make_tall_page(strips * 2000)
+    async with FakeOCRServer(latency=ocr_latency) as ocr, \
+            FakeTranslateServer(latency=translate_latency) as translate, \
+            FakeFileServer({'page.png': page}) as files:
+        bot = bot_module.ManhwaBot()
+        bot.ocr.url = ocr.url
+        bot.translator.url = translate.url
+        
+        print(f"{strips} strips, OCR {ocr_latency}s, translate {translate_latency}s per call")
+        for stream in (False, True):
+            first, total = await run_once(bot, files.url('page.png'), stream)
+            label = 'stream' if stream else 'batch'
+            print(f"{label:>7}: first embed {first:5.2f}s  total {total:5.2f}s")
+        await bot.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""حجم الرفع ووقت OCR وعدد الحروف، بمرحلة معالجة الأجزاء (OCR_PREPROCESS) ومن غيرها
+
+الصفحات صناعية: رسم بتدرجات و noise زي الـ screentone وفقاعات فيها سطور نص.
+السيرفر الوهمي بيحسب وقت رفع على قد الحجم (bandwidth)، بس الحروف اللي بيرجعها مش OCR حقيقي،
+عشان كده عمود الحروف بيتحسب بس مع --live على OCR.Space الحقيقي (محتاج OCR_API_KEY).
+
+التشغيل:
+    python benchmarks/bench_preprocess.py [--live]
+"""
+import asyncio
+import io
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# الـ token bucket مفتوح والكاش مقفول عشان القياس يبقى للمرحلة بس
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+from fakes import FakeOCRServer  # noqa: E402
+from ocr_engine import OCREngine  # noqa: E402
+from worker_pool import WorkerPool  # noqa: E402
+
+WORDS = "the door was open but nobody came back after the rain stopped and she kept waiting".split()
+
+
+def make_page(seed, height=6000, width=800):
+    """صفحة فيها رسم ملون بـ noise وفقاعات بيضا بنص حقيقي"""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    y = np.linspace(0, 1, height)[:, None, None]
+    top, bottom = np.array([rng.randint(0, 255) for _ in range(3)]), np.array([rng.randint(0, 255) for _ in range(3)])
+    art = (top * (1 - y) + bottom * y).repeat(width, axis=1)
+    art += np_rng.normal(0, 18, art.shape)
+    img = Image.fromarray(np.clip(art, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    
+    top = rng.randint(100, 400)
+    while top < height - 400:
+        x = rng.randint(20, width - 420)
+        lines = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 5))) for _ in range(rng.randint(2, 4))]
+        draw.ellipse((x, top, x + 400, top + 60 + 18 * len(lines)), fill=(255, 255, 255), outline=(0, 0, 0), width=3)
+        for i, line in enumerate(lines):
+            draw.text((x + 50, top + 30 + 18 * i), line, fill=(0, 0, 0))
+        top += rng.randint(500, 900)
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=92)
+    return buf.getvalue()
+
+
+async def run(corpus, preprocess, live):
+    server = None if live else await FakeOCRServer(latency=0.3, bandwidth=1024 * 1024).start()
+    pool = WorkerPool('thread')
+    engine = OCREngine(pool=pool)
+    engine.preprocess = preprocess
+    if server:
+        engine.url = server.url
+    
+    latencies, chars, upload = [], 0, 0
+    for page in corpus:
+        stats = {}
+        start = time.monotonic()
+        text = await engine.extract_text(page, stats=stats)
+        latencies.append(time.monotonic() - start)
+        chars += len(text or '')
+    if server:
+        upload = server.bytes_received
+        await server.stop()
+    await engine.close()
+    pool.close()
+    return upload, sum(latencies) / len(latencies), chars
+
+
+async def main(live=False, pages=12):
+    corpus = [make_page(seed) for seed in range(pages)]
+    print(f"{pages} pages of 800x6000, {'OCR.Space' if live else 'fake OCR at 1 MB/s upload'}")
+    print(f"{'stage':>6} {'upload KB':>10} {'latency/page':>13} {'chars':>7}")
+    for preprocess in (False, True):
+        upload, latency, chars = await run(corpus, preprocess, live)
+        print(f"{'on' if preprocess else 'off':>6} {upload / 1024 if upload else float('nan'):10.0f} "
+              f"{latency:12.2f}s {chars if live else '-':>7}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(main(live='--live' in sys.argv))
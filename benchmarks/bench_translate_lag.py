@@ -0,0 +1,69 @@
+"""قياس تأخير الـ event loop أثناء ترجمة نص طويل
+
+بيقارن الترجمة القديمة (طلبات متزامنة جوه الـ coroutine) بالـ TranslatorEngine
+الجديد اللي شغال على aiohttp.
+
+التشغيل:
+    python benchmarks/bench_translate_lag.py
+"""
+import asyncio
+import json
+import logging
+import time
+import urllib.parse
+import urllib.request
+
+from fakes import FakeTranslateServer, LoopLagMonitor
+from translator_engine import TranslatorEngine
+
+
+def blocking_translate(url, text):
+    """نسخة من المسار القديم: كشف + ترجمة لكل جزء و sleep(0.5) بين الأجزاء"""
+    chunks = [text[i:i+1000] for i in range(0, len(text), 1000)]
+    out = []
+    for chunk in chunks:
+        for sl in ("auto", "ko"):
+            query = urllib.parse.urlencode({"client": "gtx", "sl": sl, "tl": "ar", "dt": "t", "q": chunk})
+            with urllib.request.urlopen(f"{url}?{query}", timeout=15) as resp:
+                result = json.loads(resp.read())
+        out.append(result[0][0][0])
+        time.sleep(0.5)
+    return ' '.join(out)
+
+
+async def measure(label, coro_factory):
+    monitor = await LoopLagMonitor().start()
+    start = time.perf_counter()
+    await coro_factory()
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    print(f"{label:>10}: total {elapsed:6.2f}s  max loop lag {monitor.max_lag * 1000:8.1f}ms")
+
+
+async def main(chars=12000):
+    text = ("안녕하세요 " * (chars // 6 + 1))[:chars]
+    async with FakeTranslateServer(latency=0.2) as server:
+        loop = asyncio.get_running_loop()
+        print(f"text: {len(text)} chars")
+        
+        async def blocking():
+            # بنشغلها جوه الـ loop مباشرة زي ما كان البوت بيعمل
+            blocking_translate(server.url, text)
+        
+        # السيرفر نفسه شغال على نفس الـ loop، فالمسار القديم محتاج thread للسيرفر
+        # عشان ما يحصلش deadlock؛ بنقيس اللاج على loop تاني بيقلد الـ gateway
+        def blocking_in_own_loop():
+            async def inner():
+                await measure("blocking", blocking)
+            asyncio.run(inner())
+        await loop.run_in_executor(None, blocking_in_own_loop)
+        
+        engine = TranslatorEngine()
+        engine.url = server.url
+        await measure("async", lambda: engine.translate(text))
+        await engine.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""حجم الرفع وأقصى ذاكرة لكل جزء: base64 في data URI (القديم) مقابل multipart من الـ memoryview
+
+السيرفر الوهمي شغال في process تانية عشان tracemalloc يقيس ذاكرة الـ client بس.
+الـ bytes على السلك = Content-Length اللي السيرفر استلمه.
+
+التشغيل:
+    python benchmarks/bench_upload.py
+"""
+import asyncio
+import gc
+import logging
+import multiprocessing
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from fakes import FakeOCRServer
+from ocr_engine import OCREngine
+
+
+def serve(conn):
+    async def run():
+        async with FakeOCRServer(latency=0) as server:
+            conn.send(server.url)
+            await asyncio.Event().wait()
+    asyncio.run(run())
+
+
+def make_strips(count=6, width=800, height=2000):
+    """أجزاء فيها noise عشان الـ JPEG يقرب من حد الـ 900KB"""
+    rng = np.random.default_rng(0)
+    engine = OCREngine()
+    strips = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        buffer, size_kb, encodes = engine.compress_part(Image.fromarray(pixels))
+        strips.append(buffer)
+    return strips
+
+
+async def server_bytes(engine, url):
+    session = await engine.http.get_session()
+    async with session.get(url.replace('/parse/image', '/stats')) as resp:
+        return (await resp.json())['bytes_received']
+
+
+async def measure(engine, url, strips, mode):
+    engine.upload_mode = mode
+    before = await server_bytes(engine, url)
+    peaks = []
+    for i, strip in enumerate(strips, 1):
+        gc.collect()
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        # القديم كان بياخد نسخة bytes من الـ BytesIO قبل الـ base64
+        payload = strip.getvalue() if mode == 'base64' else strip.getbuffer()
+        outcome, text, retry_after = await engine._post_part(payload, 'key', i, len(strips))
+        del payload
+        assert outcome == 'ok', outcome
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    wire = await server_bytes(engine, url) - before
+    return wire, peaks
+
+
+async def main():
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=serve, args=(child,), daemon=True)
+    proc.start()
+    url = parent.recv()
+    try:
+        strips = make_strips()
+        jpeg_bytes = sum(strip.getbuffer().nbytes for strip in strips)
+        engine = OCREngine()
+        engine.url = url
+        # تسخين الجلسة عشان إنشاء الاتصال ما يتحسبش
+        await engine._post_part(strips[0].getvalue(), 'key', 0, 0)
+
+        tracemalloc.start()
+        print(f"{len(strips)} strips, {jpeg_bytes / 1024:.0f} KB of JPEG")
+        print(f"{'mode':>10} {'wire KB':>9} {'vs JPEG':>8} {'peak/strip KB':>14} {'peak / JPEG':>12}")
+        for mode in ('base64', 'multipart'):
+            wire, peaks = await measure(engine, url, strips, mode)
+            peak = sum(peaks) / len(peaks)
+            print(f"{mode:>10} {wire / 1024:9.0f} {wire / jpeg_bytes:7.2f}x {peak / 1024:14.0f} "
+                  f"{peak * len(strips) / jpeg_bytes:11.2f}x")
+        tracemalloc.stop()
+        await engine.close()
+    finally:
+        proc.terminate()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
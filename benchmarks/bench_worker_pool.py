@@ -0,0 +1,51 @@
+"""قياس تأخير الـ event loop والإنتاجية مع N رفعات كبيرة في نفس الوقت
+
+بيقارن فك وضغط الصور على الـ event loop نفسه بالـ WorkerPool (threads و processes).
+
+التشغيل:
+    python benchmarks/bench_worker_pool.py [N]
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+# الـ token bucket مفتوح هنا عشان القياس يبقى للتزامن بس (حدود المفاتيح في bench_ocr_rate_limit)
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+from fakes import FakeOCRServer, LoopLagMonitor, make_tall_page  # noqa: E402
+from ocr_engine import OCREngine  # noqa: E402
+from worker_pool import WorkerPool  # noqa: E402
+
+
+async def run_jobs(engine, pages):
+    monitor = await LoopLagMonitor().start()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(engine.extract_text(page) for page in pages))
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    assert all(results)
+    return elapsed, monitor.max_lag
+
+
+async def main(uploads=4):
+    pages = [make_tall_page(12000, width=1000, fmt='PNG') for _ in range(uploads)]
+    async with FakeOCRServer(latency=0.05) as server:
+        print(f"{uploads} simultaneous 1000x12000 uploads")
+        print(f"{'mode':>10} {'total':>8} {'pages/s':>8} {'max lag':>10}")
+        for kind in (None, 'thread', 'process'):
+            pool = WorkerPool(kind) if kind else None
+            engine = OCREngine(pool=pool)
+            engine.url = server.url
+            elapsed, lag = await run_jobs(engine, pages)
+            print(f"{kind or 'inline':>10} {elapsed:>7.2f}s {uploads / elapsed:>8.2f} {lag * 1000:>8.1f}ms")
+            await engine.close()
+            if pool:
+                pool.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 4))
@@ -0,0 +1,85 @@
+"""فحص أقصى RSS لما كذا صفحة طويلة بتتعالج في نفس الوقت، بالفك القديم والفك قليل الذاكرة
+
+كل وضع بيشتغل في process لوحده (ru_maxrss بيفضل على أعلى قيمة طول عمر الـ process)، وكاش OCR
+شغال على ملف فاضي زي الإعداد الافتراضي عشان البحث بالشبه يتقاس جوه الميزانية.
+الحد بيتفحص على الإعداد اللي البوت شغال بيه (فك قليل الذاكرة + MemoryBudget)، والباقي للمقارنة.
+بيخرج بـ 1 لو عدى الحد أو صفحة فشلت.
+
+التشغيل:
+    python benchmarks/check_memory.py [الحد بالميجا، افتراضي 350] [الميزانية بالميجا، افتراضي 200]
+"""
+import asyncio
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+# الـ token bucket مفتوح عشان القياس يبقى للذاكرة بس
+os.environ.setdefault('OCR_KEY_RATE', '1000')
+os.environ.setdefault('OCR_KEY_BURST', '1000')
+
+PAGES = 4
+WIDTH, HEIGHT = 1600, 18000
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def child(mode, fmt, budget_mb):
+    from fakes import FakeOCRServer, make_tall_page
+    from memory_budget import MemoryBudget
+    from ocr_cache import OCRCache
+    from ocr_engine import OCREngine
+    from worker_pool import WorkerPool
+
+    pages = [make_tall_page(HEIGHT, WIDTH, fmt) for _ in range(PAGES)]
+    baseline = rss_mb()
+    async with FakeOCRServer(latency=0.05) as server:
+        budget = MemoryBudget(budget_mb * 1024 * 1024) if budget_mb else None
+        cache = OCRCache(os.path.join(tempfile.mkdtemp(prefix='check_memory_'), 'ocr_cache.sqlite3'))
+        engine = OCREngine(cache=cache, budget=budget)
+        engine.url = server.url
+        engine.low_memory = mode == 'low'
+        # الصفحات بتتعالج في threads زي الـ WorkerPool الافتراضي
+        engine.pool = WorkerPool('thread', PAGES)
+        results = await asyncio.gather(*(engine.extract_text(page) for page in pages))
+        engine.pool.close()
+        await engine.close()
+        cache.close()
+    ok = all(results)
+    postponed = budget.stats()['postponed'] if budget else 0
+    print(f"{rss_mb() - baseline:.0f} {int(ok)} {postponed}")
+
+
+def run_child(mode, fmt, budget_mb):
+    out = subprocess.run(
+        [sys.executable, __file__, '--child', mode, fmt, str(budget_mb)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[0]), out[1] == '1', int(out[2])
+
+
+def main(cap_mb=350, budget_mb=200):
+    print(f"{PAGES} pages of {WIDTH}x{HEIGHT} at once, cap {cap_mb} MB over baseline")
+    failed = False
+    for fmt in ('PNG', 'JPEG'):
+        for mode, budget in (('legacy', 0), ('low', 0), ('low', budget_mb)):
+            peak, ok, postponed = run_child(mode, fmt, budget)
+            label = f"{mode}{f' + {budget}MB budget' if budget else ''}"
+            verdict = ''
+            if budget:
+                verdict = 'OK' if peak <= cap_mb and ok else 'FAIL'
+                failed |= verdict == 'FAIL'
+            print(f"{fmt:>5} {label:>22}: peak RSS +{peak:5.0f} MB  pages ok {ok}  postponed {postponed}  {verdict}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        asyncio.run(child(sys.argv[2], sys.argv[3], int(sys.argv[4])))
+    else:
+        main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,74 @@
+"""مجموعة صفحات طويلة صناعية للتأكد إن التقسيم ما بيقطعش أي سطر نص
+
+بيولد صفحات فيها فقاعات وسطور نص في أماكن عشوائية (بعضها قريب من حدود
+الـ 2000 بكسل)، ويعد كام سطر اتقطع مع كل طريقة تقسيم.
+
+التشغيل:
+    python benchmarks/check_split_corpus.py
+"""
+import io
+import logging
+import random
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+import fakes  # noqa: F401  (بيضيف جذر المشروع للـ path)
+from ocr_engine import OCREngine
+
+
+def make_page(seed, height, width=800):
+    """صفحة بخلفية ملونة أحياناً وفقاعات فيها سطور نص، وبترجع أماكن السطور"""
+    rng = random.Random(seed)
+    background = rng.choice([(255, 255, 255), (0, 0, 0), (235, 225, 200)])
+    ink = (0, 0, 0) if sum(background) > 300 else (255, 255, 255)
+    img = Image.new('RGB', (width, height), background)
+    draw = ImageDraw.Draw(img)
+    
+    text_rows = []
+    y = rng.randint(20, 200)
+    while y < height - 300:
+        bubble_h = rng.randint(80, 260)
+        x = rng.randint(20, width // 2)
+        draw.ellipse((x, y, x + rng.randint(250, 380), y + bubble_h), outline=ink, width=3)
+        line_y = y + 20
+        while line_y + 14 < y + bubble_h - 15:
+            draw.rectangle((x + 40, line_y, x + 220, line_y + 12), fill=ink)
+            text_rows.append((line_y, line_y + 12))
+            line_y += 22
+        # الفراغ بين الفقاعات ساعات بيبقى صغير جداً
+        y += bubble_h + rng.choice([15, 40, 120, 400])
+    
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue(), text_rows
+
+
+def count_split_rows(parts, text_rows):
+    cuts = [y_end for _, _, y_end in parts[:-1]]
+    return sum(1 for top, bottom in text_rows for cut in cuts if top < cut <= bottom)
+
+
+def main(pages=40):
+    corpus = [make_page(seed, random.Random(seed).randint(6000, 15000)) for seed in range(pages)]
+    failed = False
+    for strategy in ('fixed', 'gutter'):
+        engine = OCREngine(split_strategy=strategy)
+        split_rows = 0
+        max_part = 0
+        start = time.perf_counter()
+        for page, text_rows in corpus:
+            parts = engine.split_image(page)
+            split_rows += count_split_rows(parts, text_rows)
+            max_part = max(max_part, max(y_end - y_start for _, y_start, y_end in parts))
+        elapsed = time.perf_counter() - start
+        print(f"{strategy:>6}: {split_rows} text rows split, tallest part {max_part}px, {elapsed:.2f}s for {pages} pages")
+        if strategy == 'gutter' and (split_rows or max_part > engine.part_height):
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
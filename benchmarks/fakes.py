@@ -0,0 +1,440 @@
+"""سيرفرات محلية بتقلد الـ APIs الخارجية عشان القياس من غير إنترنت"""
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from aiohttp import web
+
+# عشان السكربتات تقدر تستورد موديولات البوت من جذر المشروع
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeOCRServer:
+    """سيرفر بيرد بنفس شكل رد OCR.Space على /parse/image
+    
+    rate_limit=(عدد، ثواني) لكل apikey: الطلب الزيادة بيرجع 403 برسالة OCR.Space
+    ومعاه Retry-After لحد ما يفضى مكان.
+    jitter بيخلي الـ latency عشوائية بين (1-jitter) و (1+jitter) منها، و error_rate نسبة
+    الردود 500، و stall_rate نسبة الطلبات اللي بتعلق stall_time ثانية قبل ما ترد.
+    bandwidth (bytes/ث) بيضيف وقت رفع على قد حجم الطلب.
+    """
+    
+    def __init__(self, latency=0.3, text="fake text", rate_limit=None, jitter=0.0,
+                 error_rate=0.0, stall_rate=0.0, stall_time=5.0, seed=None, bandwidth=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.text = text
+        self.rate_limit = rate_limit
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall_time = stall_time
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.bytes_received = 0  # حجم أجسام الطلبات على السلك
+        self.throttled = 0
+        self.errors = 0
+        self.stalls = 0
+        self.key_calls = {}  # apikey -> طلبات اتقبلت
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._windows = {}
+        self._runner = None
+        self.url = None
+    
+    def _over_limit(self, key):
+        """لو الطلب ده هيعدي حد المفتاح بيرجع الثواني لحد ما يفضى مكان"""
+        if not self.rate_limit:
+            return None
+        count, per = self.rate_limit
+        window = self._windows.setdefault(key, deque())
+        now = time.monotonic()
+        while window and now - window[0] >= per:
+            window.popleft()
+        if len(window) >= count:
+            return window[0] + per - now
+        window.append(now)
+        return None
+    
+    async def handle_stats(self, request):
+        # للقياس لما السيرفر شغال في process تانية
+        return web.json_response({
+            'calls': self.calls, 'bytes_received': self.bytes_received,
+            'throttled': self.throttled, 'errors': self.errors, 'stalls': self.stalls,
+        })
+    
+    async def handle_parse(self, request):
+        self.calls += 1
+        call = self.calls  # النص بياخد رقم الطلب نفسه عشان الطلبات المتزامنة ما ترجعش نفس النص
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.bytes_received += request.content_length or 0
+            if self.bandwidth:
+                await asyncio.sleep((request.content_length or 0) / self.bandwidth)
+            form = await request.post()
+            key = form.get('apikey')
+            wait = self._over_limit(key)
+            if wait is not None:
+                self.throttled += 1
+                return web.json_response({
+                    'IsErroredOnProcessing': True,
+                    'ErrorMessage': [f"You may only perform this action upto maximum {self.rate_limit[0]} number of times within {self.rate_limit[1]} seconds"],
+                }, status=403, headers={'Retry-After': f"{wait:.2f}"})
+            self.key_calls[key] = self.key_calls.get(key, 0) + 1
+            roll = self.random.random()
+            if roll < self.error_rate:
+                self.errors += 1
+                await asyncio.sleep(self.latency)
+                return web.Response(status=500, text="Internal Server Error")
+            if roll < self.error_rate + self.stall_rate:
+                self.stalls += 1
+                await asyncio.sleep(self.stall_time)
+            await asyncio.sleep(self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+            return web.json_response({
+                'IsErroredOnProcessing': False,
+                'ParsedResults': [{'ParsedText': f"{self.text} {call}"}],
+            })
+        finally:
+            self.in_flight -= 1
+    
+    async def start(self):
+        app = web.Application(client_max_size=10 * 1024 * 1024)
+        app.router.add_post('/parse/image', self.handle_parse)
+        app.router.add_get('/stats', self.handle_stats)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/parse/image"
+        return self
+    
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+    
+    async def __aenter__(self):
+        return await self.start()
+    
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+class FakeTranslateServer:
+    """سيرفر بيرد بنفس شكل رد Google على /translate_a/single
+    
+    rate_limit=(عدد، ثواني) للسيرفر كله: الطلب الزيادة بيرجع 429 زي Google،
+    و error_rate نسبة الردود 500، و jitter زي FakeOCRServer.
+    """
+    
+    def __init__(self, latency=0.2, detected_lang="ko", jitter=0.0, error_rate=0.0, rate_limit=None, seed=None):
+        self.latency = latency
+        self.detected_lang = detected_lang
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.detect_calls = 0
+        self.chars = 0
+        self.throttled = 0
+        self.errors = 0
+        self._window = deque()
+        self._runner = None
+        self.url = None
+    
+    def _over_limit(self):
+        if not self.rate_limit:
+            return False
+        count, per = self.rate_limit
+        now = time.monotonic()
+        while self._window and now - self._window[0] >= per:
+            self._window.popleft()
+        if len(self._window) >= count:
+            return True
+        self._window.append(now)
+        return False
+    
+    async def handle_stats(self, request):
+        return web.json_response({
+            'calls': self.calls, 'detect_calls': self.detect_calls, 'chars': self.chars,
+            'throttled': self.throttled, 'errors': self.errors,
+        })
+    
+    async def handle_translate(self, request):
+        self.calls += 1
+        q = request.query.get('q', '')
+        if self._over_limit():
+            self.throttled += 1
+            return web.Response(status=429, text="Too Many Requests")
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            await asyncio.sleep(self.latency)
+            return web.Response(status=500, text="Internal Server Error")
+        if request.query.get('sl') == 'auto':
+            self.detect_calls += 1
+        else:
+            self.chars += len(q)
+        await asyncio.sleep(self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+        # Google بيرجع جزء لكل جملة، والسطر الجديد بيفضل في آخر الجزء
+        lines = q.split('\n')
+        parts = [[f"ع{line}\n" if i < len(lines) - 1 else f"ع{line}", line] for i, line in enumerate(lines)]
+        return web.json_response([parts, None, self.detected_lang])
+    
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/translate_a/single', self.handle_translate)
+        app.router.add_get('/stats', self.handle_stats)
+        # Google بيقبل URLs أطول من حد aiohttp الافتراضي
+        self._runner = web.AppRunner(app, max_line_size=64 * 1024)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/translate_a/single"
+        return self
+    
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+    
+    async def __aenter__(self):
+        return await self.start()
+    
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+class LoopLagMonitor:
+    """بيقيس تأخير الـ event loop عن طريق sleep صغير متكرر"""
+    
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+    
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        await asyncio.sleep(0)  # عشان أول sleep يبدأ قبل الشغل المقاس
+        return self
+    
+    async def stop(self):
+        await asyncio.sleep(self.interval * 2)  # عشان آخر تأخير يتسجل
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+    
+    @property
+    def max_lag(self):
+        return max(self.lags, default=0.0)
+
+
+class FakeSentMessage:
+    """رسالة Discord متبعتة: بتسجل التعديلات والحذف"""
+    
+    def __init__(self, channel, content=None, embed=None, embeds=None, file=None, view=None):
+        self.channel = channel
+        self.id = len(channel.sent) + 1
+        self.content = content
+        self.embeds = embeds or ([embed] if embed else [])
+        self.file = file
+        self.view = view
+        self.deleted = False
+    
+    async def edit(self, content=None, **kwargs):
+        await self.channel.take_slot()
+        self.channel.record('edit', content)
+        self.content = content
+    
+    async def delete(self):
+        await self.channel.take_slot()
+        self.channel.record('delete', None)
+        self.deleted = True
+
+
+class FakeChannel:
+    """قناة Discord بتسجل كل send و edit بوقتها
+    
+    rate_limit=(عدد، ثواني) بيقلد الـ bucket بتاع القناة: الطلب الزيادة بيتحسب 429
+    وبيستنى لحد ما يفضى مكان زي ما discord.py بيعمل مع retry_after.
+    """
+    
+    def __init__(self, rate_limit=None):
+        self.id = id(self)
+        self.sent = []
+        self.events = []  # (الوقت، النوع، المحتوى)
+        self.rate_limit = rate_limit
+        self.rate_limited = 0
+        self._calls = deque()
+    
+    def record(self, kind, content):
+        self.events.append((time.monotonic(), kind, content))
+    
+    async def take_slot(self):
+        if not self.rate_limit:
+            return
+        count, per = self.rate_limit
+        limited = False
+        while True:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= per:
+                self._calls.popleft()
+            if len(self._calls) < count:
+                break
+            if not limited:
+                self.rate_limited += 1
+                limited = True
+            await asyncio.sleep(self._calls[0] + per - now)
+        self._calls.append(time.monotonic())
+    
+    async def send(self, content=None, embed=None, embeds=None, file=None, view=None):
+        await self.take_slot()
+        message = FakeSentMessage(self, content, embed, embeds, file, view)
+        self.sent.append(message)
+        self.record('send', content)
+        return message
+    
+    def get_partial_message(self, message_id):
+        return next(message for message in self.sent if message.id == message_id)
+    
+    def typing(self):
+        return _NoTyping()
+    
+    def first_embed_time(self):
+        for (at, kind, _), message in zip((e for e in self.events if e[1] == 'send'), self.sent):
+            if message.embeds:
+                return at
+        return None
+
+
+class _NoTyping:
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeAttachment:
+    def __init__(self, url, filename='page.png'):
+        self.url = url
+        self.filename = filename
+
+
+class FakeMessage:
+    def __init__(self, channel, attachments=(), author_id=1, guild_id=1):
+        self.channel = channel
+        self.attachments = list(attachments)
+        self.author = SimpleNamespace(id=author_id, display_name=f"user{author_id}", avatar=None)
+        self.guild = SimpleNamespace(id=guild_id)
+
+
+class FakeFileServer:
+    """سيرفر بيقدم ملفات الصور زي Discord CDN"""
+    
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+        self._runner = None
+        self.base = None
+    
+    def url(self, name):
+        return f"{self.base}/{name}"
+    
+    async def handle(self, request):
+        data = self.files.get(request.match_info['name'])
+        if data is None:
+            return web.Response(status=404)
+        return web.Response(body=data, content_type='image/png')
+    
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/{name}', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+    
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+    
+    async def __aenter__(self):
+        return await self.start()
+    
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+def make_tall_page(height, width=800, fmt='PNG'):
+    """صفحة ويبتون صناعية طويلة فيها سطور نص كل شوية"""
+    import io
+    from PIL import Image, ImageDraw
+    
+    img = Image.new('RGB', (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    for y in range(100, height - 50, 400):
+        draw.text((50, y), f"line at {y}", fill=(0, 0, 0))
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def make_webtoon_page(height, width=800, fmt='PNG', seed=0):
+    """صفحة ويبتون صناعية أقرب للحقيقة: فقاعات بأحجام مختلفة، مساحات فاضية، وشريط متكرر أحياناً"""
+    import io
+    from PIL import Image, ImageDraw
+    
+    rng = random.Random(seed)
+    img = Image.new('RGB', (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    y = rng.randint(100, 600)
+    while y < height - 400:
+        if rng.random() < 0.2:
+            # مساحة فاضية بين المشاهد (الأجزاء الفاضية بتتخطى قبل OCR)
+            y += rng.randint(1500, 3000)
+            continue
+        # خلفية المشهد بلون هادي وفقاعة فيها كام سطر
+        panel = rng.randint(300, 900)
+        tone = rng.randint(200, 245)
+        draw.rectangle((0, y, width, min(height, y + panel)), fill=(tone, tone, rng.randint(200, 255)))
+        bubble_w, lines = rng.randint(width // 3, width - 80), rng.randint(1, 4)
+        x0 = rng.randint(20, max(21, width - bubble_w - 20))
+        draw.ellipse((x0, y + 40, x0 + bubble_w, y + 80 + lines * 30), fill=(255, 255, 255), outline=(0, 0, 0))
+        for n in range(lines):
+            draw.text((x0 + bubble_w // 5, y + 60 + n * 30), f"line {y} {n}", fill=(0, 0, 0))
+        y += panel + rng.randint(100, 700)
+    if height >= 8000 and rng.random() < 0.3:
+        # نفس الشريط متكرر في آخر الصفحة زي اللوجو أو الـ credits
+        band = img.crop((0, 0, width, 2000))
+        img.paste(band, (0, height - 2000))
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **({'quality': 90} if fmt == 'JPEG' else {}))
+    return buf.getvalue()
+
+
+def make_corpus(count, seed=0):
+    """{الاسم: bytes} صفحات بأطوال وعروض وصيغ مختلفة، ثابتة لنفس الـ seed"""
+    rng = random.Random(seed)
+    corpus = {}
+    for i in range(count):
+        height = rng.choice((4000, 8000, 12000, 16000, 19000))
+        width = rng.choice((690, 800, 1080))
+        fmt = rng.choice(('PNG', 'PNG', 'JPEG'))
+        corpus[f"page{i:03d}.{'jpg' if fmt == 'JPEG' else 'png'}"] = make_webtoon_page(height, width, fmt, seed * 1000 + i)
+    return corpus
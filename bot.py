@@ -1,14 +1,45 @@
 import discord
 from discord.ext import commands
+import asyncio
 import logging
+import time
 from datetime import datetime
-import aiohttp
-from config import DISCORD_TOKEN, SUPPORTED_FORMATS
-from ocr_engine import OCREngine
-from translator_engine import TranslatorEngine
+from config import (
+    DISCORD_TOKEN, SUPPORTED_FORMATS, JOB_WORKERS, JOB_QUEUE_MAX, STREAM_RESULTS, RESULT_MAX_MESSAGES,
+    STATUS_EDIT_INTERVAL, METRICS_HOST, METRICS_PORT, METRICS_WINDOW,
+    JOB_STORE_PATH, JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL, JOB_WORKER_PROCESSES,
+    CHAPTER_MIN_PAGES, CHAPTER_COLLECT_SECONDS, CHAPTER_MAX_PAGES,
+)
+from discord_output import (
+    MAX_EMBEDS, MAX_FIELD_CHARS, PAGE_FAILURES, EmbedPager, StatusThrottler,
+    format_chapter, format_parts, is_cut, pack_embeds, text_file,
+)
+from job_queue import JobScheduler, QueueFull
+from job_store import JobStore
+from metrics import Metrics, MetricsServer
+from ocr_engine import PART_SEPARATOR
+from paragraphs import split_into_paragraphs
+from pipeline import Pipeline
+from worker import LocalWorkers
+from worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
+# ترتيب المراحل في !stats بنفس ترتيب المعالجة
+STAGES = (
+    'queue_wait', 'download', 'memory_wait', 'split', 'compress', 'ocr_wait', 'ocr_request', 'ocr_ocrspace', 'ocr_tesseract', 'ocr',
+    'detect', 'translate_request', 'translate', 'send', 'first_output', 'total',
+)
+
+def attachment_ext(attachment):
+    return attachment.filename.lower().split('.')[-1]
+
+
+def author_of(message):
+    """اسم صاحب الرسالة وصورته للـ footer (بيتبعتوا للـ worker كنصوص)"""
+    return message.author.display_name, message.author.avatar.url if message.author.avatar else None
+
+
 class ManhwaBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.default()
@@ -17,11 +48,61 @@ class ManhwaBot(commands.Bot):
         
         super().__init__(command_prefix='!', intents=intents)
         
-        self.ocr = OCREngine()
-        self.translator = TranslatorEngine()
+        # وقت كل مرحلة وعداداتها، مشتركة بين البوت والـ engines
+        self.metrics = Metrics(window=METRICS_WINDOW)
+        self.metrics_server = MetricsServer(self.metrics, METRICS_HOST, int(METRICS_PORT)) if METRICS_PORT else None
+        # مع JOB_STORE_PATH الشغلانات بتروح طابور SQLite والـ workers processes منفصلة، والبوت بيبعت النتايج بس
+        self.store = JobStore(JOB_STORE_PATH, JOB_MAX_ATTEMPTS, JOB_QUEUE_MAX) if JOB_STORE_PATH else None
+        self.local_workers = LocalWorkers(JOB_WORKER_PROCESSES) if self.store and JOB_WORKER_PROCESSES else None
+        # نداءات SQLite (ممكن تستنى lock لحد 10 ث) في thread واحد بعيد عن loop الـ Discord
+        self.store_thread = WorkerPool('thread', 1) if self.store else None
+        self.queue_stats = {'queued': 0, 'leased': 0}  # آخر إحصائيات للطابور الدائم، بتتحدث مع كل لفة توصيل
+        if self.store:
+            # البوت gateway بس: مفيش engines ولا مفاتيح ولا ميزانية ذاكرة هنا، كلها في الـ workers
+            self.pipeline = None
+            self.http_client = self.ocr_cache = self.downloader = self.pool = None
+            self.memory_budget = self.ocr = self.translation_memory = self.translator = None
+        else:
+            # التحميل والـ OCR والترجمة نفسها، نفس اللي بيشتغل في worker.py
+            self.pipeline = Pipeline(self.metrics)
+            # جلسة HTTP واحدة لكل الـ engines (مش self.http عشان ده بتاع discord.py)
+            self.http_client = self.pipeline.http_client
+            self.ocr_cache = self.pipeline.ocr_cache
+            self.downloader = self.pipeline.downloader
+            self.pool = self.pipeline.pool
+            self.memory_budget = self.pipeline.memory_budget
+            self.ocr = self.pipeline.ocr
+            self.translation_memory = self.pipeline.translation_memory
+            self.translator = self.pipeline.translator
+        self.scheduler = JobScheduler(JOB_WORKERS, JOB_QUEUE_MAX)
+        self.job_status = {}  # id الشغلانة -> رسالة الحالة بتاعتها
+        # الفصول اللي لسه بتتجمع: (القناة، المستخدم) -> {'message', 'attachments', 'task'}
+        self.pending_chapters = {}
+        self.delivery_task = None
         self.start_time = datetime.now()
         self.count = 0
         self.temp_messages = []  # للرسائل المؤقتة
+        # حدود رسائل النتيجة وعداد الرسائل والتعديلات لكل صورة
+        self.embeds_per_message = MAX_EMBEDS
+        self.max_result_messages = RESULT_MAX_MESSAGES
+        self.status_interval = STATUS_EDIT_INTERVAL
+        self.output_stats = {'images': 0, 'messages': 0, 'edits': 0}
+        self.register_gauges()
+        
+    def register_gauges(self):
+        """الحالة اللحظية بتتقري وقت الـ scrape بس"""
+        if self.store:
+            self.metrics.gauge('queue_depth', lambda: self.queue_stats['queued'], "شغلانات مستنية في الطابور")
+            self.metrics.gauge('jobs_running', lambda: self.queue_stats['leased'], "شغلانات شغالة دلوقتي")
+        else:
+            self.metrics.gauge('queue_depth', lambda: self.scheduler.depth, "شغلانات مستنية في الطابور")
+            self.metrics.gauge('jobs_running', lambda: self.scheduler.running, "شغلانات شغالة دلوقتي")
+            # في وضع الطابور الدائم دول بيطلعوا من /metrics بتاع كل worker
+            self.metrics.gauge('memory_reserved_bytes', lambda: self.memory_budget.used, "ذاكرة محجوزة لفك الصور")
+            self.metrics.gauge('ocr_concurrency_limit', lambda: self.ocr.limiter.stats()['limit'], "حد تزامن OCR الحالي")
+            self.metrics.gauge('ocr_in_flight', lambda: self.ocr.limiter.in_flight, "طلبات OCR شغالة")
+        self.metrics.gauge('images_translated', lambda: self.count, "صور اتترجمت من وقت التشغيل")
+        self.metrics.gauge('uptime_seconds', lambda: round((datetime.now() - self.start_time).total_seconds()))
         
     async def on_ready(self):
         logger.info(f'✅ البوت شغال! {self.user.name}')
@@ -39,181 +120,596 @@ class ManhwaBot(commands.Bot):
         
         await self.process_commands(message)
         
-        if message.attachments:
-            async with message.channel.typing():
-                for attachment in message.attachments:
-                    await self.process_image(message, attachment)
+        if not message.attachments:
+            return
+        # !chapter بيتعامل مع مرفقاته بنفسه
+        ctx = await self.get_context(message)
+        if ctx.valid and ctx.command.name == 'chapter':
+            return
+        await self.collect_attachments(message)
     
-    async def download_image(self, url):
-        """تحميل الصورة مع متابعة الحجم"""
+    async def collect_attachments(self, message):
+        """الرسالة اللي فيها كذا صورة (أو اللي بعدها على طول من نفس المستخدم) بتتجمع كفصل واحد"""
+        key = (message.channel.id, message.author.id)
+        batch = self.pending_chapters.get(key)
+        images = [a for a in message.attachments if attachment_ext(a) in SUPPORTED_FORMATS]
+        others = [a for a in message.attachments if attachment_ext(a) not in SUPPORTED_FORMATS]
+        if not CHAPTER_MIN_PAGES or (batch is None and len(images) < 2):
+            for attachment in message.attachments:
+                await self.enqueue_image(message, attachment)
+            return
+        
+        # الملفات اللي مش صور بتاخد رسالة الخطأ بتاعتها زي الأول
+        for attachment in others:
+            await self.enqueue_image(message, attachment)
+        if batch is None:
+            batch = self.pending_chapters[key] = {'message': message, 'attachments': [], 'task': None}
+        else:
+            batch['task'].cancel()
+        batch['attachments'] += images
+        batch['task'] = asyncio.create_task(self.flush_chapter(key))
+    
+    async def flush_chapter(self, key):
+        """بعد مهلة التجميع من غير رسائل جديدة: فصل لو عدد الصفحات كفاية، وإلا كل صورة لوحدها"""
+        await asyncio.sleep(CHAPTER_COLLECT_SECONDS)
+        batch = self.pending_chapters.pop(key)
+        if len(batch['attachments']) >= CHAPTER_MIN_PAGES:
+            await self.enqueue_chapter(batch['message'], batch['attachments'])
+        else:
+            for attachment in batch['attachments']:
+                await self.enqueue_image(batch['message'], attachment)
+    
+    async def enqueue_chapter(self, message, attachments):
+        """الفصل كله شغلانة واحدة في الطابور (والطويل أوي بيتقسم)"""
+        for start in range(0, len(attachments), CHAPTER_MAX_PAGES):
+            pages = attachments[start:start + CHAPTER_MAX_PAGES]
+            if self.store:
+                await self.enqueue_stored(message, {
+                    'pages': [{'url': a.url, 'filename': a.filename, 'ext': attachment_ext(a)} for a in pages],
+                })
+                continue
+            
+            queued_at = time.monotonic()
+            
+            async def run(pages=pages, queued_at=queued_at):
+                self.metrics.observe('queue_wait', time.monotonic() - queued_at)
+                async with message.channel.typing():
+                    await self.process_chapter(message, pages)
+            
+            try:
+                position = await self.scheduler.submit(message.author.id, message.guild.id if message.guild else None, run)
+            except QueueFull:
+                await message.channel.send("⛔ **الطابور مليان حالياً**\nجرب تاني بعد شوية")
+                return
+            if position > self.scheduler.idle_workers():
+                queued = await message.channel.send(f"⏳ **فصل من {len(pages)} صفحة في الطابور** - ترتيبك {position}")
+                self.temp_messages.append(queued)
+    
+    async def process_chapter(self, message, attachments):
+        started = time.monotonic()
+        status = None
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        # التحقق من الحجم
-                        content_length = resp.headers.get('content-length')
-                        if content_length and int(content_length) > 50 * 1024 * 1024:
-                            logger.warning("صورة أكبر من 50 ميجا")
-                            return None, int(content_length)
-                        
-                        data = await resp.read()
-                        size_mb = len(data) / (1024 * 1024)
-                        logger.info(f"📥 تم التحميل: {size_mb:.1f} MB")
-                        return data, size_mb
-            return None, 0
+            status = StatusThrottler(
+                await message.channel.send(f"📚 **فصل من {len(attachments)} صفحة: جاري المعالجة...**"), self.status_interval
+            )
+            self.temp_messages.append(status.message)
+            pages = [(a.url, attachment_ext(a)) for a in attachments]
+            result = await self.pipeline.run_chapter(pages, progress=status.edit)
+            await self.send_results(message.channel, status, result, *author_of(message), started)
         except Exception as e:
-            logger.error(f"خطأ في التحميل: {e}")
-            return None, 0
+            logger.error(f"خطأ في معالجة الفصل: {e}")
+            self.metrics.inc('jobs_total', result='error')
+            error_msg = f"❌ **حدث خطأ غير متوقع**\n```{str(e)[:100]}```"
+            if status is not None:
+                await status.final(error_msg)
+            else:
+                await message.channel.send(error_msg)
+    
+    async def stream_results(self, message, status, img_bytes, size_mb, ext, started):
+        """OCR ← ترجمة ← إرسال لكل جزء أول ما يجهز، والأجزاء اللي بعده لسه في OCR"""
+        ocr_stats = {}
+        originals = []
+        translations = []
+        first_output = None
+        items = []  # (النص، task الترجمة) بالترتيب
+        new_item = asyncio.Event()
+        finished = False
+        pending = []  # (الرقم، الأصل، الترجمة) مترجمة ولسه متبعتتش
+        cut = []  # (الرقم، الأصل، الترجمة) اتبعتت مقصوصة ونصها الكامل يروح الملف
+        sent = 0
+        
+        async def flush(final):
+            # أول جزء بيتبعت لوحده على طول، وبعد كده الرسالة بتستنى لحد ما تتملي أو الأجزاء تخلص
+            nonlocal first_output, sent
+            embeds = [self.pair_embed(i, original, translated) for i, original, translated in pending]
+            batches = pack_embeds(embeds, self.embeds_per_message)
+            if not final and first_output is not None and len(batches[-1]) < self.embeds_per_message:
+                batches = batches[:-1]
+            for batch in batches:
+                if sent >= self.max_result_messages:
+                    return
+                await self.send_result(message.channel, embeds=batch)
+                sent += 1
+                cut.extend(part for part in pending[:len(batch)] if is_cut(part[1], part[2]))
+                del pending[:len(batch)]
+                if first_output is None:
+                    first_output = time.monotonic()
+        
+        async def sender():
+            # بيستنى ترجمة الأجزاء بالترتيب ويجمع اللي خلص منها في رسايل
+            i = 0
+            while i < len(items) or not finished:
+                if i >= len(items):
+                    new_item.clear()
+                    await new_item.wait()
+                    continue
+                original, task = items[i]
+                translated = await task
+                translations.append(translated)
+                pending.append((i, original, translated))
+                i += 1
+                if sent < self.max_result_messages:
+                    await flush(final=False)
+            await flush(final=True)
+        
+        sender_task = asyncio.create_task(sender())
+        source_lang = None
+        try:
+            async for text in self.ocr.iter_text(img_bytes, stats=ocr_stats):
+                if not originals:
+                    # اللغة بتتحدد مرة واحدة من أول جزء
+                    source_lang = await self.translator.detect_language(text)
+                    await status.edit("🌐 **جاري الترجمة وإرسال النتائج أول بأول...**")
+                originals.append(text)
+                items.append((text, asyncio.create_task(self.translator.translate(text, source_lang))))
+                new_item.set()
+        finally:
+            finished = True
+            new_item.set()
+            await sender_task
+        
+        if not originals:
+            self.metrics.inc('jobs_total', result='no_text')
+            await status.final("❌ **لم يتم العثور على نصوص**\nجرب صورة أوضح أو لغة مختلفة")
+            return
+        if not any(translations):
+            self.metrics.inc('jobs_total', result='translate_failed')
+            await status.final("❌ **فشلت الترجمة**\nالمترجم مش متاح حالياً")
+            return
+        
+        self.count += 1
+        
+        # حذف رسالة الحالة
+        await self.drop_status(status)
+        
+        original = PART_SEPARATOR.join(originals)
+        timing = self.record_latency(started, first_output or time.monotonic())
+        summary = self.summary_embed(*author_of(message), size_mb, ext, original, ocr_stats, timing)
+        # اللي مدخلش في الرسائل أو اتقص بيروح ملف .txt واحد مع الملخص
+        file = text_file(format_parts(cut + pending)) if cut or pending else None
+        content = self.overflow_note(len(pending), len(cut), len(originals))
+        await self.send_result(message.channel, content=content, embed=summary, file=file)
+        self.record_output(status, sent + 1)
+    
+    async def enqueue_image(self, message, attachment):
+        """إضافة الصورة لطابور الشغلانات مع رد فوري بالترتيب"""
+        if self.store:
+            ext = attachment_ext(attachment)
+            if ext not in SUPPORTED_FORMATS:
+                self.metrics.inc('jobs_total', result='unsupported')
+                await message.channel.send(f"❌ **صيغة غير مدعومة**\nالصيغ المدعومة: {', '.join(SUPPORTED_FORMATS)}")
+                return
+            await self.enqueue_stored(message, {'url': attachment.url, 'filename': attachment.filename, 'ext': ext})
+            return
+        queued_at = time.monotonic()
+        
+        async def run():
+            self.metrics.observe('queue_wait', time.monotonic() - queued_at)
+            async with message.channel.typing():
+                await self.process_image(message, attachment)
+        
+        guild_id = message.guild.id if message.guild else None
+        try:
+            position = await self.scheduler.submit(message.author.id, guild_id, run)
+        except QueueFull:
+            await message.channel.send("⛔ **الطابور مليان حالياً**\nجرب تاني بعد شوية")
+            return
+        
+        # لو في worker فاضي الشغلانة هتبدأ على طول، مفيش داعي لرسالة
+        if position > self.scheduler.idle_workers():
+            queued = await message.channel.send(f"⏳ **في الطابور** - ترتيبك {position}")
+            self.temp_messages.append(queued)
+    
+    async def enqueue_stored(self, message, job):
+        """الشغلانة (صورة أو فصل) بتتكتب في الطابور الدائم ورسالة الحالة بتفضل مع البوت لحد ما النتيجة ترجع"""
+        # الترتيب تقريبي: workers تانية ممكن تكون بتاخد من الطابور في نفس اللحظة
+        depth = await self.store_call(self.store.depth)
+        status = StatusThrottler(
+            await message.channel.send(f"⏳ **في الطابور** - ترتيبك {depth + 1}"), self.status_interval
+        )
+        author_name, avatar_url = author_of(message)
+        payload = {
+            **job,
+            'channel_id': message.channel.id,
+            'status_id': status.message.id,
+            'author_name': author_name,
+            'avatar_url': avatar_url,
+        }
+        try:
+            job_id, _ = await self.store_call(self.store.enqueue, message.author.id, message.guild.id if message.guild else None, payload)
+        except QueueFull:
+            await status.final("⛔ **الطابور مليان حالياً**\nجرب تاني بعد شوية")
+            return
+        self.job_status[job_id] = status
+        self.temp_messages.append(status.message)
+    
+    async def store_call(self, func, *args):
+        """نداء على الطابور الدائم في الـ thread بتاعه"""
+        return await self.store_thread.run(func, *args)
+    
+    async def deliver_results(self):
+        """بيبعت تقدم الشغلانات ونتايجها من الطابور الدائم (ممكن نتيجة تتبعت مرتين لو البوت وقع في النص)"""
+        shown = {}  # آخر تقدم ظاهر في رسالة كل شغلانة
+        last_purge = 0.0
+        while True:
+            try:
+                self.queue_stats = await self.store_call(self.store.stats)
+                for job in await self.store_call(self.store.in_progress):
+                    status = self.job_status.get(job.id)
+                    if status and shown.get(job.id) != job.progress:
+                        shown[job.id] = job.progress
+                        await status.edit(job.progress)
+                
+                for job in await self.store_call(self.store.finished):
+                    shown.pop(job.id, None)
+                    try:
+                        await self.deliver(job)
+                    except Exception as e:
+                        logger.error(f"❌ فشل إرسال نتيجة الشغلانة {job.id}: {e}")
+                    await self.store_call(self.store.mark_delivered, job.id)
+                
+                if self.local_workers:
+                    self.local_workers.check()
+                if time.monotonic() - last_purge > 3600:
+                    last_purge = time.monotonic()
+                    await self.store_call(self.store.purge, 86400)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"خطأ في إرسال النتايج: {e}")
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+    
+    async def deliver(self, job):
+        payload = job.payload
+        channel = self.get_channel(payload['channel_id']) or await self.fetch_channel(payload['channel_id'])
+        status = self.job_status.pop(job.id, None)
+        if status is None:
+            # البوت اتعمله restart بعد ما الشغلانة دخلت الطابور
+            status = StatusThrottler(channel.get_partial_message(payload['status_id']), self.status_interval)
+        result = job.result if job.status == 'done' else {'status': 'error', 'error': job.error or ''}
+        # الوقت من ساعة ما دخلت الطابور (created_at وقت حقيقي مش monotonic)
+        started = time.monotonic() - (time.time() - job.created_at)
+        await self.send_results(channel, status, result, payload['author_name'], payload['avatar_url'], started)
+    
+    async def setup_hook(self):
+        if self.store:
+            if self.local_workers:
+                self.local_workers.start()
+            self.delivery_task = asyncio.create_task(self.deliver_results())
+        else:
+            self.scheduler.start()
+        if self.metrics_server:
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                # البوت يكمل عادي حتى لو الـ port مشغول
+                logger.error(f"❌ endpoint المقاييس ما اشتغلش: {e}")
+                self.metrics_server = None
+    
+    async def download_image(self, url):
+        """تحميل الصورة على أجزاء، وبيرجع (data, size_mb, رسالة الخطأ)"""
+        return await self.pipeline.download(url)
     
     def split_into_paragraphs(self, text, max_length=1500):
         """تقسيم النص إلى فقرات مترابطة"""
-        if not text:
-            return []
-        
-        # تقسيم حسب النقاط الرئيسية
-        delimiters = ['\n\n', '\n', '. ', '! ', '? ', '。', '！', '？']
-        
-        paragraphs = []
-        current = ""
-        
-        for char in text:
-            current += char
-            if any(current.endswith(d) for d in delimiters) and len(current) > 50:
-                if len(current) > max_length:
-                    # تقسيم الفقرة الطويلة
-                    words = current.split()
-                    temp = ""
-                    for word in words:
-                        if len(temp) + len(word) < max_length:
-                            temp += " " + word
-                        else:
-                            if temp:
-                                paragraphs.append(temp.strip())
-                            temp = word
-                    if temp:
-                        paragraphs.append(temp.strip())
-                else:
-                    paragraphs.append(current.strip())
-                current = ""
-        
-        if current:
-            paragraphs.append(current.strip())
-        
-        return paragraphs
+        return split_into_paragraphs(text, max_length)
+    
+    def overflow_note(self, overflow, cut, total):
+        """سطر الرسالة اللي معاها ملف الـ .txt"""
+        notes = []
+        if overflow:
+            notes.append(f"📎 **باقي الأجزاء ({overflow} من {total}) في الملف المرفق**")
+        if cut:
+            notes.append(f"✂️ **النص الكامل للأجزاء الطويلة ({cut}) في الملف المرفق**")
+        return "\n".join(notes) or None
+    
+    def pair_embed(self, i, original, translated):
+        """Embed فيه جزء من النص الأصلي وترجمته"""
+        embed = discord.Embed(
+            title=f"📑 **الجزء {i+1}**" if i < 5 else f"📑 **تكملة...**",
+            color=0x3498db
+        )
+        
+        # النص الأصلي
+        if original:
+            if len(original) > MAX_FIELD_CHARS:
+                original = original[:MAX_FIELD_CHARS] + "..."
+            embed.add_field(
+                name="📝 **النص الأصلي**",
+                value=f"```{original}```",
+                inline=False
+            )
+        
+        # الترجمة
+        if translated:
+            if len(translated) > MAX_FIELD_CHARS:
+                translated = translated[:MAX_FIELD_CHARS] + "..."
+            embed.add_field(
+                name="🌍 **الترجمة**",
+                value=translated,
+                inline=False
+            )
+        
+        return embed
+    
+    def summary_embed(self, author_name, avatar_url, size_mb, ext, original, ocr_stats, timing=None):
+        """الـ Embed الرئيسي بمعلومات الصورة والنص"""
+        main_embed = discord.Embed(
+            title=f"📖 **الترجمة #{self.count}**",
+            description=f"تمت المعالجة بنجاح ✅",
+            color=0x9b59b6,
+            timestamp=datetime.now()
+        )
+        
+        # معلومات الصورة
+        main_embed.add_field(
+            name="📊 **معلومات الصورة**",
+            value=f"• الحجم: {size_mb:.1f} MB\n• الصيغة: {ext.upper()}",
+            inline=True
+        )
+        
+        # إحصائيات النص
+        main_embed.add_field(
+            name="📝 **إحصائيات النص**",
+            value=f"• الأحرف: {len(original):,}\n• الكلمات: {len(original.split()):,}",
+            inline=True
+        )
+        
+        # الأجزاء اللي اتخطت قبل OCR
+        if ocr_stats.get('api_calls_avoided'):
+            main_embed.add_field(
+                name="✂️ **أجزاء متخطية**",
+                value=f"• فاضية: {ocr_stats['skipped_blank']}\n• مكررة: {ocr_stats['skipped_duplicate']}\n• طلبات OCR اتوفرت: {ocr_stats['api_calls_avoided']}",
+                inline=True
+            )
+        
+        # الأجزاء اللي ما اتقرتش بعد كل المحاولات أو قبل مهلة الصفحة
+        if ocr_stats.get('missing'):
+            missing = sorted(ocr_stats['missing'])
+            main_embed.add_field(
+                name="⚠️ **أجزاء ناقصة**",
+                value=f"• الأجزاء: {'، '.join(map(str, missing))}\n• جرب تبعت الصورة تاني",
+                inline=True
+            )
+        
+        if timing:
+            main_embed.add_field(
+                name="⏱️ **الوقت**",
+                value=f"• أول نتيجة: {timing['first_output']:.1f} ث\n• الإجمالي: {timing['total']:.1f} ث",
+                inline=True
+            )
+        
+        main_embed.set_footer(text=f"طلب من {author_name}", icon_url=avatar_url)
+        return main_embed
+    
+    async def drop_status(self, status):
+        """حذف رسالة الحالة بعد ما النتيجة تجهز"""
+        await status.delete()
+        if status.message in self.temp_messages:
+            self.temp_messages.remove(status.message)
+    
+    async def send_result(self, channel, **kwargs):
+        """إرسال رسالة نتيجة مع تسجيل وقت الإرسال"""
+        with self.metrics.time('send'):
+            return await channel.send(**kwargs)
+    
+    def record_output(self, status, messages):
+        """عدد رسائل النتيجة وتعديلات الحالة لكل صورة (رسالة الحالة نفسها محسوبة)"""
+        self.output_stats['images'] += 1
+        self.output_stats['messages'] += messages + 1
+        self.output_stats['edits'] += status.edits
+        self.metrics.inc('jobs_total', result='ok')
+        self.metrics.inc('discord_messages_total', messages + 1, kind='sent')
+        self.metrics.inc('discord_messages_total', status.edits, kind='edit')
+    
+    def record_latency(self, started, first_output):
+        """تسجيل وقت أول نتيجة والوقت الكلي للشغلانة"""
+        timing = {'first_output': first_output - started, 'total': time.monotonic() - started}
+        self.metrics.observe('first_output', timing['first_output'])
+        self.metrics.observe('total', timing['total'])
+        logger.info(f"⏱️ أول نتيجة بعد {timing['first_output']:.1f} ث، الإجمالي {timing['total']:.1f} ث")
+        return timing
+    
+    async def send_results(self, channel, status, result, author_name, avatar_url, started):
+        """رسالة الخطأ أو النتيجة لنتيجة Pipeline، سواء اتعملت هنا أو في worker"""
+        if result['status'] == 'download_failed':
+            self.metrics.inc('jobs_total', result='download_failed')
+            await status.final(f"❌ **فشل التحميل**\n{result['error']}")
+            return
+        if result['status'] == 'no_text':
+            self.metrics.inc('jobs_total', result='no_text')
+            await status.final("❌ **لم يتم العثور على نصوص**\nجرب صورة أوضح أو لغة مختلفة")
+            return
+        if result['status'] == 'translate_failed':
+            self.metrics.inc('jobs_total', result='translate_failed')
+            await status.final("❌ **فشلت الترجمة**\nالمترجم مش متاح حالياً")
+            return
+        if result['status'] != 'ok':
+            self.metrics.inc('jobs_total', result='error')
+            await status.final(f"❌ **حدث خطأ غير متوقع**\n```{result.get('error', '')[:100]}```")
+            return
+        if result.get('chapter'):
+            await self.send_chapter(channel, status, result, author_name, avatar_url, started)
+            return
+        
+        self.count += 1
+        
+        # حذف رسالة الحالة
+        await self.drop_status(status)
+        
+        # الـ Embed الرئيسي وبعده النص الأصلي والمترجم جنباً إلى جنب، متجمعين في أقل عدد رسائل
+        pairs = result['pairs']
+        embeds = [self.summary_embed(author_name, avatar_url, result['size_mb'], result['ext'], result['original'], result['ocr_stats'])]
+        embeds += [self.pair_embed(i, original_para, translated_para) for i, (original_para, translated_para) in enumerate(pairs)]
+        batches = pack_embeds(embeds, self.embeds_per_message)[:self.max_result_messages]
+        
+        # اللي مدخلش في الرسائل أو اتقص بيروح ملف .txt واحد مع آخر رسالة
+        shown = sum(len(batch) for batch in batches) - 1
+        parts = [(i, original_para, translated_para) for i, (original_para, translated_para) in enumerate(pairs)]
+        cut = [part for part in parts[:shown] if is_cut(part[1], part[2])]
+        overflow = parts[shown:]
+        for n, batch in enumerate(batches):
+            last = n == len(batches) - 1
+            if last and (cut or overflow):
+                await self.send_result(
+                    channel,
+                    content=self.overflow_note(len(overflow), len(cut), len(pairs)),
+                    embeds=batch,
+                    file=text_file(format_parts(cut + overflow)),
+                )
+            else:
+                await self.send_result(channel, embeds=batch)
+            if n == 0:
+                first_output = time.monotonic()
+        
+        self.record_latency(started, first_output)
+        self.record_output(status, len(batches))
+    
+    async def send_chapter(self, channel, status, result, author_name, avatar_url, started):
+        """الفصل كله في رسالة واحدة: embed بيتقلب بين الملخص والصفحات، والنص الكامل في ملف"""
+        self.count += 1
+        await self.drop_status(status)
+        for page in result['pages']:
+            self.metrics.inc('chapter_pages_total', result=page['status'])
+        
+        timing = self.record_latency(started, time.monotonic())
+        embeds = [self.chapter_embed(author_name, avatar_url, result, timing)]
+        embeds += [self.chapter_page_embed(page, len(result['pages'])) for page in result['pages']]
+        view = EmbedPager(embeds) if len(embeds) > 1 else None
+        message = await self.send_result(
+            channel,
+            embed=embeds[0],
+            file=text_file(format_chapter(result['pages']), filename='chapter.txt'),
+            view=view,
+        )
+        if view:
+            view.message = message
+        self.record_output(status, 1)
+    
+    def chapter_embed(self, author_name, avatar_url, result, timing):
+        """أول صفحة في الـ pager: ملخص الفصل"""
+        stats = result['stats']
+        pages = result['pages']
+        ok = [page for page in pages if page['status'] == 'ok']
+        text = PART_SEPARATOR.join(page['original'] for page in ok)
+        embed = discord.Embed(
+            title=f"📚 **الفصل #{self.count}**",
+            description=f"{len(ok)} من {len(pages)} صفحة اتترجمت ✅\n📎 النص الكامل في الملف، و ◀️ ▶️ للصفحات",
+            color=0x9b59b6,
+            timestamp=datetime.now()
+        )
+        failed = len(pages) - len(ok) - stats['duplicate_pages']
+        embed.add_field(
+            name="📄 **الصفحات**",
+            value=f"• العدد: {len(pages)} ({result['size_mb']:.1f} MB)\n• مكررة: {stats['duplicate_pages']}\n• من غير نتيجة: {failed}",
+            inline=True
+        )
+        embed.add_field(
+            name="📝 **إحصائيات النص**",
+            value=f"• الأحرف: {len(text):,}\n• الكلمات: {len(text.split()):,}\n• اللغة: {result['source_lang'] or '؟'}",
+            inline=True
+        )
+        embed.add_field(
+            name="✂️ **اللي اتوفر**",
+            value=f"• أجزاء فاضية: {stats['skipped_blank']}\n• أجزاء مكررة: {stats['skipped_duplicate']}\n• جمل اتترجمت: {stats['translated_segments']} من {stats['segments']}",
+            inline=True
+        )
+        if stats['missing_pages']:
+            embed.add_field(
+                name="⚠️ **صفحات ناقصة**",
+                value=f"• الصفحات: {'، '.join(map(str, stats['missing_pages']))}\n• جرب تبعتها تاني",
+                inline=True
+            )
+        embed.add_field(name="⏱️ **الوقت**", value=f"• الإجمالي: {timing['total']:.1f} ث", inline=True)
+        embed.set_footer(text=f"طلب من {author_name}", icon_url=avatar_url)
+        return embed
+    
+    def chapter_page_embed(self, page, total, limit=3800):
+        """صفحة واحدة من الفصل: الأصل والترجمة مقصوصين على قد الـ embed"""
+        embed = discord.Embed(title=f"📄 **الصفحة {page['index'] + 1} من {total}**", color=0x3498db)
+        if page['status'] == 'duplicate':
+            embed.description = f"🔁 نفس الصفحة {page['of'] + 1}"
+            return embed
+        if page['status'] != 'ok':
+            embed.description = f"❌ {PAGE_FAILURES.get(page['status'], page['status'])}"
+            return embed
+        
+        blocks = []
+        size = 0
+        for original, translated in page['pairs']:
+            block = f"```{original[:300]}```{(translated or '')[:600]}"
+            if size + len(block) > limit:
+                blocks.append("…(الباقي في الملف)")
+                break
+            blocks.append(block)
+            size += len(block)
+        embed.description = "\n".join(blocks)
+        return embed
     
     async def process_image(self, message, attachment):
+        started = time.monotonic()
+        status = None
         try:
             # التحقق من الصيغة
-            ext = attachment.filename.lower().split('.')[-1]
+            ext = attachment_ext(attachment)
             if ext not in SUPPORTED_FORMATS:
+                self.metrics.inc('jobs_total', result='unsupported')
                 await message.channel.send(f"❌ **صيغة غير مدعومة**\nالصيغ المدعومة: {', '.join(SUPPORTED_FORMATS)}")
                 return
             
-            # رسالة الحالة
-            status = await message.channel.send("🔄 **جاري التحميل والمعالجة...**")
-            self.temp_messages.append(status)
+            # رسالة الحالة (التعديلات عليها بتعدي على throttler)
+            status = StatusThrottler(await message.channel.send("🔄 **جاري التحميل والمعالجة...**"), self.status_interval)
+            self.temp_messages.append(status.message)
             
             # تحميل الصورة
-            img_bytes, size_mb = await self.download_image(attachment.url)
+            img_bytes, size_mb, error = await self.download_image(attachment.url)
             if not img_bytes:
-                await status.edit(content=f"❌ **فشل التحميل**\nالحجم أكبر من 50 ميجا")
-                return
-            
-            await status.edit(content="🔍 **OCR.Space بتحليل الصورة...**")
-            
-            # استخراج النص
-            original = await self.ocr.extract_text(img_bytes)
-            if not original:
-                await status.edit(content="❌ **لم يتم العثور على نصوص**\nجرب صورة أوضح أو لغة مختلفة")
+                self.metrics.inc('jobs_total', result='download_failed')
+                await status.final(f"❌ **فشل التحميل**\n{error}")
                 return
             
-            await status.edit(content="🌐 **جاري الترجمة (قد تستغرق دقيقة)...**")
+            await status.edit("🔍 **OCR.Space بتحليل الصورة...**")
             
-            # الترجمة
-            translated = self.translator.translate(original)
-            if not translated:
-                await status.edit(content="❌ **فشلت الترجمة**\nالمترجم مش متاح حالياً")
+            if STREAM_RESULTS:
+                await self.stream_results(message, status, img_bytes, size_mb, ext, started)
                 return
             
-            self.count += 1
-            
-            # حذف رسالة الحالة
-            await status.delete()
-            if status in self.temp_messages:
-                self.temp_messages.remove(status)
-            
-            # تجهيز الـ Embed الرئيسي
-            main_embed = discord.Embed(
-                title=f"📖 **الترجمة #{self.count}**",
-                description=f"تمت المعالجة بنجاح ✅",
-                color=0x9b59b6,
-                timestamp=datetime.now()
-            )
-            
-            # معلومات الصورة
-            main_embed.add_field(
-                name="📊 **معلومات الصورة**",
-                value=f"• الحجم: {size_mb:.1f} MB\n• الصيغة: {ext.upper()}",
-                inline=True
-            )
-            
-            # إحصائيات النص
-            main_embed.add_field(
-                name="📝 **إحصائيات النص**",
-                value=f"• الأحرف: {len(original):,}\n• الكلمات: {len(original.split()):,}",
-                inline=True
-            )
-            
-            main_embed.set_footer(text=f"طلب من {message.author.display_name}", icon_url=message.author.avatar.url if message.author.avatar else None)
-            
-            await message.channel.send(embed=main_embed)
-            
-            # تقسيم وعرض النتائج
-            original_paras = self.split_into_paragraphs(original)
-            translated_paras = self.split_into_paragraphs(translated)
-            
-            # عرض النص الأصلي والمترجم جنباً إلى جنب
-            for i in range(max(len(original_paras), len(translated_paras))):
-                embed = discord.Embed(
-                    title=f"📑 **الجزء {i+1}**" if i < 5 else f"📑 **تكملة...**",
-                    color=0x3498db
-                )
-                
-                # النص الأصلي
-                if i < len(original_paras):
-                    orig_text = original_paras[i]
-                    if len(orig_text) > 500:
-                        orig_text = orig_text[:500] + "..."
-                    embed.add_field(
-                        name="📝 **النص الأصلي**",
-                        value=f"```{orig_text}```",
-                        inline=False
-                    )
-                
-                # الترجمة
-                if i < len(translated_paras):
-                    trans_text = translated_paras[i]
-                    if len(trans_text) > 500:
-                        trans_text = trans_text[:500] + "..."
-                    embed.add_field(
-                        name="🌍 **الترجمة**",
-                        value=trans_text,
-                        inline=False
-                    )
-                
-                await message.channel.send(embed=embed)
-                
-                # وقف بعد 10 أجزاء عشان ما نضربش الـ limit
-                if i >= 9:
-                    await message.channel.send(f"📌 **... وهناك المزيد** (إجمالي {max(len(original_paras), len(translated_paras))} جزء)")
-                    break
+            result = await self.pipeline.translate_image(img_bytes, progress=status.edit)
+            result.update(size_mb=size_mb, ext=ext)
+            await self.send_results(message.channel, status, result, *author_of(message), started)
             
         except Exception as e:
             logger.error(f"خطأ في المعالجة: {e}")
+            self.metrics.inc('jobs_total', result='error')
             error_msg = f"❌ **حدث خطأ غير متوقع**\n```{str(e)[:100]}```"
             
-            # محاولة إرسال الخطأ لرسالة الحالة إذا موجودة
-            if hasattr(self, 'temp_messages') and self.temp_messages:
+            # محاولة إرسال الخطأ لرسالة الحالة إذا موجودة (final بتلغي أي تعديل متأجل عشان ما يغطيش على الخطأ)
+            if status is not None:
+                try:
+                    await status.final(error_msg)
+                except:
+                    await message.channel.send(error_msg)
+            elif hasattr(self, 'temp_messages') and self.temp_messages:
                 try:
                     await self.temp_messages[-1].edit(content=error_msg)
                 except:
@@ -248,7 +744,7 @@ class ManhwaBot(commands.Bot):
         
         embed.add_field(
             name="📊 **الأوامر**",
-            value="`!stats` - الإحصائيات\n`!help` - هذه المساعدة\n`!ping` - اختبار الاتصال",
+            value="`!chapter` - ترجمة الصور المرفقة كفصل واحد\n`!stats` - الإحصائيات\n`!help` - هذه المساعدة\n`!ping` - اختبار الاتصال",
             inline=False
         )
         
@@ -271,14 +767,105 @@ class ManhwaBot(commands.Bot):
         embed.add_field(name="⏱️ **وقت التشغيل**", value=f"{hours} س {minutes} د {seconds} ث", inline=True)
         embed.add_field(name="📸 **صور مترجمة**", value=str(self.count), inline=True)
         embed.add_field(name="⚙️ **الحالة**", value="✅ شغال", inline=True)
-        embed.add_field(name="🌐 **الـ OCR**", value="OCR.Space", inline=True)
+        if self.ocr:
+            backends = self.ocr.router.stats()
+            embed.add_field(
+                name="🌐 **الـ OCR**",
+                value="\n".join(
+                    f"• {b['name']}: {b['ok']} جزء (احتياطي {b['fallback']}، فشل {b['failed']})" + (f" 🔌 {b['tripped']:.0f} ث" if b['tripped'] else "")
+                    for b in backends if b['available']
+                ),
+                inline=True
+            )
         embed.add_field(name="🌍 **الترجمة**", value="Google Translate", inline=True)
         embed.add_field(name="📦 **الإصدار**", value="v2.0 (نهائي)", inline=True)
         
+        if self.ocr_cache:
+            cache = self.ocr_cache.stats()
+            embed.add_field(
+                name="🗃️ **كاش OCR**",
+                value=f"• إصابات: {cache['hits']} (+{cache['perceptual_hits']} مشابهة)\n• فقد: {cache['misses']}\n• النسبة: {cache['hit_ratio']:.0%}",
+                inline=True
+            )
+        
+        # المفاتيح والذاكرة في الـ workers لما الطابور الدائم شغال
+        if self.ocr:
+            limiter = self.ocr.limiter.stats()
+            keys = "\n".join(
+                f"• `{key['key']}`: {key['ok']}/{key['calls']} (throttle {key['throttled']})" + (f" ⏸️ {key['paused']:.0f} ث" if key['paused'] else "")
+                for key in self.ocr.keys.stats()
+            )
+            embed.add_field(
+                name="🔑 **مفاتيح OCR**",
+                value=f"{keys}\n• التزامن: {limiter['in_flight']}/{limiter['limit']} (تقليل {limiter['backoffs']})\n• طلبات hedge: {self.ocr.hedged}",
+                inline=True
+            )
+            
+            memory = self.memory_budget.stats()
+            embed.add_field(
+                name="🧮 **ميزانية الذاكرة**",
+                value=f"• محجوز: {memory['used'] / 1024 / 1024:.0f}/{memory['limit'] / 1024 / 1024:.0f} MB\n• أقصى: {memory['peak'] / 1024 / 1024:.0f} MB\n• مستني: {memory['waiting']} (اتأجل {memory['postponed']})",
+                inline=True
+            )
+        
+        if self.store:
+            queue = self.queue_stats = await self.store_call(self.store.stats)
+            workers = f" ({self.local_workers.alive()} محلي، اتعاد تشغيل {self.local_workers.restarts})" if self.local_workers else ""
+            embed.add_field(
+                name="📋 **الطابور الدائم**",
+                value=f"• منتظر: {queue['queued']} (أقدم {queue['oldest_wait']:.0f} ث)\n• شغال: {queue['leased']} على {queue['workers']} worker{workers}\n• خلص: {queue['done']} / فشل: {queue['failed']}\n• اتعاد: {queue['retried']}",
+                inline=True
+            )
+        else:
+            queue = self.scheduler.stats()
+            embed.add_field(
+                name="📋 **الطابور**",
+                value=f"• منتظر: {queue['depth']}\n• شغال: {queue['running']}\n• متوسط الانتظار: {queue['avg_wait']:.1f} ث\n• p95: {queue['p95_wait']:.1f} ث\n• مرفوض: {queue['rejected']}",
+                inline=True
+            )
+        
+        stages = self.metrics.stage_summary()
+        if stages:
+            lines = []
+            for stage in STAGES:
+                if stage in stages:
+                    count, p50, p95, p99 = stages[stage]
+                    lines.append(f"`{stage:<17}` {p50:.2f} / {p95:.2f} / {p99:.2f} ({count})")
+            embed.add_field(
+                name=f"⏱️ **المراحل بالثواني p50 / p95 / p99 (آخر {self.metrics.window})**",
+                value="\n".join(lines),
+                inline=False
+            )
+        
+        if self.output_stats['images']:
+            images = self.output_stats['images']
+            embed.add_field(
+                name="✉️ **رسائل لكل صورة**",
+                value=f"• رسائل: {self.output_stats['messages'] / images:.1f}\n• تعديلات: {self.output_stats['edits'] / images:.1f}",
+                inline=True
+            )
+        
+        if self.translation_memory:
+            memory = self.translation_memory.stats()
+            embed.add_field(
+                name="🧠 **ذاكرة الترجمة**",
+                value=f"• نسبة الإصابة: {memory['hit_ratio']:.0%}\n• حروف موفرة: {memory['chars_saved']:,}\n• سطور محفوظة: {memory['entries']:,}",
+                inline=True
+            )
+        
         embed.set_footer(text=ctx.author.display_name, icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
         
         await ctx.send(embed=embed)
     
+    @commands.command(name='chapter', aliases=['فصل'])
+    async def chapter_command(self, ctx):
+        """ترجمة كل الصور المرفقة مع الأمر كفصل واحد"""
+        pages = [a for a in ctx.message.attachments if attachment_ext(a) in SUPPORTED_FORMATS]
+        if not pages:
+            await ctx.send("📚 **ارفع صفحات الفصل مع الأمر**\nمثال: `!chapter` ومعاه الصور")
+            return
+        await self.enqueue_chapter(ctx.message, pages)
+    
     @commands.command(name='ping', aliases=['بنج'])
     async def ping_command(self, ctx):
         """اختبار سرعة الاتصال"""
@@ -326,5 +913,20 @@ class ManhwaBot(commands.Bot):
             except:
                 pass
         
+        for batch in self.pending_chapters.values():
+            batch['task'].cancel()
+        await self.scheduler.stop()
+        if self.delivery_task:
+            self.delivery_task.cancel()
+            await asyncio.gather(self.delivery_task, return_exceptions=True)
+        if self.local_workers:
+            self.local_workers.stop()
+        if self.store:
+            await self.store_call(self.store.close)
+            self.store_thread.close()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.pipeline:
+            await self.pipeline.close()
         await super().close()
         logger.info("✅ تم إغلاق البوت")
@@ -5,4 +5,105 @@ load_dotenv()
 
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 OCR_API_KEY = os.getenv('OCR_API_KEY')  # من OCR.Space
+# كذا مفتاح OCR.Space مفصولين بفاصلة، بيتلف عليهم (لو فاضي بيستخدم OCR_API_KEY)
+OCR_API_KEYS = [key.strip() for key in os.getenv('OCR_API_KEYS', '').split(',') if key.strip()] or [OCR_API_KEY]
 SUPPORTED_FORMATS = ['png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp']
+MAX_IMAGE_SIZE = int(os.getenv('MAX_IMAGE_SIZE_MB', '50')) * 1024 * 1024
+MAX_IMAGE_DIMENSION = int(os.getenv('MAX_IMAGE_DIMENSION', '20000'))  # أقصى طول أو عرض
+
+# أقصى عدد طلبات OCR شغالة في نفس الوقت لكل صورة (1 = تسلسلي زي الأول)
+OCR_MAX_CONCURRENCY = int(os.getenv('OCR_MAX_CONCURRENCY', '3'))
+
+# حدود كل مفتاح: طلبات في الثانية و burst، وأقصى تزامن OCR بيوصله الـ AIMD لكل الشغلانات
+OCR_KEY_RATE = float(os.getenv('OCR_KEY_RATE', '1'))
+OCR_KEY_BURST = int(os.getenv('OCR_KEY_BURST', '2'))
+OCR_ADAPTIVE_MAX_CONCURRENCY = int(os.getenv('OCR_ADAPTIVE_MAX_CONCURRENCY', '8'))
+
+# إعادة محاولة الأجزاء اللي فشلت، ومهلة الطلب الواحد والصفحة كلها بالثواني
+OCR_RETRIES = int(os.getenv('OCR_RETRIES', '3'))
+OCR_REQUEST_TIMEOUT = float(os.getenv('OCR_REQUEST_TIMEOUT', '60'))
+OCR_JOB_DEADLINE = float(os.getenv('OCR_JOB_DEADLINE', '180'))
+# طلب تاني للجزء اللي اتأخر عن p95 ونخد أول رد (بيصرف طلبات زيادة، عشان كده مقفول افتراضياً)
+OCR_HEDGE = os.getenv('OCR_HEDGE', '0') == '1'
+
+# محركات OCR بالترتيب المفضل: ocrspace (الـ API) و tesseract (محلي على الـ CPU لو متثبت)
+OCR_BACKENDS = [name.strip() for name in os.getenv('OCR_BACKENDS', 'ocrspace,tesseract').split(',') if name.strip()]
+# auto = الاختيار لكل جزء حسب الحمل والحصة والفشل، أو اسم محرك يبقى الأساسي دايماً والباقي احتياطي
+OCR_BACKEND_POLICY = os.getenv('OCR_BACKEND_POLICY', 'auto')
+# موديلات Tesseract وعدد الأجزاء اللي بتتقري محلياً في نفس الوقت (الافتراضي = عدد الـ cores)
+TESSERACT_LANGS = os.getenv('TESSERACT_LANGS', 'kor+jpn+chi_sim+eng')
+TESSERACT_WORKERS = int(os.getenv('TESSERACT_WORKERS', '0')) or None
+
+# طريقة رفع الأجزاء: multipart (ملف JPEG مباشرة) أو base64 (data URI، أكبر بـ 33%)
+OCR_UPLOAD_MODE = os.getenv('OCR_UPLOAD_MODE', 'multipart')
+
+# فك الصفحات الطويلة بأقل ذاكرة (رمادي ومصغر لو العرض أكبر من OCR_MAX_DECODE_WIDTH، والأجزاء بتتقص واحد واحد)
+OCR_LOW_MEMORY = os.getenv('OCR_LOW_MEMORY', '1') == '1'
+OCR_MAX_DECODE_WIDTH = int(os.getenv('OCR_MAX_DECODE_WIDTH', '1600'))
+# أقصى ذاكرة متوقعة لفك الصور في نفس الوقت، والشغلانات الزيادة بتستنى
+MEMORY_BUDGET_MB = int(os.getenv('MEMORY_BUDGET_MB', '512'))
+
+# معالجة كل جزء قبل الضغط (تباين + أبيض وأسود) في الـ worker pool
+OCR_PREPROCESS = os.getenv('OCR_PREPROCESS', '0') == '1'
+
+# أقصى عدد أجزاء نص بتترجم في نفس الوقت
+TRANSLATE_MAX_CONCURRENCY = int(os.getenv('TRANSLATE_MAX_CONCURRENCY', '4'))
+
+# كاش نتايج OCR (فاضي = مقفول)
+OCR_CACHE_PATH = os.getenv('OCR_CACHE_PATH', 'ocr_cache.sqlite3')
+OCR_CACHE_MEMORY_MB = int(os.getenv('OCR_CACHE_MEMORY_MB', '16'))
+
+# ذاكرة الترجمة لكل سطر (فاضي = مقفولة)
+TRANSLATION_MEMORY_PATH = os.getenv('TRANSLATION_MEMORY_PATH', 'translation_memory.sqlite3')
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', '100000'))
+
+# طريقة تقسيم الصور الطويلة: gutter (في الفراغات) أو fixed (كل 2000 بكسل)
+OCR_SPLIT_STRATEGY = os.getenv('OCR_SPLIT_STRATEGY', 'gutter')
+
+# تخطي الأجزاء الفاضية والمكررة قبل OCR
+OCR_TRIAGE = os.getenv('OCR_TRIAGE', '1') == '1'
+
+# pool لفك وضغط الصور: thread أو process، والحجم الافتراضي = عدد الـ cores
+WORKER_POOL_KIND = os.getenv('WORKER_POOL_KIND', 'thread')
+WORKER_POOL_SIZE = int(os.getenv('WORKER_POOL_SIZE', '0')) or None
+
+# الجلسة المشتركة لكل طلبات HTTP
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))  # أقصى اتصالات مفتوحة
+HTTP_POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', '16'))  # أقصى اتصالات لكل host
+HTTP_DNS_TTL = int(os.getenv('HTTP_DNS_TTL', '300'))  # ثواني كاش الـ DNS
+HTTP_KEEPALIVE = float(os.getenv('HTTP_KEEPALIVE', '30'))  # ثواني الاتصال الفاضي قبل ما يتقفل
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '120'))  # أقصى وقت لأي طلب
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+
+# طابور الشغلانات: عدد الصور اللي بتتعالج في نفس الوقت وأقصى عدد منتظر
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_QUEUE_MAX = int(os.getenv('JOB_QUEUE_MAX', '50'))
+
+# إرسال نتيجة كل جزء أول ما يخلص بدل ما نستنى الصورة كلها
+STREAM_RESULTS = os.getenv('STREAM_RESULTS', '1') == '1'
+
+# رسائل النتيجة: أقصى عدد رسائل embeds لكل صورة (الباقي بيروح ملف .txt) وأقل وقت بين تعديلات رسالة الحالة
+RESULT_MAX_MESSAGES = int(os.getenv('RESULT_MAX_MESSAGES', '3'))
+STATUS_EDIT_INTERVAL = float(os.getenv('STATUS_EDIT_INTERVAL', '1.5'))
+
+# endpoint المقاييس بصيغة Prometheus (/metrics) على الجهاز نفسه (فاضي = مقفول)، وعدد العينات لحساب p50/p95/p99
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = os.getenv('METRICS_PORT', '9108')
+METRICS_WINDOW = int(os.getenv('METRICS_WINDOW', '500'))
+
+# طابور دائم على SQLite بين البوت والـ workers (فاضي = الشغل كله جوه process البوت زي الأول)
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', '')
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))  # الـ worker بيجدده كل ثلث المدة، ولو مات الشغلانة بترجع بعدها
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '0.5'))  # كل قد إيه الـ workers والبوت بيبصوا على الطابور
+# عدد processes الـ worker اللي البوت بيشغلها على نفس الجهاز (0 = الـ workers بتتشغل لوحدها بـ python worker.py).
+# OCR_KEY_RATE و OCR_KEY_BURST و MEMORY_BUDGET_MB للمجموع: كل worker بياخد نصيبه منهم مقسوم على عدد الـ workers
+# (python worker.py --processes N لو شغالين لوحدهم)
+JOB_WORKER_PROCESSES = int(os.getenv('JOB_WORKER_PROCESSES', '0'))
+
+# وضع الفصل: الصور دي أو أكتر من نفس المستخدم (في رسالة أو رسائل ورا بعض) بتتعالج كشغلانة واحدة (0 = !chapter بس)
+CHAPTER_MIN_PAGES = int(os.getenv('CHAPTER_MIN_PAGES', '3'))
+# مهلة تجميع رسائل الفصل، لأن Discord بيسمح بـ 10 مرفقات بس في الرسالة
+CHAPTER_COLLECT_SECONDS = float(os.getenv('CHAPTER_COLLECT_SECONDS', '3'))
+CHAPTER_PAGE_CONCURRENCY = int(os.getenv('CHAPTER_PAGE_CONCURRENCY', '3'))  # صفحات الفصل اللي بتتعالج في نفس الوقت
+CHAPTER_MAX_PAGES = int(os.getenv('CHAPTER_MAX_PAGES', '60'))  # الفصل الأطول من كده بيتقسم على كذا شغلانة
@@ -0,0 +1,179 @@
+import asyncio
+import io
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# حدود Discord للرسالة الواحدة
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+# النص في الـ field الواحد بيتقص بعد الطول ده، والكامل بيروح ملف الـ .txt
+MAX_FIELD_CHARS = 500
+
+
+def pack_embeds(embeds, max_embeds=MAX_EMBEDS, max_chars=MAX_EMBED_CHARS):
+    """تقسيم الـ embeds على أقل عدد رسائل من غير ما نعدي حدود Discord"""
+    batches = []
+    batch, size = [], 0
+    for embed in embeds:
+        length = len(embed)
+        if batch and (len(batch) >= max_embeds or size + length > max_chars):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(embed)
+        size += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def format_pairs(pairs, start=0):
+    """النص الكامل للأجزاء (من غير قص) عشان ملف الـ .txt"""
+    return format_parts([(i, original, translated) for i, (original, translated) in enumerate(pairs, start)])
+
+
+def format_parts(parts):
+    """زي format_pairs بس كل جزء معاه رقمه، عشان الأجزاء اللي مش ورا بعض"""
+    blocks = []
+    for i, original, translated in parts:
+        blocks.append(f"===== الجزء {i + 1} =====\n[الأصل]\n{original}\n\n[الترجمة]\n{translated}")
+    return "\n\n".join(blocks) + "\n"
+
+
+def is_cut(original, translated):
+    """الجزء ده هيتقص في الـ embed؟"""
+    return len(original or '') > MAX_FIELD_CHARS or len(translated or '') > MAX_FIELD_CHARS
+
+
+# سبب الصفحة اللي ما اترجمتش في ملف الفصل
+PAGE_FAILURES = {
+    'download_failed': "فشل التحميل",
+    'no_text': "لم يتم العثور على نصوص",
+    'translate_failed': "فشلت الترجمة",
+    'error': "حدث خطأ غير متوقع",
+}
+
+
+def format_chapter(pages):
+    """النص الكامل للفصل صفحة صفحة عشان ملف الـ .txt"""
+    blocks = []
+    for page in pages:
+        header = f"########## الصفحة {page['index'] + 1} ##########"
+        if page['status'] == 'ok':
+            blocks.append(f"{header}\n\n{format_pairs(page['pairs'])}")
+        elif page['status'] == 'duplicate':
+            blocks.append(f"{header}\n(نفس الصفحة {page['of'] + 1})\n")
+        else:
+            blocks.append(f"{header}\n({PAGE_FAILURES.get(page['status'], page['status'])})\n")
+    return "\n".join(blocks)
+
+
+def text_file(text, filename='translation.txt'):
+    """ملف نصي يتبعت مع الرسالة"""
+    return discord.File(io.BytesIO(text.encode('utf-8')), filename=filename)
+
+
+class StatusThrottler:
+    """تعديلات رسالة الحالة: أي تعديلات ورا بعض في أقل من interval بتتجمع في تعديل واحد"""
+
+    def __init__(self, message, interval=1.5):
+        self.message = message
+        self.interval = interval
+        self.edits = 0
+        self.coalesced = 0
+        self._pending = None
+        self._last = 0.0
+        self._task = None
+
+    async def edit(self, content):
+        """تعديل عادي: لو لسه معدلين من شوية بيتأجل وآخر محتوى بس هو اللي بيتبعت"""
+        if self._pending is not None:
+            self.coalesced += 1
+        self._pending = content
+        if self._task:
+            return
+        wait = self._last + self.interval - time.monotonic()
+        if wait <= 0:
+            await self._flush()
+        else:
+            self._task = asyncio.create_task(self._flush_later(wait))
+
+    async def final(self, content):
+        """تعديل أخير (نتيجة أو خطأ) لازم يظهر على طول"""
+        self._cancel()
+        if self._pending is not None:
+            self.coalesced += 1
+        self._pending = content
+        await self._flush()
+
+    async def delete(self):
+        self._cancel()
+        self._pending = None
+        await self.message.delete()
+
+    async def _flush_later(self, wait):
+        await asyncio.sleep(wait)
+        self._task = None
+        try:
+            await self._flush()
+        except Exception as e:
+            logger.warning(f"فشل تعديل رسالة الحالة: {e}")
+
+    async def _flush(self):
+        if self._pending is None:
+            return
+        content, self._pending = self._pending, None
+        self._last = time.monotonic()
+        self.edits += 1
+        await self.message.edit(content=content)
+
+    def _cancel(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+class EmbedPager(discord.ui.View):
+    """رسالة واحدة بزراير ◀️ ▶️ بتقلب بين الـ embeds بدل رسالة لكل embed
+
+    التقليب بيعدي على interaction، فمش بيتحسب من rate limit القناة.
+    """
+
+    def __init__(self, embeds, timeout=900):
+        super().__init__(timeout=timeout)
+        self.embeds = embeds
+        self.index = 0
+        self.message = None  # بتتحط بعد الإرسال عشان الزراير تتشال لما المهلة تخلص
+        self._sync()
+
+    def _sync(self):
+        self.previous.disabled = self.index == 0
+        self.next.disabled = self.index == len(self.embeds) - 1
+        self.counter.label = f"{self.index + 1}/{len(self.embeds)}"
+
+    async def _show(self, interaction, index):
+        self.index = max(0, min(index, len(self.embeds) - 1))
+        self._sync()
+        await interaction.response.edit_message(embed=self.embeds[self.index], view=self)
+
+    @discord.ui.button(emoji='◀️', style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction, button):
+        await self._show(interaction, self.index - 1)
+
+    @discord.ui.button(label='1/1', style=discord.ButtonStyle.secondary, disabled=True)
+    async def counter(self, interaction, button):
+        pass
+
+    @discord.ui.button(emoji='▶️', style=discord.ButtonStyle.secondary)
+    async def next(self, interaction, button):
+        await self._show(interaction, self.index + 1)
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException as e:
+                logger.warning(f"فشل شيل زراير الصفحات: {e}")
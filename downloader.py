@@ -0,0 +1,96 @@
+import aiohttp
+import logging
+from PIL import ImageFile
+from http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+# أسماء الصيغ عند PIL مقابل الامتدادات المدعومة
+PIL_FORMATS = {
+    'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'gif': 'GIF', 'bmp': 'BMP', 'webp': 'WEBP',
+}
+
+
+class DownloadError(Exception):
+    """سبب رفض التحميل، والكود بيستخدمه البوت عشان يختار الرسالة"""
+    
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class ImageDownloader:
+    """تحميل الصور على أجزاء بجلسة مشتركة، مع قراءة الأبعاد والصيغة قبل ما التحميل يخلص"""
+    
+    def __init__(self, max_bytes, max_dimension, formats, chunk_size=64 * 1024, http=None, max_header_bytes=1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_header_bytes = max_header_bytes  # لو PIL ما عرفش الصيغة بعد الحجم ده يبقى مش صورة
+        self.max_dimension = max_dimension
+        self.formats = {PIL_FORMATS[f] for f in formats if f in PIL_FORMATS}
+        self.chunk_size = chunk_size
+        # الجلسة المشتركة من البوت، أو جلسة خاصة لو شغال لوحده
+        self.http = http or HttpClient()
+        self._own_http = http is None
+        self.peak_buffer = 0  # أكبر buffer اتحجز في أي تحميل
+        
+    def _check_header(self, parser, info):
+        """أول ما PIL يعرف الهيدر: نتأكد من الصيغة والأبعاد"""
+        img = parser.image
+        info['format'] = img.format
+        info['width'], info['height'] = img.size
+        logger.info(f"🧾 {img.format} {img.width}x{img.height} بعد {info['bytes']:,} بايت")
+        
+        if img.format not in self.formats:
+            raise DownloadError('unsupported', f"صيغة {img.format} مش مدعومة")
+        if max(img.size) > self.max_dimension:
+            raise DownloadError('dimensions', f"أبعاد {img.width}x{img.height} أكبر من {self.max_dimension}")
+    
+    async def download(self, url):
+        """بيرجع (data, info)، أو بيرفع DownloadError"""
+        session = await self.http.get_session()
+        info = {'bytes': 0, 'format': None, 'width': 0, 'height': 0}
+        try:
+            async with session.get(url) as resp:
+                if resp.status != 200:
+                    raise DownloadError('http', f"HTTP {resp.status}")
+                
+                # لو السيرفر قال الحجم، نرفض من غير ما نحمل حاجة
+                content_length = resp.headers.get('content-length')
+                if content_length and int(content_length) > self.max_bytes:
+                    info['bytes'] = int(content_length)
+                    raise DownloadError('too_large', f"الحجم {int(content_length):,} بايت")
+                
+                buffer = bytearray()
+                parser = ImageFile.Parser()
+                header_checked = False
+                async for chunk in resp.content.iter_chunked(self.chunk_size):
+                    buffer += chunk
+                    info['bytes'] = len(buffer)
+                    if len(buffer) > self.max_bytes:
+                        raise DownloadError('too_large', f"عدى {self.max_bytes:,} بايت أثناء التحميل")
+                    
+                    # بنغذي الـ parser لحد ما يعرف الهيدر بس، من غير فك الصورة كلها
+                    if not header_checked:
+                        try:
+                            parser.feed(chunk)
+                        except Exception:
+                            raise DownloadError('unsupported', "الملف مش صورة")
+                        if parser.image is not None:
+                            self._check_header(parser, info)
+                            header_checked = True
+                            parser = None
+                        elif len(buffer) > self.max_header_bytes:
+                            raise DownloadError('unsupported', "الملف مش صورة")
+                
+                if not header_checked:
+                    raise DownloadError('unsupported', "الملف مش صورة")
+                
+                self.peak_buffer = max(self.peak_buffer, len(buffer))
+                logger.info(f"📥 تم التحميل: {len(buffer) / (1024 * 1024):.1f} MB")
+                return buffer, info
+        except aiohttp.ClientError as e:
+            raise DownloadError('network', str(e))
+    
+    async def close(self):
+        if self._own_http:
+            await self.http.close()
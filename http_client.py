@@ -0,0 +1,46 @@
+import aiohttp
+import logging
+from config import (
+    HTTP_POOL_LIMIT, HTTP_POOL_PER_HOST, HTTP_DNS_TTL, HTTP_KEEPALIVE,
+    HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """جلسة HTTP واحدة مشتركة بين OCR والترجمة والتحميل
+
+    الاتصالات بتفضل مفتوحة (keep-alive) لكل host، فكل جزء ما بيدفعش
+    TCP+TLS handshake جديد.
+    """
+    
+    def __init__(self, limit=None, limit_per_host=None, dns_ttl=None, keepalive=None,
+                 timeout=None, connect_timeout=None, ssl=None):
+        self.limit = limit or HTTP_POOL_LIMIT
+        self.limit_per_host = limit_per_host or HTTP_POOL_PER_HOST
+        self.dns_ttl = dns_ttl or HTTP_DNS_TTL
+        self.keepalive = keepalive or HTTP_KEEPALIVE
+        self.timeout = aiohttp.ClientTimeout(
+            total=timeout or HTTP_TIMEOUT,
+            sock_connect=connect_timeout or HTTP_CONNECT_TIMEOUT
+        )
+        self.ssl = ssl
+        self.session = None
+    
+    async def get_session(self):
+        if not self.session or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive,
+                ssl=self.ssl if self.ssl is not None else True,
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            logger.info(f"🔌 جلسة HTTP مشتركة: {self.limit} اتصال، {self.limit_per_host} لكل host")
+        return self.session
+    
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
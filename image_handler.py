@@ -1,20 +1,20 @@
-import aiohttp
 from PIL import Image
 from io import BytesIO
 import logging
 from config import MAX_IMAGE_SIZE, MAX_IMAGE_DIMENSION, SUPPORTED_FORMATS
+from http_client import HttpClient
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ImageHandler:
-    def __init__(self):
-        self.session = None
+    def __init__(self, http=None):
+        # الجلسة المشتركة من البوت، أو جلسة خاصة لو شغال لوحده
+        self.http = http or HttpClient()
+        self._own_http = http is None
         
     async def get_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-        return self.session
+        return await self.http.get_session()
     
     async def download_image(self, url):
         try:
@@ -52,5 +52,5 @@ class ImageHandler:
         return ext in SUPPORTED_FORMATS, ext
     
     async def close(self):
-        if self.session:
-            await self.session.close()
\ No newline at end of file
+        if self._own_http:
+            await self.http.close()
\ No newline at end of file
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """الطابور وصل لأقصى عدد شغلانات"""
+
+
+class Job:
+    def __init__(self, user_id, guild_id, run):
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.run = run  # دالة بترجع coroutine
+        self.enqueued_at = time.monotonic()
+
+
+class JobScheduler:
+    """طابور شغلانات محدود بعدد ثابت من الـ workers وعدل بين السيرفرات والمستخدمين
+
+    الدور بيلف على السيرفرات، وجوه كل سيرفر بيلف على المستخدمين، فمستخدم
+    باعت 20 صفحة ما بياخدش دور الباقيين.
+    """
+    
+    def __init__(self, workers=2, max_depth=50, window=200):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.guilds = OrderedDict()  # guild -> OrderedDict(user -> deque[Job])
+        self.depth = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.waits = deque(maxlen=window)  # آخر أوقات انتظار بالثواني
+        self._tasks = []
+        self._ready = None
+    
+    def start(self):
+        self._ready = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"📋 طابور الشغلانات: {self.workers} workers، أقصى {self.max_depth}")
+    
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def _order(self):
+        """ترتيب تنفيذ الشغلانات اللي في الطابور حالياً (على نسخة من غير ما نغير حاجة)"""
+        guilds = OrderedDict(
+            (guild_id, OrderedDict((user_id, deque(jobs)) for user_id, jobs in users.items()))
+            for guild_id, users in self.guilds.items()
+        )
+        order = []
+        while guilds:
+            order.append(self._pop_from(guilds))
+        return order
+    
+    def position(self, job):
+        return self._order().index(job) + 1
+    
+    async def submit(self, user_id, guild_id, run):
+        """بيضيف شغلانة وبيرجع ترتيبها، أو بيرفع QueueFull"""
+        if self.depth >= self.max_depth:
+            self.rejected += 1
+            raise QueueFull()
+        
+        job = Job(user_id, guild_id, run)
+        users = self.guilds.setdefault(guild_id, OrderedDict())
+        users.setdefault(user_id, deque()).append(job)
+        self.depth += 1
+        position = self.position(job)
+        
+        async with self._ready:
+            self._ready.notify()
+        return position
+    
+    def idle_workers(self):
+        return self.workers - self.running
+    
+    @staticmethod
+    def _pop_from(guilds):
+        """الدور على أول سيرفر، وجواه على أول مستخدم، وبعدين الاتنين يروحوا الآخر"""
+        guild_id, users = next(iter(guilds.items()))
+        user_id, jobs = next(iter(users.items()))
+        job = jobs.popleft()
+        
+        users.move_to_end(user_id)
+        if not jobs:
+            del users[user_id]
+        guilds.move_to_end(guild_id)
+        if not users:
+            del guilds[guild_id]
+        return job
+    
+    def _pop(self):
+        self.depth -= 1
+        return self._pop_from(self.guilds)
+    
+    async def _worker(self, index):
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: self.depth > 0)
+                job = self._pop()
+            
+            wait = time.monotonic() - job.enqueued_at
+            self.waits.append(wait)
+            self.running += 1
+            try:
+                await job.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"worker {index} خطأ: {e}")
+            finally:
+                self.running -= 1
+                self.completed += 1
+    
+    def stats(self):
+        waits = sorted(self.waits)
+        return {
+            'depth': self.depth,
+            'running': self.running,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_wait': sum(waits) / len(waits) if waits else 0.0,
+            'p95_wait': waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+        }
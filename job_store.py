@@ -0,0 +1,198 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from job_queue import QueueFull
+
+logger = logging.getLogger(__name__)
+
+
+class StoredJob:
+    """شغلانة من الطابور الدائم"""
+
+    def __init__(self, row):
+        self.id = row['id']
+        self.user_id = row['user_id']
+        self.guild_id = row['guild_id']
+        self.payload = json.loads(row['payload'])
+        self.status = row['status']
+        self.attempts = row['attempts']
+        self.lease_owner = row['lease_owner']
+        self.progress = row['progress']
+        self.result = json.loads(row['result']) if row['result'] else None
+        self.error = row['error']
+        self.created_at = row['created_at']
+
+
+class JobStore:
+    """طابور شغلانات على SQLite بيتشارك بين البوت والـ workers (processes أو أجهزة على نفس الملف)
+
+    الـ worker بياخد الشغلانة بـ lease لمدة محددة وبيجددها وهو شغال. لو مات الـ lease بيخلص
+    والشغلانة بترجع لأي worker تاني، لحد max_attempts محاولة وبعدها بتتقفل فاشلة.
+    الحالات: queued ← leased ← done أو failed، و delivered بيتعلم لما البوت يبعت النتيجة.
+    """
+
+    def __init__(self, path, max_attempts=3, max_depth=None):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.max_depth = max_depth  # أقصى عدد شغلانات مستنية (None = من غير حد)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        # WAL عشان القراية ما تقفلش الكتابة بين الـ processes
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, guild_id INTEGER, "
+            "payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'queued', attempts INTEGER NOT NULL DEFAULT 0, "
+            "lease_owner TEXT, lease_until REAL, progress TEXT, result TEXT, error TEXT, "
+            "delivered INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_delivery ON jobs (delivered, status)")
+
+    def _write(self, func):
+        """transaction بـ BEGIN IMMEDIATE عشان workers كتير ما ياخدوش نفس الشغلانة"""
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self.db, time.time())
+                self.db.execute("COMMIT")
+                return result
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, user_id, guild_id, payload):
+        """بيضيف شغلانة وبيرجع (id، الترتيب)، أو بيرفع QueueFull"""
+        def insert(db, now):
+            if self.max_depth is not None:
+                depth = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if depth >= self.max_depth:
+                    raise QueueFull()
+            cursor = db.execute(
+                "INSERT INTO jobs (user_id, guild_id, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, guild_id, json.dumps(payload), now, now),
+            )
+            position = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND id <= ?", (cursor.lastrowid,)).fetchone()[0]
+            return cursor.lastrowid, position
+
+        return self._write(insert)
+
+    def lease(self, worker_id, lease_seconds):
+        """أول شغلانة متاحة (مستنية أو الـ lease بتاعها خلص) للـ worker ده، أو None"""
+        def take(db, now):
+            # الشغلانات اللي مات عليها workers أكتر من اللازم بتتقفل بدل ما تتعاد للأبد
+            db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'worker وقف أكتر من مرة على الشغلانة دي', "
+                "lease_owner = NULL, updated_at = ? WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            # المستخدم اللي عنده أقل شغلانات شغالة دلوقتي الأول، وبعدين الأقدم
+            row = db.execute(
+                "SELECT id FROM jobs AS j WHERE status = 'queued' OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY (SELECT COUNT(*) FROM jobs AS r WHERE r.status = 'leased' AND r.lease_until >= ? "
+                "AND r.user_id = j.user_id), id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_until = ?, attempts = attempts + 1, "
+                "progress = NULL, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row['id']),
+            )
+            return StoredJob(db.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone())
+
+        job = self._write(take)
+        if job and job.attempts > 1:
+            logger.warning(f"🔁 الشغلانة {job.id} راجعة تاني (محاولة {job.attempts})")
+        return job
+
+    def _update_leased(self, job_id, worker_id, sql, params):
+        """تعديل شغلانة لسه مع نفس الـ worker، وبيرجع False لو الـ lease راح لحد تاني"""
+        def update(db, now):
+            cursor = db.execute(
+                f"UPDATE jobs SET {sql}, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (*params, now, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+        return self._write(update)
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        return self._update_leased(job_id, worker_id, "lease_until = ?", (time.time() + lease_seconds,))
+
+    def set_progress(self, job_id, worker_id, text):
+        return self._update_leased(job_id, worker_id, "progress = ?", (text,))
+
+    def complete(self, job_id, worker_id, result):
+        return self._update_leased(job_id, worker_id, "status = 'done', result = ?, lease_owner = NULL", (json.dumps(result),))
+
+    def fail(self, job_id, worker_id, error):
+        """الشغلانة بترجع للطابور لو لسه فاضل محاولات، وإلا بتتقفل فاشلة"""
+        return self._update_leased(
+            job_id, worker_id,
+            "status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, error = ?, lease_owner = NULL",
+            (self.max_attempts, error[:500]),
+        )
+
+    def release(self, job_id, worker_id):
+        """worker بيقفل: الشغلانة بترجع للطابور من غير ما تتحسب محاولة"""
+        return self._update_leased(job_id, worker_id, "status = 'queued', attempts = attempts - 1, lease_owner = NULL", ())
+
+    def depth(self):
+        """عدد الشغلانات المستنية"""
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def _select(self, sql, params=()):
+        with self._lock:
+            return [StoredJob(row) for row in self.db.execute(sql, params).fetchall()]
+
+    def in_progress(self):
+        """الشغلانات الشغالة اللي ليها رسالة حالة"""
+        return self._select("SELECT * FROM jobs WHERE status = 'leased' AND progress IS NOT NULL")
+
+    def finished(self, limit=20):
+        """شغلانات خلصت (أو فشلت) ولسه نتيجتها ما اتبعتتش"""
+        return self._select(
+            "SELECT * FROM jobs WHERE delivered = 0 AND status IN ('done', 'failed') ORDER BY id LIMIT ?", (limit,)
+        )
+
+    def mark_delivered(self, job_id):
+        def update(db, now):
+            db.execute("UPDATE jobs SET delivered = 1, updated_at = ? WHERE id = ?", (now, job_id))
+
+        self._write(update)
+
+    def purge(self, older_than):
+        """مسح الشغلانات اللي اتبعتت من أكتر من older_than ثانية"""
+        def delete(db, now):
+            return db.execute("DELETE FROM jobs WHERE delivered = 1 AND updated_at < ?", (now - older_than,)).rowcount
+
+        return self._write(delete)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            counts = dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            workers = self.db.execute(
+                "SELECT COUNT(DISTINCT lease_owner) FROM jobs WHERE status = 'leased' AND lease_until >= ?", (now,)
+            ).fetchone()[0]
+            oldest = self.db.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            retried = self.db.execute("SELECT COUNT(*) FROM jobs WHERE attempts > 1").fetchone()[0]
+        return {
+            'queued': counts.get('queued', 0),
+            'leased': counts.get('leased', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'workers': workers,
+            'oldest_wait': now - oldest if oldest else 0.0,
+            'retried': retried,
+        }
+
+    def close(self):
+        self.db.close()
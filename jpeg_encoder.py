@@ -0,0 +1,90 @@
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+# حجم JPEG عند كل جودة كنسبة من حجمه عند 85، متوسط على شرايح مانهوا مختلفة
+SIZE_CURVE = [
+    (30, 0.38), (35, 0.42), (40, 0.46), (45, 0.50), (50, 0.54), (55, 0.58),
+    (60, 0.63), (65, 0.67), (70, 0.73), (75, 0.79), (80, 0.88), (85, 1.00),
+]
+
+
+class EncodeResult:
+    """نتيجة الضغط: البايتات وعدد مرات الضغط اللي احتاجها"""
+    
+    def __init__(self, buffer, quality, encodes, mode, size):
+        self.buffer = buffer
+        self.quality = quality
+        self.encodes = encodes
+        self.mode = mode
+        self.size = size
+    
+    @property
+    def nbytes(self):
+        return self.buffer.getbuffer().nbytes
+
+
+def _encode(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality)
+    return buffer
+
+
+def _curve(quality):
+    """نسبة الحجم المتوقعة عند جودة معينة (interpolation خطي بين نقط المنحنى)"""
+    for (q0, r0), (q1, r1) in zip(SIZE_CURVE, SIZE_CURVE[1:]):
+        if quality <= q1:
+            return r0 + (r1 - r0) * (max(quality, q0) - q0) / (q1 - q0)
+    return SIZE_CURVE[-1][1]
+
+
+def _inverse_curve(ratio, min_quality, max_quality):
+    """أعلى جودة نسبتها المتوقعة أقل من ratio"""
+    for quality in range(max_quality, min_quality - 1, -1):
+        if _curve(quality) <= ratio:
+            return quality
+    return min_quality
+
+
+def encode_to_budget(image, max_bytes, quality=85, min_quality=30, margin=0.97):
+    """ضغط JPEG يوصل لحجم أقل من max_bytes في أقل عدد ضغطات ممكن
+
+    بيجرب الجودة العالية الأول، ولو الحجم كبير بيتوقع الجودة المناسبة من
+    منحنى الحجم والجودة، وبيصحح التوقع بكل ضغطة. لو حتى أقل جودة مش كفاية
+    بيحول لرمادي، وبعدين بيصغر الأبعاد؛ الاتنين OCR بيستحملهم.
+    """
+    encodes = 0
+    stages = [image]
+    if image.mode != 'L':
+        stages.append(image.convert('L'))
+    
+    for stage in stages:
+        buffer = _encode(stage, quality)
+        encodes += 1
+        if buffer.tell() <= max_bytes:
+            return EncodeResult(buffer, quality, encodes, stage.mode, stage.size)
+        
+        # scale = قد إيه الصورة دي أكبر أو أصغر من المنحنى المتوسط
+        top_bytes = buffer.tell()
+        scale = 1.0
+        q = quality
+        while q > min_quality:
+            predicted = _inverse_curve(margin * max_bytes / (top_bytes * scale), min_quality, quality)
+            q = max(min_quality, min(q - 1, predicted))
+            buffer = _encode(stage, q)
+            encodes += 1
+            if buffer.tell() <= max_bytes:
+                return EncodeResult(buffer, q, encodes, stage.mode, stage.size)
+            # التوقع كان متفائل، نصحح المنحنى بالحجم الفعلي
+            scale = buffer.tell() / (top_bytes * _curve(q))
+    
+    # آخر حل: تصغير الأبعاد بنسبة الحجم الزيادة
+    small = stages[-1]
+    while True:
+        scale = min(0.9, (max_bytes / buffer.tell()) ** 0.5 * 0.95)
+        small = small.resize((max(1, int(small.width * scale)), max(1, int(small.height * scale))))
+        buffer = _encode(small, min_quality)
+        encodes += 1
+        if buffer.tell() <= max_bytes or small.width <= 64:
+            return EncodeResult(buffer, min_quality, encodes, small.mode, small.size)
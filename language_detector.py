@@ -0,0 +1,72 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# نطاقات Unicode لكل كتابة
+SCRIPT_RANGES = {
+    'hangul': [(0xAC00, 0xD7AF), (0x1100, 0x11FF), (0x3130, 0x318F)],
+    'kana': [(0x3040, 0x309F), (0x30A0, 0x30FF), (0x31F0, 0x31FF), (0xFF66, 0xFF9D)],
+    'han': [(0x4E00, 0x9FFF), (0x3400, 0x4DBF), (0xF900, 0xFAFF)],
+    'arabic': [(0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)],
+    'latin': [(0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)],
+}
+
+# الحرف اللاتيني بيحمل معلومة أقل من المقطع الكوري أو الحرف الصيني،
+# فبنقلل وزنه عشان كلمات إنجليزي قليلة ما تغطيش على الكوري
+SCRIPT_WEIGHTS = {'latin': 1 / 3}
+
+# كود اللغة عند Google لكل كتابة غالبة
+SCRIPT_LANGS = {
+    'hangul': 'ko',
+    'han': 'zh-CN',
+    'arabic': 'ar',
+    'latin': 'en',
+}
+
+
+def _script_of(char):
+    code = ord(char)
+    for script, ranges in SCRIPT_RANGES.items():
+        for start, end in ranges:
+            if start <= code <= end:
+                return script
+    return None
+
+
+def count_scripts(text):
+    """عدد الحروف من كل كتابة في النص"""
+    counts = dict.fromkeys(SCRIPT_RANGES, 0)
+    for char in text:
+        if char.isascii() and not char.isalpha():
+            continue
+        script = _script_of(char)
+        if script:
+            counts[script] += 1
+    return counts
+
+
+def detect_language(text, min_chars=3, dominance=0.6):
+    """كشف اللغة محلياً من الكتابة المستخدمة، وبترجع None لو مش متأكدة"""
+    if not text:
+        return None
+    
+    counts = count_scripts(text)
+    if sum(counts.values()) < min_chars:
+        return None
+    counts = {s: n * SCRIPT_WEIGHTS.get(s, 1) for s, n in counts.items()}
+    total = sum(counts.values())
+    
+    # الياباني بيخلط kana مع kanji، فأي نسبة kana معقولة تعني ياباني
+    cjk = counts['kana'] + counts['han']
+    if counts['kana'] and counts['kana'] >= 0.1 * cjk and cjk >= dominance * total:
+        return 'ja'
+    
+    script, count = max(counts.items(), key=lambda item: item[1])
+    if count < dominance * total or script not in SCRIPT_LANGS:
+        return None
+    
+    # حروف لاتينية فيها تشكيل ممكن تكون فرنساوي أو إسباني، نسيبها لـ Google
+    if script == 'latin' and any(not c.isascii() for c in text if _script_of(c) == 'latin'):
+        return None
+    
+    return SCRIPT_LANGS[script]
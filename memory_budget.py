@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBudget:
+    """ميزانية ذاكرة مشتركة: الشغلانة بتحجز حجمها المتوقع، ولو مفيش مكان بتستنى"""
+
+    def __init__(self, limit_bytes):
+        self.limit = limit_bytes
+        self.used = 0
+        self.peak = 0
+        self.waiting = 0
+        self.postponed = 0  # عدد الشغلانات اللي اضطرت تستنى
+        self._condition = None
+
+    def _get_condition(self):
+        # بيتعمل جوه الـ loop (Python 3.9 بيربط الـ primitives بالـ loop وقت الإنشاء)
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _fits(self, nbytes):
+        # شغلانة أكبر من الميزانية كلها بتدخل لوحدها بس لما مفيش حاجة تانية شغالة
+        return self.used + nbytes <= self.limit or self.used == 0
+
+    async def acquire(self, nbytes):
+        condition = self._get_condition()
+        async with condition:
+            if not self._fits(nbytes):
+                self.postponed += 1
+                self.waiting += 1
+                logger.info(f"⏳ شغلانة محتاجة {nbytes / 1024 / 1024:.0f}MB مستنية ذاكرة ({self.used / 1024 / 1024:.0f}MB محجوزة)")
+                try:
+                    await condition.wait_for(lambda: self._fits(nbytes))
+                finally:
+                    self.waiting -= 1
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+
+    async def release(self, nbytes):
+        condition = self._get_condition()
+        async with condition:
+            self.used -= nbytes
+            condition.notify_all()
+
+    def stats(self):
+        return {'limit': self.limit, 'used': self.used, 'peak': self.peak, 'waiting': self.waiting, 'postponed': self.postponed}
@@ -0,0 +1,175 @@
+import bisect
+import logging
+import time
+from collections import deque
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# حدود الـ buckets بالثواني (من 5 ملي لحد دقيقتين)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    """buckets تراكمية لـ Prometheus، وآخر window قيمة عشان p50/p95/p99"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=500):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # الأخير = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def percentiles(self, ps=(0.5, 0.95, 0.99)):
+        """النسب المئوية على الـ window بس (None لو مفيش عينات)"""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return [ordered[min(len(ordered) - 1, int(len(ordered) * p))] for p in ps]
+
+
+class _Timer:
+    """context manager بيسجل الوقت في المرحلة (بيشتغل حوالين await عادي)"""
+
+    __slots__ = ('metrics', 'stage', 'started')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """registry واحد لكل البوت: وقت كل مرحلة، عدادات، و gauges بتتحسب وقت القراءة"""
+
+    def __init__(self, prefix='manhwa', window=500, buckets=DEFAULT_BUCKETS, enabled=True):
+        self.prefix = prefix
+        self.window = window
+        self.buckets = buckets
+        self.enabled = enabled  # مقفول = كل التسجيل بيرجع على طول (للمقارنة في الـ benchmark)
+        self.stages = {}  # stage -> Histogram
+        self.counters = {}  # name -> {labels: value}
+        self.gauges = {}  # name -> دالة بترجع رقم أو [(labels dict, value)]
+        self.help = {}
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram(self.buckets, self.window)
+        histogram.observe(seconds)
+
+    def time(self, stage):
+        return _Timer(self, stage)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def count_bytes(self, direction, source, nbytes):
+        """bytes داخلة (in) أو خارجة (out) لكل مصدر: download, ocr, translate"""
+        self.inc('bytes_total', nbytes, direction=direction, source=source)
+
+    def gauge(self, name, func, help=''):
+        """gauge بيتقري من func وقت الـ render بس، فمفيش تكلفة على المسار نفسه"""
+        self.gauges[name] = func
+        if help:
+            self.help[name] = help
+
+    def stage_summary(self):
+        """{stage: (العدد، p50، p95، p99)} للمراحل اللي فيها عينات"""
+        summary = {}
+        for stage, histogram in self.stages.items():
+            values = histogram.percentiles()
+            if values:
+                summary[stage] = (histogram.count, *values)
+        return summary
+
+    def counter(self, name, **labels):
+        return self.counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    @staticmethod
+    def _labels(pairs):
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+    def render(self):
+        """كل المقاييس بصيغة Prometheus text (version 0.0.4)"""
+        lines = []
+        if self.stages:
+            name = f'{self.prefix}_stage_seconds'
+            lines += [f'# HELP {name} وقت كل مرحلة في معالجة الصورة', f'# TYPE {name} histogram']
+            for stage, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        for counter, series in sorted(self.counters.items()):
+            name = f'{self.prefix}_{counter}'
+            lines.append(f'# TYPE {name} counter')
+            lines += [f'{name}{self._labels(labels)} {value}' for labels, value in sorted(series.items())]
+        for gauge, func in sorted(self.gauges.items()):
+            name = f'{self.prefix}_{gauge}'
+            try:
+                value = func()
+            except Exception as e:
+                logger.error(f"خطأ في قراءة {name}: {e}")
+                continue
+            if gauge in self.help:
+                lines.append(f'# HELP {name} {self.help[gauge]}')
+            lines.append(f'# TYPE {name} gauge')
+            if isinstance(value, list):
+                lines += [f'{name}{self._labels(tuple(labels.items()))} {v}' for labels, v in value]
+            else:
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """endpoint محلي بيرجع /metrics لـ Prometheus"""
+
+    def __init__(self, metrics, host='127.0.0.1', port=9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(text=self.metrics.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # port 0 = أي port فاضي (للـ benchmarks)
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"📈 المقاييس على http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import os
+import shutil
+import subprocess
+import time
+from worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+def run_tesseract(image_bytes, languages, psm=6, timeout=60.0, binary='tesseract'):
+    """قراءة جزء واحد بـ tesseract من stdin (بيشتغل في الـ pool)"""
+    # thread واحد لكل process عشان كذا جزء في نفس الوقت ما يتخانقوش على الـ cores
+    env = dict(os.environ, OMP_THREAD_LIMIT='1')
+    result = subprocess.run(
+        [binary, 'stdin', 'stdout', '-l', languages, '--psm', str(psm)],
+        input=image_bytes, capture_output=True, timeout=timeout, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip()[:200])
+    return result.stdout.decode('utf-8', 'replace')
+
+
+class OCRSpaceBackend:
+    """OCR.Space: المفاتيح والـ limiter والإعادة والـ hedging كلها في OCREngine"""
+
+    name = 'ocrspace'
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def available(self):
+        return True
+
+    def load(self):
+        limiter = self.engine.limiter
+        return limiter.in_flight / max(1, int(limiter.limit))
+
+    def quota_left(self):
+        return self.engine.keys.has_quota()
+
+    async def recognize(self, part_bytes, part_num, total_parts, deadline, fallback_after=None):
+        return await self.engine.extract_remote(part_bytes, part_num, total_parts, deadline, fallback_after)
+
+    def close(self):
+        pass
+
+
+class TesseractBackend:
+    """Tesseract محلي: كل جزء بيتقري في process tesseract لوحده، والـ pool بيحدد كام process في نفس الوقت"""
+
+    name = 'tesseract'
+
+    def __init__(self, languages='kor+jpn+chi_sim+eng', workers=None, psm=6, binary='tesseract'):
+        self.languages = languages
+        self.workers = workers or os.cpu_count() or 1
+        self.psm = psm  # 6 = بلوك نص واحد، مناسب لجزء فيه فقاعات
+        self.binary = binary
+        self.in_flight = 0
+        self._available = None
+        self._probe = None
+        self._pool = None
+
+    def available(self):
+        # بيتفحص مرة واحدة: البرنامج متثبت وفيه موديل واحد على الأقل من اللي طالبينها.
+        # جوه الـ loop الفحص (subprocess) بيشتغل في thread، والمحرك مقفول لحد ما يخلص
+        if self._available is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._available = self._detect()
+                return self._available
+            if self._probe is None:
+                self._probe = loop.run_in_executor(None, self._detect)
+                self._probe.add_done_callback(self._probed)
+            return False
+        return self._available
+
+    def _probed(self, future):
+        self._available = not future.cancelled() and future.exception() is None and future.result()
+
+    def _detect(self):
+        if not shutil.which(self.binary):
+            logger.info("ℹ️ tesseract مش متثبت، OCR المحلي مقفول")
+            return False
+        try:
+            output = subprocess.run([self.binary, '--list-langs'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(f"❌ tesseract مش شغال: {e}")
+            return False
+        # أول سطر عنوان: List of available languages in "...":
+        installed = {line.strip() for line in output.splitlines()[1:]}
+        wanted = self.languages.split('+')
+        found = [lang for lang in wanted if lang in installed]
+        if not found:
+            logger.warning(f"⚠️ مفيش موديلات tesseract من {self.languages}")
+            return False
+        if len(found) < len(wanted):
+            logger.warning(f"⚠️ موديلات tesseract ناقصة: {', '.join(l for l in wanted if l not in found)}")
+        self.languages = '+'.join(found)
+        logger.info(f"🖥️ tesseract جاهز: {self.languages} × {self.workers}")
+        return True
+
+    def load(self):
+        return self.in_flight / self.workers
+
+    def quota_left(self):
+        return True
+
+    async def recognize(self, part_bytes, part_num, total_parts, deadline, fallback_after=None):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False, None
+        if self._pool is None:
+            # threads بتستنى processes الـ tesseract، فالشغل نفسه على كل الـ cores من غير pickling للصورة
+            self._pool = WorkerPool('thread', self.workers)
+        self.in_flight += 1
+        try:
+            text = await self._pool.run(run_tesseract, bytes(part_bytes), self.languages, self.psm, remaining, self.binary)
+        except Exception as e:
+            logger.error(f"الجزء {part_num} خطأ في tesseract: {e}")
+            return False, None
+        finally:
+            self.in_flight -= 1
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        if lines:
+            logger.info(f"✅ الجزء {part_num}/{total_parts} (tesseract): {sum(map(len, lines))} حرف")
+        return True, '\n'.join(lines) or None
+
+    def close(self):
+        if self._pool:
+            self._pool.close()
+            self._pool = None
+
+
+class BackendRouter:
+    """بيرتب محركات OCR لكل جزء، والجزء اللي فشل في محرك بيتجرب في اللي بعده
+
+    في auto المحرك بينزل لآخر الترتيب لو: فشل failure_threshold مرات ورا بعض (لمدة cooldown)،
+    أو مفاتيحه كلها متوقفة، أو مليان ووقته المتوقع أطول من محرك تاني عنده مكان.
+    """
+
+    def __init__(self, backends, policy='auto', failure_threshold=3, cooldown=60.0):
+        self.backends = list(backends)
+        self.latency = {b.name: None for b in self.backends}  # متوسط متحرك لوقت الجزء الناجح
+        self.policy = policy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = {b.name: 0 for b in self.backends}
+        self.tripped_until = {b.name: 0.0 for b in self.backends}
+        self.counts = {b.name: {'ok': 0, 'failed': 0, 'fallback': 0} for b in self.backends}
+
+    @property
+    def primary(self):
+        """المحرك الأساسي، وأي جزء اتقرا بغيره بيتحسب احتياطي"""
+        if self.policy != 'auto' and any(b.name == self.policy for b in self.backends):
+            return self.policy
+        return self.backends[0].name
+
+    def order(self):
+        available = [b for b in self.backends if b.available()]
+        if self.policy != 'auto':
+            return sorted(available, key=lambda b: b.name != self.policy)
+        now = time.monotonic()
+        # sorted ثابت، فالمحركات اللي ما نزلتش بتفضل بالترتيب المفضل
+        return sorted(available, key=lambda b: self._demoted(b, available, now))
+
+    def _demoted(self, backend, available, now):
+        if self.tripped_until[backend.name] > now:
+            return True
+        if not backend.quota_left():
+            return True
+        if backend.load() < 1:
+            return False
+        # المليان بينزل بس لو الاستنى عليه أطول من الجزء على محرك فاضي (المحرك الاحتياطي أبطأ عادةً)
+        expected = self.expected_time(backend)
+        if expected is None:
+            return False
+        return any(
+            other.load() < 1 and self.expected_time(other) is not None and self.expected_time(other) < expected
+            for other in available if other is not backend
+        )
+
+    def expected_time(self, backend):
+        """الوقت المتوقع للجزء على المحرك ده مع الطابور اللي عليه (None لو لسه مفيش عينات)"""
+        latency = self.latency[backend.name]
+        if latency is None:
+            return None
+        return latency * (1 + backend.load())
+
+    def report(self, backend, ok, elapsed=None, fallback=False):
+        counts = self.counts[backend.name]
+        if ok:
+            if elapsed is not None:
+                previous = self.latency[backend.name]
+                self.latency[backend.name] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            self.failures[backend.name] = 0
+            counts['ok'] += 1
+            if fallback:
+                counts['fallback'] += 1
+            return
+        counts['failed'] += 1
+        self.failures[backend.name] += 1
+        if self.failures[backend.name] >= self.failure_threshold:
+            self.failures[backend.name] = 0
+            self.tripped_until[backend.name] = time.monotonic() + self.cooldown
+            logger.warning(f"🔌 {backend.name} فشل {self.failure_threshold} مرات ورا بعض، الأجزاء هتروح للمحرك التاني {self.cooldown:.0f} ث")
+
+    def stats(self):
+        now = time.monotonic()
+        return [
+            {
+                'name': b.name,
+                'available': b.available(),
+                **self.counts[b.name],
+                'tripped': max(0.0, self.tripped_until[b.name] - now),
+                'load': b.load(),
+            }
+            for b in self.backends
+        ]
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(image_bytes):
+    """هاش لمحتوى الملف نفسه (نفس البايتات بالظبط)"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def dhash(image, width=8, height=8):
+    """difference hash: بيفضل ثابت لو الصورة اتعمل لها re-encode أو ضغط"""
+    # الصفحة الرمادي ما بتتنسخش (convert لنفس الـ mode بيعمل نسخة كاملة)
+    small = (image if image.mode == 'L' else image.convert('L')).resize((width + 1, height))
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(height):
+        offset = row * (width + 1)
+        for col in range(width):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def thumbnail(image, width=256):
+    """نسخة رمادي مصغرة بعرض ثابت، كفاية تبين الفرق في كلام الفقاعات"""
+    height = max(1, image.height * width // image.width)
+    gray = image if image.mode == 'L' else image.convert('L')
+    return np.asarray(gray.resize((width, height), Image.BOX), dtype=np.uint8)
+
+
+def thumbnails_match(a, b, max_diff=32):
+    """مفيش ولا بكسل مختلف أكتر من max_diff (الارتفاع ممكن يفرق صف من التقريب)"""
+    rows = min(len(a), len(b))
+    if abs(len(a) - len(b)) > 1 or not rows:
+        return False
+    return int(np.abs(a[:rows].astype(np.int16) - b[:rows].astype(np.int16)).max()) <= max_diff
+
+
+class OCRCache:
+    """كاش لنتايج OCR: LRU في الذاكرة فوق SQLite على الديسك"""
+    
+    # الصفحات طويلة، فالهاش بيبقى أطول من العادي عشان يفرق بين الصفحات المتشابهة
+    HASH_WIDTH = 8
+    HASH_HEIGHT = 32
+    # عرض الـ thumbnail اللي بيأكد إن الصفحتين فعلاً نفس الصورة
+    THUMB_WIDTH = 256
+    
+    def __init__(self, path, max_memory_bytes=16 * 1024 * 1024, max_entries=50000, max_distance=6, max_candidates=5):
+        self.path = path
+        self.max_memory_bytes = max_memory_bytes
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_candidates = max_candidates  # أقصى عدد صفحات بتتقارن بالـ thumbnail لكل بحث
+        
+        self.memory = OrderedDict()  # sha -> text
+        self.memory_bytes = 0
+        self.phashes = {}  # sha -> (phash, width, height)
+        # فهرس multi-index: الهاش متقسم max_distance + 1 شريحة، وأي هاشين المسافة بينهم
+        # max_distance أو أقل لازم يتطابقوا في شريحة واحدة على الأقل، فالبحث بيبص على دول بس
+        self.bands = max_distance + 1
+        self.band_bits = -(-self.HASH_WIDTH * self.HASH_HEIGHT // self.bands)
+        self.index = {}  # (رقم الشريحة، قيمتها) -> set من الـ sha
+        
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_cache ("
+            "sha TEXT PRIMARY KEY, phash TEXT, width INTEGER, height INTEGER, "
+            "text TEXT NOT NULL, last_used REAL)"
+        )
+        # الكاش القديم من غير thumbnails: صفحاته بتتلاقى بالمحتوى بس
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(ocr_cache)")}
+        if 'thumb' not in columns:
+            self.db.execute("ALTER TABLE ocr_cache ADD COLUMN thumb BLOB")
+        self.db.commit()
+        
+        for sha, phash, width, height in self.db.execute("SELECT sha, phash, width, height FROM ocr_cache"):
+            if phash:
+                self._add(sha, int(phash, 16), width, height)
+        logger.info(f"🗃️ كاش OCR: {len(self.phashes)} صفحة محفوظة")
+    
+    def _band_keys(self, phash):
+        mask = (1 << self.band_bits) - 1
+        return [(band, (phash >> (band * self.band_bits)) & mask) for band in range(self.bands)]
+    
+    def _add(self, sha, phash, width, height):
+        self._forget(sha)
+        self.phashes[sha] = (phash, width, height)
+        for key in self._band_keys(phash):
+            self.index.setdefault(key, set()).add(sha)
+    
+    def _forget(self, sha):
+        entry = self.phashes.pop(sha, None)
+        if entry is None:
+            return
+        for key in self._band_keys(entry[0]):
+            shas = self.index.get(key)
+            if shas is not None:
+                shas.discard(sha)
+                if not shas:
+                    del self.index[key]
+    
+    def image_hash(self, image):
+        return dhash(image, self.HASH_WIDTH, self.HASH_HEIGHT)
+    
+    def _remember(self, sha, text):
+        """إضافة للذاكرة مع طرد الأقدم لو عدينا الحد"""
+        if sha in self.memory:
+            self.memory.move_to_end(sha)
+            return
+        self.memory[sha] = text
+        self.memory_bytes += len(text.encode('utf-8'))
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, old = self.memory.popitem(last=False)
+            self.memory_bytes -= len(old.encode('utf-8'))
+    
+    def _load(self, sha):
+        if sha in self.memory:
+            self.memory.move_to_end(sha)
+            return self.memory[sha]
+        row = self.db.execute("SELECT text FROM ocr_cache WHERE sha = ?", (sha,)).fetchone()
+        if not row:
+            return None
+        self.db.execute("UPDATE ocr_cache SET last_used = ? WHERE sha = ?", (time.time(), sha))
+        self.db.commit()
+        self._remember(sha, row[0])
+        return row[0]
+    
+    def get(self, sha):
+        """بحث بهاش المحتوى"""
+        with self._lock:
+            text = self._load(sha)
+            if text is not None:
+                self.hits += 1
+            return text
+    
+    def _thumb(self, sha):
+        row = self.db.execute("SELECT thumb FROM ocr_cache WHERE sha = ?", (sha,)).fetchone()
+        if not row or not row[0]:
+            return None
+        return np.frombuffer(zlib.decompress(row[0]), dtype=np.uint8).reshape(-1, self.THUMB_WIDTH)
+    
+    def get_similar(self, phash, size, thumb=None):
+        """بحث بالهاش الإدراكي لنسخ اتعمل لها re-encode
+        
+        الهاش لوحده ما بيفرقش بين نفس الرسمة بكلام مختلف (raw والنسخة المترجمة مثلاً)،
+        فالمرشح لازم الـ thumbnail بتاعه يطابق بكسل ببكسل تقريباً قبل ما نرجع نصه.
+        """
+        width, height = size
+        with self._lock:
+            candidates = []
+            nearby = set()
+            for key in self._band_keys(phash) if phash is not None and thumb is not None else ():
+                nearby |= self.index.get(key, set())
+            for sha in nearby:
+                other, w, h = self.phashes[sha]
+                # لازم نفس نسبة الأبعاد تقريباً
+                if abs(w * height - h * width) > 0.01 * width * height:
+                    continue
+                distance = hamming(phash, other)
+                if distance <= self.max_distance:
+                    candidates.append((distance, sha))
+            
+            for _, sha in sorted(candidates)[:self.max_candidates]:
+                other_thumb = self._thumb(sha)
+                if other_thumb is None or not thumbnails_match(thumb, other_thumb):
+                    continue
+                text = self._load(sha)
+                if text is not None:
+                    self.perceptual_hits += 1
+                    return text
+            
+            self.misses += 1
+            return None
+    
+    def put(self, sha, text, phash=None, size=(0, 0), thumb=None):
+        with self._lock:
+            # الـ thumbnail على الديسك بس (مضغوط) وبيتقري وقت التأكيد
+            blob = zlib.compress(np.ascontiguousarray(thumb, dtype=np.uint8).tobytes()) if thumb is not None else None
+            self.db.execute(
+                "INSERT OR REPLACE INTO ocr_cache (sha, phash, width, height, text, last_used, thumb) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (sha, f"{phash:x}" if phash is not None else None, size[0], size[1], text, time.time(), blob)
+            )
+            if phash is not None:
+                self._add(sha, phash, size[0], size[1])
+            else:
+                self._forget(sha)
+            self._remember(sha, text)
+            
+            # تنظيف الديسك لو عدينا أقصى عدد
+            if len(self.phashes) > self.max_entries:
+                old = self.db.execute(
+                    "SELECT sha FROM ocr_cache ORDER BY last_used LIMIT ?",
+                    (len(self.phashes) - self.max_entries,)
+                ).fetchall()
+                for (sha_old,) in old:
+                    self._forget(sha_old)
+                    self.db.execute("DELETE FROM ocr_cache WHERE sha = ?", (sha_old,))
+            self.db.commit()
+    
+    def stats(self):
+        total = self.hits + self.perceptual_hits + self.misses
+        return {
+            'hits': self.hits,
+            'perceptual_hits': self.perceptual_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits + self.perceptual_hits) / total if total else 0.0,
+            'entries': len(self.phashes),
+            'memory_bytes': self.memory_bytes,
+        }
+    
+    def close(self):
+        with self._lock:
+            self.db.close()
@@ -1,20 +1,131 @@
 import aiohttp
 import base64
 import logging
-from config import OCR_API_KEY
+from config import (
+    OCR_API_KEYS, OCR_MAX_CONCURRENCY, OCR_SPLIT_STRATEGY, OCR_TRIAGE, OCR_KEY_RATE, OCR_KEY_BURST,
+    OCR_ADAPTIVE_MAX_CONCURRENCY, OCR_RETRIES, OCR_REQUEST_TIMEOUT, OCR_JOB_DEADLINE, OCR_HEDGE,
+    OCR_UPLOAD_MODE, OCR_LOW_MEMORY, OCR_MAX_DECODE_WIDTH, OCR_PREPROCESS,
+    OCR_BACKENDS, OCR_BACKEND_POLICY, TESSERACT_LANGS, TESSERACT_WORKERS,
+)
 from PIL import Image
+import numpy as np
 import io
-import math
 import asyncio
+import random
+import threading
+import time
+from collections import deque
+from ocr_cache import OCRCache, content_hash, dhash, hamming, thumbnail
+from jpeg_encoder import encode_to_budget
+from image_processor import ImageProcessor
+from http_client import HttpClient
+from rate_limiter import AdaptiveLimiter, KeyPool
+from metrics import Metrics
+from ocr_backends import BackendRouter, OCRSpaceBackend, TesseractBackend
+from worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
+# الفاصل بين نصوص الأجزاء في النتيجة النهائية
+PART_SEPARATOR = '\n\n---\n\n'
+
+class PageStrip:
+    """جزء من الصفحة بيتقص وقت ما يتضغط بس، عشان ما تبقاش كل الأجزاء في الذاكرة مع بعض"""
+    
+    def __init__(self, page, y_start, y_end):
+        self.page = page
+        self.box = (0, y_start, page.width, y_end)
+    
+    def load(self):
+        return self.page.crop(self.box)
+
 class OCREngine:
-    def __init__(self):
-        self.api_key = OCR_API_KEY
+    def __init__(self, max_concurrency=None, cache=None, split_strategy=None, pool=None, http=None, keys=None, budget=None, metrics=None):
         self.url = "https://api.ocr.space/parse/image"
         self.max_size_kb = 900  # أقل من 1 ميجا لكل جزء
+        self.upload_mode = OCR_UPLOAD_MODE  # 'multipart' (الـ JPEG نفسه) أو 'base64'
+        # أقصى عدد أجزاء بتتبعت في نفس الوقت من الصورة الواحدة
+        self.max_concurrency = max(1, max_concurrency or OCR_MAX_CONCURRENCY)
+        # مفاتيح الـ API بـ token bucket لكل مفتاح، وحد تزامن AIMD مشترك بين كل الشغلانات
+        self.keys = keys if keys is not None else KeyPool(OCR_API_KEYS, OCR_KEY_RATE, OCR_KEY_BURST)
+        self.limiter = AdaptiveLimiter(self.max_concurrency, maximum=max(self.max_concurrency, OCR_ADAPTIVE_MAX_CONCURRENCY))
+        # إعادة المحاولة: عدد المحاولات بعد الخطأ، و backoff بيبدأ من 0.5 ث ويتضاعف لحد 8 ث
+        self.max_retries = OCR_RETRIES
+        self.retry_base_delay = 0.5
+        self.retry_max_delay = 8.0
+        self.request_timeout = OCR_REQUEST_TIMEOUT  # أقصى وقت للطلب الواحد
+        self.job_deadline = OCR_JOB_DEADLINE  # أقصى وقت لـ OCR الصفحة كلها
+        # hedging: طلب تاني للجزء اللي عدى p95 بتاع أوقات الطلبات الأخيرة
+        self.hedge = OCR_HEDGE
+        self.hedged = 0
+        self.latencies = deque(maxlen=200)
+        self.cache = cache  # OCRCache اختياري
+        # البحث والحفظ في الكاش (SQLite و lock) في thread واحد بعيد عن الـ event loop
+        self.cache_thread = WorkerPool('thread', 1) if cache else None
+        self.pool = pool  # WorkerPool اختياري للشغل التقيل على الـ CPU
+        # seen المشتركة بين صفحات الفصل بتتفحص وتتملي من threads الـ pool في نفس الوقت
+        self.seen_lock = threading.Lock()
+        self.budget = budget  # MemoryBudget اختياري: الصفحة بتستنى لحد ما حجمها المتوقع يتاح
+        # وقت كل مرحلة وعدادات الطلبات (registry البوت، أو واحد خاص لو الـ engine شغال لوحده)
+        self.metrics = metrics or Metrics()
+        # فك قليل الذاكرة: رمادي، ومصغر لو العرض أكبر من max_decode_width، والأجزاء بتتقص وقت الضغط
+        self.low_memory = OCR_LOW_MEMORY
+        self.max_decode_width = OCR_MAX_DECODE_WIDTH
+        # معالجة الجزء قبل الضغط (CLAHE + threshold) عشان يتبعت أبيض وأسود
+        self.preprocess = OCR_PREPROCESS
+        # الجلسة المشتركة من البوت، أو جلسة خاصة لو الـ engine شغال لوحده
+        self.http = http or HttpClient()
+        self._own_http = http is None
+        self.part_height = 2000  # أقصى ارتفاع لكل جزء
+        # 'gutter' = القص في الفراغات بين الفقاعات، 'fixed' = كل 2000 بكسل بالظبط
+        self.split_strategy = split_strategy or OCR_SPLIT_STRATEGY
+        # فرز الأجزاء قبل الرفع: الفاضي والمكرر ما بيتبعتش
+        self.triage = OCR_TRIAGE
+        self.min_edge_density = 0.005  # أقل نسبة حواف في شريط عشان الجزء يعتبر فيه نص
+        self.duplicate_distance = 8  # أقصى فرق بين هاشين عشان يعتبروا نفس الجزء
+        self.api_calls_avoided = 0
+        # محركات OCR بالترتيب المفضل، والـ router بيختار لكل جزء ويرجع للي بعده لو فشل
+        self.router = BackendRouter(self.default_backends(), OCR_BACKEND_POLICY)
         
+    def default_backends(self):
+        backends = {
+            'ocrspace': lambda: OCRSpaceBackend(self),
+            'tesseract': lambda: TesseractBackend(TESSERACT_LANGS, TESSERACT_WORKERS),
+        }
+        unknown = [name for name in OCR_BACKENDS if name not in backends]
+        if unknown:
+            logger.warning(f"⚠️ محركات OCR مش معروفة: {', '.join(unknown)}")
+        return [backends[name]() for name in OCR_BACKENDS if name in backends] or [OCRSpaceBackend(self)]
+    
+    def __getstate__(self):
+        # الـ worker processes محتاجة الإعدادات بس، مش الكاش أو الـ pool
+        state = self.__dict__.copy()
+        state['cache'] = None
+        state['cache_thread'] = None
+        state['pool'] = None
+        state['budget'] = None
+        state['metrics'] = None
+        state['http'] = None
+        state['keys'] = None
+        state['limiter'] = None
+        state['router'] = None
+        state['seen_lock'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.seen_lock = threading.Lock()
+    
+    async def cache_call(self, func, *args):
+        """نداء على الكاش في الـ thread بتاعه"""
+        return await self.cache_thread.run(func, *args)
+    
+    async def run_cpu(self, func, *args):
+        """تشغيل دالة تقيلة في الـ worker pool لو موجود، وإلا مباشرة"""
+        if self.pool:
+            return await self.pool.run(func, *args)
+        return func(*args)
+    
     def split_image(self, image_bytes):
         """تقسيم الصورة الكبيرة إلى أجزاء"""
         try:
@@ -28,17 +139,17 @@ class OCREngine:
             if height <= 3000 and len(image_bytes) < 1.5 * 1024 * 1024:
                 return [(img, 0, height)]
             
-            # حساب عدد الأجزاء (كل جزء 2000 بكسل ارتفاع)
-            part_height = 2000
-            num_parts = math.ceil(height / part_height)
+            # تحديد أماكن القص
+            if self.split_strategy == 'gutter':
+                cuts = self.find_gutter_cuts(img, self.part_height)
+            else:
+                cuts = list(range(self.part_height, height, self.part_height))
+            bounds = [0] + cuts + [height]
             
             parts = []
-            logger.info(f"📦 تقسيم الصورة إلى {num_parts} أجزاء")
+            logger.info(f"📦 تقسيم الصورة إلى {len(bounds) - 1} أجزاء")
             
-            for i in range(num_parts):
-                y_start = i * part_height
-                y_end = min((i + 1) * part_height, height)
-                
+            for y_start, y_end in zip(bounds, bounds[1:]):
                 # قص الجزء
                 part = img.crop((0, y_start, width, y_end))
                 parts.append((part, y_start, y_end))
@@ -49,6 +160,199 @@ class OCREngine:
             logger.error(f"خطأ في التقسيم: {e}")
             return []
     
+    @staticmethod
+    def row_ink(img, threshold=40, band=1024):
+        """نسبة البكسلات المختلفة عن خلفية كل صف (الخلفية = الوسيط)"""
+        # شريحة صفوف كل مرة عشان نسخة int16 للصفحة كلها ما تتعملش
+        gray = img if img.mode == 'L' else img.convert('L')
+        ink = []
+        for top in range(0, gray.height, band):
+            rows = np.asarray(gray.crop((0, top, gray.width, min(gray.height, top + band))), dtype=np.int16)
+            background = np.median(rows, axis=1, keepdims=True)
+            ink.append((np.abs(rows - background) > threshold).mean(axis=1))
+        return np.concatenate(ink) if ink else np.zeros(0)
+    
+    def find_gutter_cuts(self, img, part_height, search_ratio=0.4, smooth=15):
+        """اختيار أماكن القص في أقل الصفوف حبراً قبل كل حد 2000 بكسل"""
+        # القص بيتدور عليه في آخر search_ratio من كل جزء بس، فمفيش جزء بيعدي part_height
+        ink = self.row_ink(img)
+        height = len(ink)
+        # تنعيم عشان ما نقصش لازق في سطر نص
+        cost = np.convolve(ink, np.ones(smooth) / smooth, mode='same')
+        
+        cuts = []
+        start = 0
+        window = max(1, int(part_height * search_ratio))
+        while height - start > part_height:
+            hi = start + part_height
+            lo = hi - window
+            segment = cost[lo:hi + 1]
+            # لو في كذا صف بنفس الحبر، ناخد الأقرب للحد عشان أجزاء أقل
+            best = lo + len(segment) - 1 - int(np.argmin(segment[::-1]))
+            cuts.append(best)
+            start = best
+        return cuts
+    
+    @staticmethod
+    def edge_density(image, width=256, band=8):
+        """أعلى نسبة حواف قوية في أي شريط صفوف في نسخة مصغرة"""
+        # التدرجات والخلفيات السادة بتدي صفر تقريباً، وسطر نص واحد كفاية يرفع الشريط بتاعه
+        gray = image.convert('L')
+        if gray.width > width:
+            gray = gray.resize((width, max(1, gray.height * width // gray.width)))
+        a = np.asarray(gray, dtype=np.int16)
+        if a.shape[0] < 2 or a.shape[1] < 2:
+            return 0.0
+        edges = (np.abs(np.diff(a, axis=1))[:-1] > 40) | (np.abs(np.diff(a, axis=0))[:, :-1] > 40)
+        per_row = edges.mean(axis=1)
+        band = min(band, len(per_row))
+        return float(np.convolve(per_row, np.ones(band) / band, mode='valid').max())
+    
+    def triage_parts(self, parts, seen=None):
+        """شيل الأجزاء اللي مفيهاش نص أو اللي شبه جزء اتبعت قبل كده في نفس الصفحة (أو الفصل لو seen مشتركة)"""
+        kept = []
+        seen = [] if seen is None else seen
+        blank = duplicate = 0
+        for part, y_start, y_end in parts:
+            verdict = self.triage_part(part.load() if isinstance(part, PageStrip) else part, seen)
+            if verdict == 'blank':
+                blank += 1
+            elif verdict == 'duplicate':
+                duplicate += 1
+            else:
+                kept.append((part, y_start, y_end))
+        
+        if blank or duplicate:
+            logger.info(f"✂️ تم تخطي {blank} جزء فاضي و {duplicate} جزء مكرر")
+        return kept, blank, duplicate
+    
+    def triage_part(self, part, seen):
+        """'blank' أو 'duplicate' أو None، و seen بتتملي ببصمات الأجزاء اللي اتقبلت"""
+        if self.edge_density(part) < self.min_edge_density:
+            return 'blank'
+        
+        # الـ dHash فلتر سريع، وبعدين نتأكد إن مفيش أي مكان مختلف في النسخة المصغرة
+        # عشان فقاعتين صغيرين في أماكن مختلفة ما يتحسبوش نفس الجزء
+        fingerprint = dhash(part, 16, 16)
+        thumb = thumbnail(part).astype(np.int16)
+        # الفحص والإضافة مع بعض، عشان صفحتين في نفس اللحظة ما يبعتوش نفس الجزء المتكرر
+        with self.seen_lock:
+            if any(hamming(fingerprint, other) <= self.duplicate_distance
+                   and other_thumb.shape == thumb.shape
+                   and np.abs(other_thumb - thumb).max() <= 32
+                   for other, other_thumb in seen):
+                return 'duplicate'
+            seen.append((fingerprint, thumb))
+        return None
+    
+    def open_page(self, image_bytes):
+        """فك الصفحة بأقل ذاكرة: رمادي من الأول، ومصغرة لو العرض أكبر من max_decode_width"""
+        img = Image.open(io.BytesIO(image_bytes))
+        width, height = img.size
+        factor = 1
+        while width // (factor * 2) >= self.max_decode_width:
+            factor *= 2
+        
+        if img.format == 'JPEG':
+            # libjpeg بيفك على طول رمادي وبمقياس 1/2 أو 1/4 أو 1/8 من غير الصورة الملونة الكاملة
+            img.draft('L', (width // factor, height // factor))
+        
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            # الشفاف بيبقى أبيض زي compress_part
+            la = img.convert('LA')
+            gray = Image.new('L', la.size, 255)
+            gray.paste(la.getchannel('L'), mask=la.getchannel('A'))
+            del la
+        else:
+            gray = img if img.mode == 'L' else img.convert('L')
+        del img
+        
+        # الصيغ اللي ما بتدعمش draft بتتصغر بعد التحويل للرمادي (أرخص)
+        if gray.width > width // factor:
+            gray = gray.reduce(max(1, gray.width * factor // width))
+        return gray
+    
+    def split_page(self, image_bytes, page=None):
+        """زي split_image بس بيرجع PageStrip بدل قصاصات متفكوكة، والصفحة نفسها رمادي (page لو اتفكت قبل كده)"""
+        try:
+            page = page if page is not None else self.open_page(image_bytes)
+            width, height = page.size
+            logger.info(f"📏 أبعاد الصورة: {width}x{height} (رمادي)")
+            
+            if height <= 3000 and len(image_bytes) < 1.5 * 1024 * 1024:
+                return [(PageStrip(page, 0, height), 0, height)]
+            
+            if self.split_strategy == 'gutter':
+                cuts = self.find_gutter_cuts(page, self.part_height)
+            else:
+                cuts = list(range(self.part_height, height, self.part_height))
+            bounds = [0] + cuts + [height]
+            logger.info(f"📦 تقسيم الصورة إلى {len(bounds) - 1} أجزاء")
+            return [(PageStrip(page, y_start, y_end), y_start, y_end) for y_start, y_end in zip(bounds, bounds[1:])]
+            
+        except Exception as e:
+            logger.error(f"خطأ في التقسيم: {e}")
+            return []
+    
+    def estimate_memory(self, image_bytes):
+        """تقدير أقصى ذاكرة هتتحجز لفك الصفحة وأجزائها، من الـ header بس"""
+        try:
+            img = Image.open(io.BytesIO(image_bytes))
+        except Exception:
+            return len(image_bytes)
+        width, height = img.size
+        pixels = width * height
+        # Pillow بيخزن أي mode فيه أكتر من قناة (RGB و RGBA و LA) بـ 4 bytes للبكسل
+        pixel_bytes = 4 if len(img.getbands()) > 1 else 1
+        strips = self.max_concurrency * width * self.part_height * 4  # الأجزاء اللي بتتضغط في نفس الوقت
+        if not self.low_memory:
+            # الصفحة الملونة + قصاصات الأجزاء كلها
+            return len(image_bytes) + pixels * 4 * 2 + strips
+        factor = 1
+        while width // (factor * 2) >= self.max_decode_width:
+            factor *= 2
+        gray = (width // factor) * (height // factor)
+        if img.format == 'JPEG':
+            # JPEG بيتفك رمادي ومصغر على طول
+            decoded = gray
+        elif img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            # الصفحة + نسخة LA (4 bytes) + الخلفية البيضا وقناتين L من open_page
+            decoded = pixels * (pixel_bytes + 4 + 3) + gray
+        else:
+            # الصفحة كاملة + ناتج convert('L') بالحجم الكامل قبل التصغير
+            decoded = pixels * pixel_bytes + (pixels if pixel_bytes > 1 else 0) + gray
+        return len(image_bytes) + decoded + strips
+    
+    def prepare_parts(self, image_bytes, seen=None, fingerprint=False):
+        """تقسيم الصورة وفرز الأجزاء، الخطوة دي كلها بتتنفذ في الـ worker pool
+        
+        fingerprint: كمان بصمة الصفحة للكاش (page_hash) من نفس الفك الرمادي، فمفيش فك تاني
+        برا حجز الميزانية. بيرجع (الأجزاء، العدد، الفاضية، المكررة، البصمة أو None).
+        """
+        page_fingerprint = None
+        if self.low_memory:
+            try:
+                page = self.open_page(image_bytes)
+            except Exception as e:
+                logger.error(f"خطأ في التقسيم: {e}")
+                return [], 0, 0, 0, None
+            if fingerprint:
+                page_fingerprint = self.page_hash(page)
+            parts = self.split_page(image_bytes, page)
+            del page
+        else:
+            if fingerprint:
+                try:
+                    page_fingerprint = self.page_hash(self.open_page(image_bytes))
+                except Exception as e:
+                    logger.error(f"خطأ في هاش الصورة: {e}")
+            parts = self.split_image(image_bytes)
+        blank = duplicate = 0
+        total = len(parts)
+        if parts and self.triage:
+            parts, blank, duplicate = self.triage_parts(parts, seen)
+        return parts, total, blank, duplicate, page_fingerprint
+    
     def compress_part(self, image):
         """ضغط جزء واحد"""
         try:
@@ -58,113 +362,432 @@ class OCREngine:
                 rgb.paste(image, mask=image.split()[3])
                 image = rgb
             
-            # ضغط الجودة
-            quality = 85
-            output = io.BytesIO()
+            elif image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
             
-            while True:
-                output.seek(0)
-                output.truncate()
-                image.save(output, format='JPEG', quality=quality)
-                size_kb = output.tell() / 1024
-                
-                if size_kb <= self.max_size_kb or quality <= 30:
-                    break
-                    
-                quality -= 10
+            if self.preprocess:
+                # المصفوفة بتتاخد من الجزء على طول، والناتج الأبيض والأسود بيروح للـ encoder من غير PNG
+                gray = np.asarray(image if image.mode == 'L' else image.convert('L'))
+                image = Image.fromarray(ImageProcessor.binarize(gray))
+                del gray
             
-            logger.info(f"📦 حجم الجزء بعد الضغط: {size_kb:.0f}KB")
-            return output.getvalue(), size_kb
+            # ضغط بيستهدف الحجم مباشرة بدل ما ينزل الجودة 10 بـ 10
+            result = encode_to_budget(image, int(self.max_size_kb * 1024))
+            size_kb = result.nbytes / 1024
+            
+            logger.info(
+                f"📦 حجم الجزء بعد الضغط: {size_kb:.0f}KB "
+                f"(جودة {result.quality}، {result.encodes} ضغطة)"
+            )
+            # الـ BytesIO نفسه بيرجع (مش getvalue) عشان الرفع ياخد memoryview منه من غير نسخة
+            return result.buffer, size_kb, result.encodes
             
         except Exception as e:
             logger.error(f"خطأ في الضغط: {e}")
-            return None, 0
+            return None, 0, 0
+    
+    async def extract_part(self, part_bytes, part_num, total_parts, deadline=None, stats=None):
+        """استخراج النص من جزء واحد بالمحرك اللي الـ router يختاره، ولو فشل بالمحرك اللي بعده
+        
+        الجزء اللي فشل في كل المحركات بيتسجل في stats['missing']، واللي نجح بيتسجل المحرك
+        اللي قراه في stats['backends'] (رقم الجزء -> اسم المحرك).
+        """
+        deadline = deadline or time.monotonic() + self.job_deadline
+        backends = self.router.order()
+        for n, backend in enumerate(backends):
+            # لو في محرك بعده ومعروف وقته، المحرك ده بيسيب الجزء لو الاستنى (مفتاح متوقف أو backoff) أطول منه
+            fallback_after = self.router.expected_time(backends[n + 1]) if n < len(backends) - 1 else None
+            started = time.monotonic()
+            ok, text = await backend.recognize(part_bytes, part_num, total_parts, deadline, fallback_after)
+            elapsed = time.monotonic() - started
+            self.metrics.observe(f'ocr_{backend.name}', elapsed)
+            self.metrics.inc('ocr_backend_total', backend=backend.name, result='ok' if ok else 'failed')
+            self.router.report(backend, ok, elapsed, fallback=n > 0)
+            if ok:
+                if stats is not None:
+                    stats.setdefault('backends', {})[part_num] = backend.name
+                return text
+            if n < len(backends) - 1 and time.monotonic() < deadline:
+                logger.info(f"↪️ الجزء {part_num}: {backend.name} فشل، بنجرب {backends[n + 1].name}")
+        
+        logger.warning(f"⚠️ الجزء {part_num}/{total_parts} ما اتقراش")
+        if stats is not None:
+            stats.setdefault('missing', []).append(part_num)
+        return None
+    
+    async def extract_remote(self, part_bytes, part_num, total_parts, deadline, fallback_after=None):
+        """OCR.Space لجزء واحد مع إعادة المحاولة لحد الـ deadline، وبيرجع (نجح؟، النص)
+        
+        fallback_after: الوقت المتوقع على المحرك الاحتياطي، ولو الاستنى قبل المحاولة الجاية
+        (إيقاف المفاتيح أو الـ backoff) هياخد أكتر منه بيرجع فشل على طول.
+        """
+        # throttle بيعدي على المفتاح اللي بعده، فمسموحله محاولات زيادة بعدد المفاتيح
+        attempts = self.max_retries + 1 + len(self.keys)
+        errors = 0
+        for attempt in range(attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            outcome, text = await self._attempt(part_bytes, part_num, total_parts, min(self.request_timeout, remaining))
+            if outcome == 'ok':
+                return True, text
+            if outcome == 'rejected':
+                # مفتاح غلط أو اتلغى: الاستنى والإعادة مش هيفرقوا
+                break
+            if outcome == 'throttled' and fallback_after is not None and self.keys.resume_in() > fallback_after:
+                break
+            if outcome == 'error':
+                errors += 1
+                if errors > self.max_retries:
+                    break
+                # exponential backoff مع jitter عشان الأجزاء اللي فشلت مع بعض ما ترجعش مع بعض
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (errors - 1)))
+                if time.monotonic() + delay >= deadline:
+                    break
+                if fallback_after is not None and delay + self.typical_latency() > fallback_after:
+                    break
+                logger.info(f"🔁 إعادة الجزء {part_num} بعد {delay:.1f} ث (محاولة {errors + 1})")
+                await asyncio.sleep(delay)
+        return False, None
+    
+    async def _attempt(self, part_bytes, part_num, total_parts, timeout):
+        """محاولة واحدة، ولو الـ hedging شغال وطولت عن p95 بيتبعت طلب تاني ونخد أول رد ناجح"""
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout:
+            return await self._request(part_bytes, part_num, total_parts, timeout)
+        
+        # العداد بيبدأ من وقت ما الطلب الأول يتبعت فعلاً، مش من وقت ما دخل الـ limiter
+        sent = asyncio.Event()
+        first = asyncio.create_task(self._request(part_bytes, part_num, total_parts, timeout, sent=sent))
+        waiter = asyncio.create_task(sent.wait())
+        tasks = {first}
+        try:
+            await asyncio.wait([first, waiter], return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedged += 1
+                logger.info(f"🏇 الجزء {part_num} عدى {delay:.1f} ث، طلب تاني بالتوازي")
+                # الطلب التاني ما بيستناش دور في الـ limiter (الأول لسه ماسك مكانه) بس بياخد token من مفتاح
+                tasks.add(asyncio.create_task(self._request(part_bytes, part_num, total_parts, timeout - delay, limited=False)))
+            result = ('error', None)
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result[0] == 'ok':
+                        return result
+            return result
+        finally:
+            waiter.cancel()
+            for task in tasks:
+                task.cancel()
     
-    async def extract_part(self, part_bytes, part_num, total_parts):
-        """استخراج النص من جزء واحد"""
+    async def _request(self, part_bytes, part_num, total_parts, timeout, limited=True, sent=None):
+        """طلب واحد بمفتاح من الـ pool وتحت حد التزامن المتكيف، وبيرجع (outcome, النص)"""
+        queued = time.monotonic()
+        if limited:
+            await self.limiter.acquire()
+        outcome = 'cancelled'
         try:
-            encoded = base64.b64encode(part_bytes).decode('utf-8')
+            key = await self.keys.acquire()
+            if sent:
+                sent.set()
+            started = time.monotonic()
+            # وقت الاستنى على الـ limiter والمفاتيح لوحده عن وقت الطلب نفسه
+            self.metrics.observe('ocr_wait', started - queued)
+            self.metrics.count_bytes('out', 'ocr', len(part_bytes))
+            outcome, text, retry_after = await self._post_part(part_bytes, key.key, part_num, total_parts, timeout)
+            elapsed = time.monotonic() - started
+            self.metrics.observe('ocr_request', elapsed)
+            self.metrics.inc('ocr_requests_total', outcome=outcome)
+            self.keys.report(key, outcome, retry_after)
+            if outcome == 'ok':
+                self.latencies.append(elapsed)
+                if text:
+                    self.metrics.count_bytes('in', 'ocr', len(text.encode('utf-8')))
+            return outcome, text
+        finally:
+            if limited:
+                await self.limiter.release(outcome)
+    
+    def typical_latency(self):
+        """الوسيط لأوقات الطلبات الناجحة الأخيرة"""
+        if not self.latencies:
+            return 0.0
+        return sorted(self.latencies)[len(self.latencies) // 2]
+    
+    def hedge_delay(self):
+        """p95 لأوقات الطلبات الناجحة الأخيرة (None = الـ hedging مقفول أو لسه مفيش عينات كفاية)"""
+        if not self.hedge or len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95)]
+    
+    async def _post_part(self, part_bytes, api_key, part_num, total_parts, timeout=60):
+        """طلب OCR واحد، وبيرجع (outcome, النص، Retry-After)"""
+        try:
+            data = self.build_form(part_bytes, api_key, part_num)
             
-            # ✅ إزالة parameter language تماماً
-            data = {
-                'apikey': self.api_key,
-                'base64Image': f'data:image/jpeg;base64,{encoded}',
-                'OCREngine': '2',  # أفضل محرك
-                'isOverlayRequired': False,
-                'detectOrientation': True,
-                'scale': True,
-                'filetype': 'JPG'
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.url, data=data, timeout=60) as resp:
-                    result = await resp.json()
-                    
-                    if result.get('IsErroredOnProcessing'):
-                        error_msg = result.get('ErrorMessage', '')
-                        logger.error(f"الجزء {part_num} خطأ: {error_msg}")
-                        
-                        # إذا كان الخطأ بسبب المفتاح، جرب بدون محرك
-                        if "apikey" in error_msg.lower():
-                            logger.error("❌ مفتاح OCR.Space غير صالح!")
-                        return None
-                    
-                    text = ""
-                    for parsed in result.get('ParsedResults', []):
-                        text += parsed.get('ParsedText', '')
-                    
-                    if text:
-                        lines = [line.strip() for line in text.split('\n') if line.strip()]
-                        clean_text = '\n'.join(lines)
-                        logger.info(f"✅ الجزء {part_num}/{total_parts}: {len(clean_text)} حرف")
-                        return clean_text
+            session = await self.http.get_session()
+            async with session.post(self.url, data=data, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                retry_after = self.retry_after(resp.headers.get('Retry-After'))
+                try:
+                    result = await resp.json(content_type=None)
+                except ValueError:
+                    # OCR.Space بيرد أحياناً بنص عادي مع 403 لما المفتاح يخلص حصته
+                    result = {'IsErroredOnProcessing': True, 'ErrorMessage': await resp.text()}
+                
+                if resp.status in (403, 429) or result.get('IsErroredOnProcessing'):
+                    error_msg = result.get('ErrorMessage', '')
+                    if isinstance(error_msg, list):
+                        error_msg = ' '.join(error_msg)
                     
-                    return None
+                    # الإيقاف للـ 429 ورسالة الحصة بس، أما 403 التاني فالمفتاح نفسه مرفوض
+                    if resp.status == 429 or self.is_rate_limited(error_msg):
+                        logger.warning(f"الجزء {part_num} اتعمله throttle: {error_msg[:100]}")
+                        return 'throttled', None, retry_after
                     
+                    logger.error(f"الجزء {part_num} خطأ: {error_msg}")
+                    if resp.status == 403 or "apikey" in error_msg.lower():
+                        logger.error("❌ مفتاح OCR.Space غير صالح!")
+                        return 'rejected', None, None
+                    return 'error', None, None
+                
+                if resp.status >= 500:
+                    logger.error(f"الجزء {part_num} خطأ: HTTP {resp.status}")
+                    return 'error', None, None
+                
+                text = ""
+                for parsed in result.get('ParsedResults', []):
+                    text += parsed.get('ParsedText', '')
+                
+                if text:
+                    lines = [line.strip() for line in text.split('\n') if line.strip()]
+                    clean_text = '\n'.join(lines)
+                    logger.info(f"✅ الجزء {part_num}/{total_parts}: {len(clean_text)} حرف")
+                    return 'ok', clean_text, None
+                
+                return 'ok', None, None
+                
+        except asyncio.TimeoutError:
+            logger.error(f"الجزء {part_num} خطأ: مهلة {timeout:.0f} ث خلصت")
+            return 'error', None, None
         except Exception as e:
             logger.error(f"الجزء {part_num} خطأ: {e}")
+            return 'error', None, None
+    
+    def build_form(self, part_bytes, api_key, part_num):
+        """جسم طلب OCR.Space: multipart بالـ JPEG نفسه، أو base64 في data URI زي الأول"""
+        # ✅ إزالة parameter language تماماً
+        fields = {
+            'apikey': api_key or '',
+            'OCREngine': '2',  # أفضل محرك
+            'isOverlayRequired': 'false',
+            'detectOrientation': 'true',
+            'scale': 'true',
+            'filetype': 'JPG'
+        }
+        
+        if self.upload_mode == 'base64':
+            encoded = base64.b64encode(part_bytes).decode('utf-8')
+            fields['base64Image'] = f'data:image/jpeg;base64,{encoded}'
+            return fields
+        
+        # الـ memoryview بيتكتب على الـ socket زي ما هو، من غير base64 ولا نسخة bytes
+        form = aiohttp.FormData()
+        for name, value in fields.items():
+            form.add_field(name, value)
+        form.add_field('file', part_bytes, filename=f'part{part_num}.jpg', content_type='image/jpeg')
+        return form
+    
+    @staticmethod
+    def is_rate_limited(error_msg):
+        """رسالة OCR.Space لما الحصة تخلص: 'You may only perform this action upto maximum N number of times...'"""
+        message = error_msg.lower()
+        return 'maximum' in message and 'times' in message or 'rate limit' in message
+    
+    @staticmethod
+    def retry_after(value):
+        try:
+            return float(value) if value else None
+        except ValueError:
             return None
     
-    async def extract_text(self, image_bytes):
+    async def _compress(self, part, stats):
+        """ضغط جزء في الـ pool وتسجيل عدد الضغطات في إحصائيات الشغلانة"""
+        # الـ PageStrip بيتقص هنا، فمفيش غير الأجزاء اللي بتتضغط دلوقتي في الذاكرة
+        if isinstance(part, PageStrip):
+            part = part.load()
+        with self.metrics.time('compress'):
+            buffer, size_kb, encodes = await self.run_cpu(self.compress_part, part)
+        del part
+        if stats is not None:
+            stats['encodes'] = stats.get('encodes', 0) + encodes
+        return (buffer.getbuffer() if buffer else None), size_kb
+    
+    async def _until_deadline(self, coro, deadline, part_num, stats):
+        """تشغيل الجزء لحد الـ deadline، ولو خلصت المهلة (حتى وهو مستني مفتاح) بيتسجل ناقص"""
         try:
-            # تقسيم الصورة
-            parts = self.split_image(image_bytes)
+            return await asyncio.wait_for(coro, max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ الجزء {part_num} ما خلصش قبل مهلة الصفحة")
+            if stats is not None and part_num not in stats.get('missing', []):
+                stats.setdefault('missing', []).append(part_num)
+            return None
+    
+    async def _iter_parts_sequential(self, parts, deadline, stats=None):
+        """استخراج النص من الأجزاء واحد ورا التاني"""
+        for i, (part, y_start, y_end) in enumerate(parts, 1):
+            logger.info(f"🔄 معالجة الجزء {i}/{len(parts)}")
             
-            if not parts:
-                return None
+            # ضغط الجزء
+            part_bytes, size_kb = await self._compress(part, stats)
+            if part_bytes:
+                # استخراج النص
+                # الإيقاع بين الطلبات بيتحدد من token bucket المفتاح
+                text = await self._until_deadline(self.extract_part(part_bytes, i, len(parts), deadline, stats), deadline, i, stats)
+                if text:
+                    yield text
+    
+    async def _iter_parts_concurrent(self, parts, deadline, stats=None):
+        """استخراج النص من كذا جزء في نفس الوقت بحد أقصى max_concurrency، وطلوعه بالترتيب"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        total = len(parts)
+        
+        async def run(i, part):
+            async with semaphore:
+                logger.info(f"🔄 معالجة الجزء {i}/{total}")
+                part_bytes, size_kb = await self._compress(part, stats)
+                if not part_bytes:
+                    return None
+                return await self.extract_part(part_bytes, i, total, deadline, stats)
+        
+        # ترتيب الأجزاء حسب y_start عشان النص يرجع بنفس ترتيب الصفحة
+        ordered = sorted(parts, key=lambda p: p[1])
+        tasks = [asyncio.create_task(run(i, part)) for i, (part, y_start, y_end) in enumerate(ordered, 1)]
+        try:
+            # الجزء N بيطلع أول ما يخلص هو واللي قبله، والباقيين لسه شغالين
+            for i, task in enumerate(tasks, 1):
+                text = await self._until_deadline(task, deadline, i, stats)
+                if text:
+                    yield text
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def page_hash(self, page):
+        """(الهاش الإدراكي، الأبعاد، الـ thumbnail اللي بيأكد الشبه) من الصفحة الرمادي بتاعة open_page
+        
+        الهاش بيتحسب من الـ thumbnail نفسه عشان الصفحة الكبيرة ما تتصغرش مرتين.
+        """
+        thumb = thumbnail(page, OCRCache.THUMB_WIDTH)
+        return dhash(Image.fromarray(thumb), OCRCache.HASH_WIDTH, OCRCache.HASH_HEIGHT), page.size, thumb
+    
+    async def extract_text(self, image_bytes, stats=None, seen=None):
+        """استخراج النص من الصورة، و stats (dict اختياري) بيتملي بإحصائيات الشغلانة"""
+        all_text = [text async for text in self.iter_text(image_bytes, stats, seen)]
+        
+        # دمج النصوص
+        if all_text:
+            final_text = PART_SEPARATOR.join(all_text)
+            logger.info(f"✅ تم استخراج {len(final_text)} حرف من {len(all_text)} أجزاء")
+            return final_text
+        
+        return None
+    
+    async def iter_text(self, image_bytes, stats=None, seen=None):
+        """async generator بيطلع نص كل جزء أول ما يجهز، بنفس ترتيب الصفحة
+
+        seen (list اختيارية) بصمات الأجزاء اللي اتبعتت من صفحات تانية في نفس الفصل، فالجزء
+        المتكرر بينها بيتقري مرة واحدة. مع WORKER_POOL_KIND=process الـ list بتتنسخ للـ process
+        فالتكرار بيتشال جوه الصفحة بس.
+        """
+        sha = None
+        if self.cache:
+            # البحث في الكاش بالمحتوى هنا، والبحث بالشبه بعد الفك جوه _iter_text
+            sha = content_hash(image_bytes)
+            cached = await self.cache_call(self.cache.get, sha)
+            if cached is not None:
+                self.metrics.inc('ocr_cache_total', result='hit')
+                logger.info(f"⚡ النتيجة من الكاش: {len(cached)} حرف")
+                for text in cached.split(PART_SEPARATOR):
+                    yield text
+                return
+        
+        stats = stats if stats is not None else {}
+        async for text in self._iter_text(image_bytes, stats, seen, sha):
+            yield text
+    
+    async def _iter_text(self, image_bytes, stats=None, seen=None, sha=None):
+        """الفك والتقسيم والـ OCR جوه حجز الميزانية، ومع sha (الكاش شغال) البحث بالشبه والحفظ كمان"""
+        # الصفحة بتستنى لحد ما حجمها المتوقع بعد الفك يدخل في الميزانية المشتركة
+        reserved = self.estimate_memory(image_bytes) if self.budget else 0
+        if reserved:
+            with self.metrics.time('memory_wait'):
+                await self.budget.acquire(reserved)
+        started = time.monotonic()
+        try:
+            # تقسيم الصورة وتخطي الأجزاء الفاضية والمكررة قبل ما نصرف عليها طلبات
+            with self.metrics.time('split'):
+                parts, total, blank, duplicate, fingerprint = await self.run_cpu(
+                    self.prepare_parts, image_bytes, seen, sha is not None
+                )
+            
+            if sha is not None:
+                # البصمة من نفس الفك اللي اتقسم، جوه الميزانية
+                cached = await self.cache_call(self.cache.get_similar, *fingerprint) if fingerprint else None
+                self.metrics.inc('ocr_cache_total', result='miss' if cached is None else 'hit')
+                if cached is not None:
+                    logger.info(f"⚡ النتيجة من الكاش (صفحة مشابهة): {len(cached)} حرف")
+                    for text in cached.split(PART_SEPARATOR):
+                        yield text
+                    return
             
-            # لو جزء واحد فقط
-            if len(parts) == 1:
-                part_bytes, size = self.compress_part(parts[0][0])
-                if part_bytes:
-                    return await self.extract_part(part_bytes, 1, 1)
+            self.api_calls_avoided += blank + duplicate
+            self.metrics.inc('ocr_strips_total', total - blank - duplicate, result='sent')
+            self.metrics.inc('ocr_strips_total', blank, result='blank')
+            self.metrics.inc('ocr_strips_total', duplicate, result='duplicate')
+            if stats is not None:
+                stats['strips'] = total
+                stats['skipped_blank'] = blank
+                stats['skipped_duplicate'] = duplicate
+                stats['api_calls_avoided'] = blank + duplicate
+            
+            if not parts:
+                return
             
             # استخراج النص من كل جزء
+            # مهلة الصفحة كلها: الأجزاء اللي ما خلصتش قبلها بتتسجل في stats['missing']
+            deadline = time.monotonic() + self.job_deadline
+            if self.max_concurrency > 1:
+                pieces = self._iter_parts_concurrent(parts, deadline, stats)
+            else:
+                pieces = self._iter_parts_sequential(parts, deadline, stats)
             all_text = []
-            for i, (part, y_start, y_end) in enumerate(parts, 1):
-                logger.info(f"🔄 معالجة الجزء {i}/{len(parts)}")
-                
-                # ضغط الجزء
-                part_bytes, size_kb = self.compress_part(part)
-                if not part_bytes:
-                    continue
-                
-                # استخراج النص
-                text = await self.extract_part(part_bytes, i, len(parts))
-                if text:
-                    all_text.append(text)
-                
-                # انتظار بين الأجزاء
-                await asyncio.sleep(1)
+            async for text in pieces:
+                all_text.append(text)
+                yield text
             
-            # دمج النصوص
-            if all_text:
-                final_text = '\n\n---\n\n'.join(all_text)
-                logger.info(f"✅ تم استخراج {len(final_text)} حرف من {len(parts)} أجزاء")
-                return final_text
-            
-            return None
+            # النتيجة الناقصة ما تتحفظش عشان المرة الجاية تتقري كاملة، ولا الصفحة اللي اتشال منها
+            # جزء لأنه اتقري في صفحة تانية من الفصل، ولا اللي فيها جزء اتقرا بالمحرك الاحتياطي
+            # (قراءته أضعف، والمرة الجاية ممكن المحرك الأساسي يبقى متاح)
+            shared_skip = seen is not None and stats.get('skipped_duplicate')
+            fallback = any(name != self.router.primary for name in stats.get('backends', {}).values())
+            if sha is not None and all_text and not stats.get('missing') and not shared_skip and not fallback:
+                phash, size, thumb = fingerprint or (None, (0, 0), None)
+                await self.cache_call(self.cache.put, sha, PART_SEPARATOR.join(all_text), phash, size, thumb)
             
         except Exception as e:
             logger.error(f"OCR خطأ: {e}")
-            return None
+        finally:
+            # OCR الصفحة كلها من بعد الميزانية لحد آخر جزء
+            self.metrics.observe('ocr', time.monotonic() - started)
+            if reserved:
+                await self.budget.release(reserved)
+    
+    async def close(self):
+        self.router.close()
+        if self.cache_thread:
+            self.cache_thread.close()
+        if self._own_http:
+            await self.http.close()
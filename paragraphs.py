@@ -0,0 +1,83 @@
+import re
+from itertools import zip_longest
+
+# نهاية جملة أو سطر: نفس فواصل التقسيم القديمة ('\n\n' بتنتهي بـ '\n' أصلاً)
+BOUNDARY = re.compile(r'[\n。！？]|(?<=[.!?]) ')
+
+
+def _split_long(paragraph, max_length):
+    """تقسيم فقرة أطول من max_length على الكلمات"""
+    parts = []
+    temp = ""
+    for word in paragraph.split():
+        if len(temp) + len(word) < max_length:
+            temp += " " + word
+        else:
+            if temp:
+                parts.append(temp.strip())
+            temp = word
+    if temp:
+        parts.append(temp.strip())
+    return parts
+
+
+def split_into_paragraphs(text, max_length=1500, min_length=50):
+    """تقسيم النص إلى فقرات مترابطة في لفة واحدة على أماكن الفواصل"""
+    if not text:
+        return []
+    
+    paragraphs = []
+    start = 0
+    for match in BOUNDARY.finditer(text):
+        end = match.end()
+        # الفقرة بتتقفل عند أول فاصل بعد ما تعدي min_length حرف
+        if end - start > min_length:
+            paragraph = text[start:end]
+            if len(paragraph) > max_length:
+                paragraphs.extend(_split_long(paragraph, max_length))
+            else:
+                paragraphs.append(paragraph.strip())
+            start = end
+    
+    if start < len(text):
+        paragraphs.append(text[start:].strip())
+    
+    return paragraphs
+
+
+def _group_by_position(originals, translations):
+    """ربط كل فقرة مترجمة بالفقرة الأصلية اللي في نفس المكان النسبي من الجزء"""
+    total_original = sum(len(p) for p in originals) or 1
+    ends = []
+    position = 0
+    for paragraph in originals:
+        position += len(paragraph)
+        ends.append(position / total_original)
+    
+    groups = [[] for _ in originals]
+    total_translated = sum(len(p) for p in translations) or 1
+    position = 0
+    for paragraph in translations:
+        middle = (position + len(paragraph) / 2) / total_translated
+        index = next((i for i, end in enumerate(ends) if middle <= end), len(originals) - 1)
+        groups[index].append(paragraph)
+        position += len(paragraph)
+    
+    return [(original, ' '.join(group)) for original, group in zip(originals, groups)]
+
+
+def align_paragraphs(original_segments, translated_segments, max_length=1500):
+    """أزواج (فقرة أصلية، ترجمتها) من غير ما الترجمة تزحف من جزء لجزء
+
+    كل جزء (strip) بيتقسم لوحده: لو عدد الفقرات في الأصل والترجمة واحد
+    بيتربطوا بالترتيب، وإلا بالمكان النسبي جوه الجزء.
+    """
+    pairs = []
+    for original, translated in zip_longest(original_segments, translated_segments, fillvalue=''):
+        originals = split_into_paragraphs(original, max_length)
+        translations = split_into_paragraphs(translated or '', max_length)
+        if len(originals) == len(translations) or not originals or not translations:
+            pairs.extend(zip_longest(originals, translations, fillvalue=''))
+        else:
+            pairs.extend(_group_by_position(originals, translations))
+    return pairs
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from config import (
+    SUPPORTED_FORMATS, MAX_IMAGE_SIZE, MAX_IMAGE_DIMENSION, OCR_CACHE_PATH, OCR_CACHE_MEMORY_MB,
+    TRANSLATION_MEMORY_PATH, TRANSLATION_MEMORY_MAX_ENTRIES, WORKER_POOL_KIND, WORKER_POOL_SIZE,
+    MEMORY_BUDGET_MB, METRICS_WINDOW, CHAPTER_PAGE_CONCURRENCY, OCR_API_KEYS, OCR_KEY_RATE, OCR_KEY_BURST,
+)
+from downloader import DownloadError, ImageDownloader
+from http_client import HttpClient
+from memory_budget import MemoryBudget
+from metrics import Metrics
+from ocr_cache import OCRCache, content_hash
+from ocr_engine import OCREngine, PART_SEPARATOR
+from paragraphs import align_paragraphs
+from rate_limiter import KeyPool
+from translation_memory import TranslationMemory
+from translator_engine import TranslatorEngine
+from worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# رسائل فشل التحميل حسب السبب
+DOWNLOAD_ERRORS = {
+    'too_large': f"الحجم أكبر من {MAX_IMAGE_SIZE // (1024 * 1024)} ميجا",
+    'dimensions': f"الأبعاد أكبر من {MAX_IMAGE_DIMENSION} بكسل",
+    'unsupported': "الملف مش صورة مدعومة",
+    'http': "الرابط مش متاح",
+    'network': "مشكلة في الاتصال، جرب تاني",
+}
+
+
+class Pipeline:
+    """تحميل ← OCR ← ترجمة لصورة واحدة من غير Discord، بيستخدمه البوت والـ workers
+
+    النتيجة dict بيتحول JSON: status (ok أو download_failed أو no_text أو translate_failed)
+    ومعاه النص الأصلي والأزواج (الأصل، الترجمة) وإحصائيات OCR.
+
+    share نصيب الـ Pipeline ده من حد المفاتيح وميزانية الذاكرة، لما كذا worker process
+    شغالين على نفس المفاتيح والجهاز (1 / عدد الـ workers).
+    """
+
+    def __init__(self, metrics=None, share=1.0):
+        self.metrics = metrics or Metrics(window=METRICS_WINDOW)
+        # جلسة HTTP واحدة لكل الـ engines
+        self.http_client = HttpClient()
+        self.ocr_cache = OCRCache(OCR_CACHE_PATH, max_memory_bytes=OCR_CACHE_MEMORY_MB * 1024 * 1024) if OCR_CACHE_PATH else None
+        self.downloader = ImageDownloader(MAX_IMAGE_SIZE, MAX_IMAGE_DIMENSION, SUPPORTED_FORMATS, http=self.http_client)
+        self.pool = WorkerPool(WORKER_POOL_KIND, WORKER_POOL_SIZE)
+        self.memory_budget = MemoryBudget(int(MEMORY_BUDGET_MB * 1024 * 1024 * share))
+        # الـ burst أقل حاجة 1، فمع workers أكتر من الـ burst المجموع بيعدي الـ burst شوية (الـ rate مظبوط)
+        keys = KeyPool(OCR_API_KEYS, OCR_KEY_RATE * share, max(1, round(OCR_KEY_BURST * share)))
+        self.ocr = OCREngine(cache=self.ocr_cache, pool=self.pool, http=self.http_client, keys=keys, budget=self.memory_budget, metrics=self.metrics)
+        self.translation_memory = TranslationMemory(TRANSLATION_MEMORY_PATH, max_entries=TRANSLATION_MEMORY_MAX_ENTRIES) if TRANSLATION_MEMORY_PATH else None
+        self.translator = TranslatorEngine(memory=self.translation_memory, http=self.http_client, metrics=self.metrics)
+
+    async def download(self, url):
+        """تحميل الصورة على أجزاء، وبيرجع (data, size_mb, رسالة الخطأ)"""
+        try:
+            with self.metrics.time('download'):
+                data, info = await self.downloader.download(url)
+            self.metrics.count_bytes('in', 'download', info['bytes'])
+            return data, info['bytes'] / (1024 * 1024), None
+        except DownloadError as e:
+            logger.warning(f"رفض التحميل ({e.code}): {e}")
+            return None, 0, DOWNLOAD_ERRORS.get(e.code, DOWNLOAD_ERRORS['network'])
+        except Exception as e:
+            logger.error(f"خطأ في التحميل: {e}")
+            return None, 0, DOWNLOAD_ERRORS['network']
+
+    async def translate_image(self, img_bytes, progress=None):
+        """OCR للصورة وترجمة كل جزء لوحده عشان الأصل يترتبط بالترجمة على حدود الأجزاء"""
+        ocr_stats = {}
+        original = await self.ocr.extract_text(img_bytes, stats=ocr_stats)
+        if not original:
+            return {'status': 'no_text', 'ocr_stats': ocr_stats}
+
+        if progress:
+            await progress("🌐 **جاري الترجمة (قد تستغرق دقيقة)...**")
+
+        segments = original.split(PART_SEPARATOR)
+        translated_segments = await self.translator.translate_segments(segments)
+        if not any(translated_segments):
+            return {'status': 'translate_failed', 'ocr_stats': ocr_stats}
+
+        return {
+            'status': 'ok',
+            'original': original,
+            'pairs': align_paragraphs(segments, translated_segments),
+            'ocr_stats': ocr_stats,
+        }
+
+    async def run(self, url, ext, progress=None):
+        """الشغلانة كلها من الرابط للنتيجة (مسار الـ worker)"""
+        img_bytes, size_mb, error = await self.download(url)
+        if not img_bytes:
+            return {'status': 'download_failed', 'error': error}
+
+        if progress:
+            await progress("🔍 **OCR.Space بتحليل الصورة...**")
+        result = await self.translate_image(img_bytes, progress)
+        result.update(size_mb=size_mb, ext=ext)
+        return result
+
+    async def run_chapter(self, pages, progress=None, concurrency=CHAPTER_PAGE_CONCURRENCY):
+        """فصل كامل كشغلانة واحدة: pages هي [(url, ext)] بالترتيب
+
+        كل صفحة بتعدي تحميل ← OCR ← ترجمة لوحدها، و concurrency صفحات في نفس الوقت. الحاجات
+        المشتركة بينهم: اللغة بتتحدد مرة من أول صفحة فيها نص، وبصمات الأجزاء عشان الجزء المتكرر
+        في كذا صفحة (لوجو، credits) يتقري مرة، والصفحة المرفوعة مرتين بتتعالج مرة، والسطر اللي
+        اتكرر بيتترجم مرة.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        seen = []  # بصمات الأجزاء اللي اتقبلت من أي صفحة في الفصل
+        first_copy = {}  # sha الصفحة -> رقم أول نسخة منها
+        translations = {}  # نص الجزء -> task ترجمته
+        lang_lock = asyncio.Lock()
+        source_lang = None
+        results = [None] * len(pages)
+        finished = 0
+
+        async def language(text):
+            nonlocal source_lang
+            async with lang_lock:
+                if source_lang is None:
+                    source_lang = await self.translator.detect_language(text)
+            return source_lang
+
+        def translate_once(segment, lang):
+            # الـ translator نفسه بيحدد عدد الطلبات اللي شغالة في نفس الوقت
+            if segment not in translations:
+                translations[segment] = asyncio.ensure_future(self.translator.translate(segment, lang))
+            return translations[segment]
+
+        async def page(i, url, ext):
+            img_bytes, size_mb, error = await self.download(url)
+            if not img_bytes:
+                return {'status': 'download_failed', 'error': error}
+            sha = content_hash(img_bytes)
+            if sha in first_copy:
+                return {'status': 'duplicate', 'of': first_copy[sha], 'size_mb': size_mb}
+            first_copy[sha] = i
+
+            ocr_stats = {}
+            original = await self.ocr.extract_text(img_bytes, stats=ocr_stats, seen=seen)
+            del img_bytes
+            if not original:
+                return {'status': 'no_text', 'size_mb': size_mb, 'ocr_stats': ocr_stats}
+            segments = original.split(PART_SEPARATOR)
+            lang = await language(original)
+            translated = await asyncio.gather(*(translate_once(segment, lang) for segment in segments))
+            if not any(translated):
+                return {'status': 'translate_failed', 'size_mb': size_mb, 'ocr_stats': ocr_stats}
+            return {
+                'status': 'ok',
+                'original': original,
+                'pairs': align_paragraphs(segments, list(translated)),
+                'size_mb': size_mb,
+                'ext': ext,
+                'ocr_stats': ocr_stats,
+            }
+
+        async def run(i, url, ext):
+            nonlocal finished
+            async with semaphore:
+                try:
+                    result = await page(i, url, ext)
+                except Exception as e:
+                    logger.error(f"الصفحة {i + 1} من الفصل خطأ: {e}")
+                    result = {'status': 'error', 'error': str(e)}
+            result['index'] = i
+            results[i] = result
+            finished += 1
+            if progress:
+                await progress(f"📚 **الفصل: خلص {finished} من {len(pages)} صفحة...**")
+
+        try:
+            await asyncio.gather(*(run(i, url, ext) for i, (url, ext) in enumerate(pages)))
+        finally:
+            for task in translations.values():
+                task.cancel()
+
+        statuses = [r['status'] for r in results]
+        stats = {
+            'pages': len(pages),
+            'strips': sum(r.get('ocr_stats', {}).get('strips', 0) for r in results),
+            'skipped_blank': sum(r.get('ocr_stats', {}).get('skipped_blank', 0) for r in results),
+            'skipped_duplicate': sum(r.get('ocr_stats', {}).get('skipped_duplicate', 0) for r in results),
+            'duplicate_pages': statuses.count('duplicate'),
+            'segments': sum(len(r['pairs']) for r in results if r['status'] == 'ok'),
+            'translated_segments': len(translations),
+            'missing_pages': [r['index'] + 1 for r in results if r.get('ocr_stats', {}).get('missing')],
+        }
+        chapter = {'chapter': True, 'pages': results, 'source_lang': source_lang, 'stats': stats,
+                   'size_mb': sum(r.get('size_mb', 0) for r in results)}
+        if 'ok' in statuses:
+            return dict(chapter, status='ok')
+        # مفيش ولا صفحة نجحت: السبب الأهم للمستخدم
+        for status in ('translate_failed', 'no_text', 'download_failed', 'error'):
+            if status in statuses:
+                return dict(chapter, status=status, error=next((r.get('error') for r in results if r.get('error')), ''))
+        return dict(chapter, status='no_text')
+
+    async def close(self):
+        await self.ocr.close()
+        await self.translator.close()
+        await self.http_client.close()
+        if self.ocr_cache:
+            self.ocr_cache.close()
+        if self.translation_memory:
+            self.translation_memory.close()
+        self.pool.close()
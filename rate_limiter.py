@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """token bucket: rate طلب في الثانية مع burst طلبات ورا بعض"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now=None):
+        """الوقت لحد ما يبقى في token (صفر = متاح دلوقتي)"""
+        now = now or time.monotonic()
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        """إيقاف المفتاح بعد رد rate limit، والـ tokens اللي فاضلة بتتلغي"""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = now
+
+
+class ApiKey:
+    """مفتاح API واحد بالـ bucket بتاعه وعداداته"""
+
+    def __init__(self, key, rate, burst):
+        self.key = key
+        self.bucket = TokenBucket(rate, burst)
+        self.calls = 0
+        self.ok = 0
+        self.throttled = 0
+        self.errors = 0
+
+    @property
+    def label(self):
+        # المفتاح نفسه ما يظهرش في اللوج أو الإحصائيات
+        return f"{self.key[:4]}…" if self.key else "بدون مفتاح"
+
+
+class KeyPool:
+    """مجموعة مفاتيح بتتلف عليها: كل طلب بياخد أول مفتاح عنده token"""
+
+    def __init__(self, keys, rate=1.0, burst=2, throttle_pause=30.0):
+        self.keys = [ApiKey(key, rate, burst) for key in keys] or [ApiKey(None, rate, burst)]
+        self.throttle_pause = throttle_pause  # ثواني الإيقاف لو الرد ما قالش Retry-After
+        self._next = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def has_quota(self):
+        """في مفتاح واحد على الأقل مش متوقف بعد throttle"""
+        return self.resume_in() == 0
+
+    def resume_in(self):
+        """الثواني لحد ما أول مفتاح يرجع من الإيقاف (صفر = في مفتاح شغال)"""
+        now = time.monotonic()
+        return max(0.0, min(key.bucket.paused_until for key in self.keys) - now)
+
+    async def acquire(self):
+        """استنى لحد ما مفتاح يبقى متاح وخد منه token"""
+        while True:
+            now = time.monotonic()
+            count = len(self.keys)
+            # بنبدأ من المفتاح اللي بعد آخر واحد اتاخد عشان الاستهلاك يتوزع
+            order = [self.keys[(self._next + i) % count] for i in range(count)]
+            waits = [(key.bucket.wait_time(now), i) for i, key in enumerate(order)]
+            wait, i = min(waits)
+            if wait <= 0:
+                key = order[i]
+                key.bucket.take()
+                key.calls += 1
+                self._next = (self.keys.index(key) + 1) % count
+                return key
+            await asyncio.sleep(wait)
+
+    def report(self, key, outcome, retry_after=None):
+        """تسجيل نتيجة الطلب: ok أو throttled أو error أو rejected (المفتاح مرفوض، بيتحسب خطأ)"""
+        if outcome == 'ok':
+            key.ok += 1
+        elif outcome == 'throttled':
+            key.throttled += 1
+            pause = self.throttle_pause if retry_after is None else max(retry_after, 0.1)
+            key.bucket.pause(pause)
+            logger.warning(f"🚦 المفتاح {key.label} وصل للـ limit، متوقف {pause:.0f} ث")
+        else:
+            key.errors += 1
+
+    def stats(self):
+        now = time.monotonic()
+        return [
+            {
+                'key': key.label,
+                'calls': key.calls,
+                'ok': key.ok,
+                'throttled': key.throttled,
+                'errors': key.errors,
+                'paused': max(0.0, key.bucket.paused_until - now),
+            }
+            for key in self.keys
+        ]
+
+
+class AdaptiveLimiter:
+    """حد تزامن AIMD: بيزيد واحد كل دورة نجاح وبيتقسم على 2 مع أي throttle أو خطأ"""
+
+    def __init__(self, initial, minimum=1, maximum=16, cooldown=1.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.cooldown = cooldown  # أخطاء كتير في نفس اللحظة بتتحسب backoff واحد
+        self.in_flight = 0
+        self.backoffs = 0
+        self._last_backoff = 0.0
+        self._condition = None
+
+    def _get_condition(self):
+        # بيتعمل جوه الـ loop (Python 3.9 بيربط الـ primitives بالـ loop وقت الإنشاء)
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, outcome):
+        """outcome: ok بيزود الحد، throttled أو error بيقلله، وأي حاجة تانية (cancelled، rejected) ما بتغيرش"""
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            if outcome == 'ok':
+                # زيادة جمعية: +1 كل ما limit طلب ينجحوا
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif outcome in ('throttled', 'error'):
+                now = time.monotonic()
+                if now - self._last_backoff >= self.cooldown:
+                    self._last_backoff = now
+                    self.backoffs += 1
+                    self.limit = max(self.minimum, self.limit / 2)
+                    logger.info(f"📉 تقليل تزامن OCR إلى {int(self.limit)}")
+            condition.notify_all()
+
+    def stats(self):
+        return {'limit': int(self.limit), 'in_flight': self.in_flight, 'backoffs': self.backoffs}
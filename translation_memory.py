@@ -0,0 +1,133 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_segment(text):
+    """توحيد المسافات عشان نفس الجملة تاخد نفس المفتاح"""
+    return ' '.join(text.split())
+
+
+class TranslationMemory:
+    """ذاكرة ترجمة لكل سطر: LRU في الذاكرة فوق SQLite على الديسك"""
+    
+    def __init__(self, path, max_entries=100000, max_memory_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        
+        self.memory = OrderedDict()  # (lang, segment) -> translation
+        # last_used للسطور اللي اتقرت من الديسك، بيتكتب مرة واحدة مع put_many أو flush
+        self.touched = {}  # (lang, segment) -> time
+        
+        self.hits = 0
+        self.misses = 0
+        self.chars_saved = 0
+        
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS translation_memory ("
+            "lang TEXT NOT NULL, segment TEXT NOT NULL, translation TEXT NOT NULL, "
+            "last_used REAL, PRIMARY KEY (lang, segment))"
+        )
+        self.db.commit()
+        self.entries = self.db.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+        logger.info(f"🧠 ذاكرة الترجمة: {self.entries} سطر محفوظ")
+    
+    def _remember(self, key, translation):
+        self.memory[key] = translation
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+    
+    def get(self, lang, segment):
+        key = (lang, segment)
+        with self._lock:
+            translation = self.memory.get(key)
+            if translation is not None:
+                self.memory.move_to_end(key)
+            else:
+                row = self.db.execute(
+                    "SELECT translation FROM translation_memory WHERE lang = ? AND segment = ?", key
+                ).fetchone()
+                if row:
+                    translation = row[0]
+                    self.touched[key] = time.time()
+                    self._remember(key, translation)
+            
+            if translation is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.chars_saved += len(segment)
+            return translation
+    
+    def get_many(self, lang, segments):
+        """get لكذا سطر مرة واحدة، وبيرجع dict للي اتلاقى بس"""
+        found = {}
+        for segment in segments:
+            translation = self.get(lang, segment)
+            if translation is not None:
+                found[segment] = translation
+        return found
+    
+    def _flush_touched(self):
+        if self.touched:
+            self.db.executemany(
+                "UPDATE translation_memory SET last_used = ? WHERE lang = ? AND segment = ?",
+                [(used, lang, segment) for (lang, segment), used in self.touched.items()]
+            )
+            self.touched.clear()
+    
+    def flush(self):
+        """كتابة last_used المتأجل على الديسك"""
+        with self._lock:
+            self._flush_touched()
+            self.db.commit()
+    
+    def put_many(self, lang, pairs):
+        """حفظ مجموعة (سطر، ترجمة) مرة واحدة، ومعاها last_used المتأجل في نفس الـ commit"""
+        if not pairs:
+            if self.touched:
+                self.flush()
+            return
+        now = time.time()
+        with self._lock:
+            self._flush_touched()
+            self.db.executemany(
+                "INSERT OR REPLACE INTO translation_memory (lang, segment, translation, last_used) VALUES (?, ?, ?, ?)",
+                [(lang, segment, translation, now) for segment, translation in pairs]
+            )
+            for segment, translation in pairs:
+                self._remember((lang, segment), translation)
+            
+            self.entries = self.db.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+            # طرد الأقدم استخداماً لو عدينا الحد
+            if self.entries > self.max_entries:
+                self.db.execute(
+                    "DELETE FROM translation_memory WHERE rowid IN "
+                    "(SELECT rowid FROM translation_memory ORDER BY last_used LIMIT ?)",
+                    (self.entries - self.max_entries,)
+                )
+                self.entries = self.max_entries
+            self.db.commit()
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'chars_saved': self.chars_saved,
+            'entries': self.entries,
+        }
+    
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.db.close()
@@ -1,90 +1,245 @@
-import requests
+import aiohttp
+import asyncio
+import json
 import logging
-import time
+from config import TRANSLATE_MAX_CONCURRENCY
+from language_detector import detect_language
+from translation_memory import normalize_segment
+from http_client import HttpClient
+from metrics import Metrics
+from worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
 class TranslatorEngine:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, max_concurrency=None, memory=None, http=None, metrics=None):
+        self.url = "https://translate.googleapis.com/translate_a/single"
+        self.memory = memory  # TranslationMemory اختيارية
+        # قراية وكتابة الذاكرة (SQLite) في thread واحد بعيد عن الـ event loop
+        self.memory_thread = WorkerPool('thread', 1) if memory else None
+        # أقصى عدد طلبات HTTP للترجمة في نفس الوقت من الـ engine كله
+        self.max_concurrency = max(1, max_concurrency or TRANSLATE_MAX_CONCURRENCY)
+        self._slots = None
+        # الجلسة المشتركة من البوت، أو جلسة خاصة لو الـ engine شغال لوحده
+        self.http = http or HttpClient()
+        self._own_http = http is None
+        self.metrics = metrics or Metrics()
+    
+    async def memory_call(self, func, *args):
+        """نداء على ذاكرة الترجمة في الـ thread بتاعها"""
+        return await self.memory_thread.run(func, *args)
+    
+    def _get_slots(self):
+        # بيتعمل جوه الـ loop (Python 3.9 بيربط الـ primitives بالـ loop وقت الإنشاء)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+        
+    async def detect_language(self, text):
+        """كشف لغة النص مرة واحدة: محلياً الأول، وGoogle بس لو مش واضحة"""
+        with self.metrics.time('detect'):
+            return await self._detect_language(text)
+    
+    async def _detect_language(self, text):
+        lang = detect_language(text)
+        if lang:
+            logger.info(f"🌐 اللغة المكتشفة محلياً: {lang}")
+            return lang
         
-    def translate(self, text):
+        try:
+            lang_params = {
+                "client": "gtx",
+                "sl": "auto",
+                "tl": "en",
+                "dt": "t",
+                "q": text[:100]
+            }
+            
+            status, lang_result = await self._get_json(lang_params, timeout=10)
+            if status == 200 and len(lang_result) > 2 and lang_result[2]:
+                logger.info(f"🌐 اللغة المكتشفة: {lang_result[2]}")
+                return lang_result[2]
+        except Exception as e:
+            logger.error(f"❌ خطأ في كشف اللغة: {e}")
+        
+        return "ko"
+    
+    async def translate(self, text, source_lang=None):
+        with self.metrics.time('translate'):
+            return await self._translate(text, source_lang)
+    
+    async def _translate(self, text, source_lang=None):
         try:
             if not text or len(text) < 3:
                 return None
             
             logger.info(f"🔍 ترجمة: {len(text)} حرف")
             
+            # كشف اللغة مرة واحدة للنص كله
+            source_lang = source_lang or await self.detect_language(text)
+            if source_lang == "ar":
+                logger.info("⏭️ النص عربي أصلاً، مفيش داعي للترجمة")
+                return text
+            
+            if self.memory:
+                return await self._translate_with_memory(text, source_lang)
+            
             # تقسيم النص الطويل إلى أجزاء
             max_chunk = 1000
             if len(text) > max_chunk:
                 chunks = [text[i:i+max_chunk] for i in range(0, len(text), max_chunk)]
-                translated_chunks = []
                 
-                for i, chunk in enumerate(chunks, 1):
+                async def run(i, chunk):
                     logger.info(f"📦 ترجمة الجزء {i}/{len(chunks)}")
-                    translated = self._translate_chunk(chunk)
-                    if translated:
-                        translated_chunks.append(translated)
-                    time.sleep(0.5)
+                    return await self._translate_chunk(chunk, source_lang)
+                
+                # gather بيرجع النتائج بنفس ترتيب الأجزاء
+                results = await asyncio.gather(
+                    *(run(i, chunk) for i, chunk in enumerate(chunks, 1))
+                )
+                translated_chunks = [t for t in results if t]
                 
                 return ' '.join(translated_chunks) if translated_chunks else None
             
-            return self._translate_chunk(text)
+            return await self._translate_chunk(text, source_lang)
             
         except Exception as e:
             logger.error(f"خطأ في الترجمة: {e}")
             return None
     
-    def _translate_chunk(self, text):
+    async def translate_segments(self, segments, source_lang=None):
+        """ترجمة كل جزء لوحده وإرجاع الترجمات بنفس ترتيب وعدد الأجزاء
+        
+        الأجزاء كلها بتبدأ مع بعض، والحد على طلبات HTTP نفسها في _get_json.
+        """
+        source_lang = source_lang or await self.detect_language('\n'.join(segments))
+        return await asyncio.gather(*(self.translate(segment, source_lang) for segment in segments))
+    
+    async def _translate_with_memory(self, text, source_lang, max_chunk=1000):
+        """ترجمة سطر بسطر: الموجود في الذاكرة ياخد منها، والباقي بس يروح لـ Google"""
+        lines = text.split('\n')
+        keys = [normalize_segment(line) for line in lines]
+        
+        known = {}
+        lookup = []
+        for key in dict.fromkeys(keys):
+            # سطور فاضية أو فواصل زي --- ما بتتترجمش
+            if not any(c.isalpha() for c in key):
+                known[key] = key
+            else:
+                lookup.append(key)
+        known.update(await self.memory_call(self.memory.get_many, source_lang, lookup))
+        pending = [key for key in lookup if key not in known]
+        
+        # تجميع السطور الناقصة في دفعات حوالي 1000 حرف
+        batches, batch, size = [], [], 0
+        for key in pending:
+            if batch and size + len(key) > max_chunk:
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(key)
+            size += len(key) + 1
+        if batch:
+            batches.append(batch)
+        
+        async def run(i, segments):
+            logger.info(f"📦 ترجمة الدفعة {i}/{len(batches)}: {len(segments)} سطر")
+            return await self._translate_segments(segments, source_lang, max_chunk)
+        
+        results = await asyncio.gather(*(run(i, b) for i, b in enumerate(batches, 1)))
+        
+        fresh = []
+        for segments, translations in zip(batches, results):
+            for segment, translation in zip(segments, translations):
+                if translation:
+                    known[segment] = translation
+                    fresh.append((segment, translation))
+        await self.memory_call(self.memory.put_many, source_lang, fresh)
+        
+        stats = self.memory.stats()
+        logger.info(
+            f"🧠 ذاكرة الترجمة: {len(keys) - len(pending)}/{len(keys)} سطر من الذاكرة، "
+            f"نسبة الإصابة {stats['hit_ratio']:.0%}، وفرنا {stats['chars_saved']:,} حرف"
+        )
+        
+        if not any(known.get(key) for key in keys if any(c.isalpha() for c in key)):
+            return None
+        return '\n'.join(known.get(key, line) for key, line in zip(keys, lines)).strip()
+    
+    async def _translate_segments(self, segments, source_lang, max_chunk=1000):
+        """ترجمة كذا سطر في طلب واحد ورجوعهم بنفس الترتيب"""
+        if len(segments) == 1 and len(segments[0]) > max_chunk:
+            # سطر طويل جداً بيتقسم زي الترجمة العادية
+            text = segments[0]
+            pieces = [await self._translate_chunk(text[i:i+max_chunk], source_lang) for i in range(0, len(text), max_chunk)]
+            pieces = [p for p in pieces if p]
+            return [' '.join(pieces) if pieces else None]
+        
+        translated = await self._translate_chunk('\n'.join(segments), source_lang, separator='')
+        if translated is not None:
+            pieces = [piece.strip() for piece in translated.strip().split('\n')]
+            if len(pieces) == len(segments):
+                return pieces
+        
+        if len(segments) == 1:
+            return [translated.strip() if translated else None]
+        
+        # Google دمج أو قسم السطور بشكل مختلف، نترجم كل سطر لوحده
+        return [await self._translate_chunk(segment, source_lang) for segment in segments]
+    
+    async def _get_json(self, params, timeout):
+        session = await self.http.get_session()
+        self.metrics.count_bytes('out', 'translate', len(params['q'].encode('utf-8')))
+        outcome = 'error'
+        try:
+            # semaphore واحد للـ engine حوالين الطلب نفسه، مهما كان مين اللي بيترجم
+            async with self._get_slots():
+                with self.metrics.time('translate_request'):
+                    async with session.get(self.url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                        if resp.status != 200:
+                            return resp.status, None
+                        body = await resp.read()
+            self.metrics.count_bytes('in', 'translate', len(body))
+            result = json.loads(body)
+            outcome = 'ok'
+            return resp.status, result
+        finally:
+            self.metrics.inc('translate_requests_total', outcome=outcome)
+    
+    async def _translate_chunk(self, text, source_lang, separator=' '):
         """ترجمة جزء صغير من النص"""
         try:
-            # كشف اللغة أولاً
-            lang_url = "https://translate.googleapis.com/translate_a/single"
-            lang_params = {
-                "client": "gtx",
-                "sl": "auto",
-                "tl": "en",
-                "dt": "t",
-                "q": text[:100]
-            }
-            
-            lang_response = self.session.get(lang_url, params=lang_params, timeout=10)
-            if lang_response.status_code == 200:
-                lang_result = lang_response.json()
-                detected_lang = lang_result[2] if len(lang_result) > 2 else "ko"
-                logger.info(f"🌐 اللغة المكتشفة: {detected_lang}")
-            else:
-                detected_lang = "ko"
-            
             # الترجمة إلى العربية
-            url = "https://translate.googleapis.com/translate_a/single"
             params = {
                 "client": "gtx",
-                "sl": detected_lang,
+                "sl": source_lang,
                 "tl": "ar",
                 "dt": "t",
                 "q": text
             }
             
-            response = self.session.get(url, params=params, timeout=15)
+            status, result = await self._get_json(params, timeout=15)
             
-            if response.status_code == 200:
-                result = response.json()
-                
+            if status == 200:
                 # تجميع الترجمة
                 translated_parts = []
                 for part in result[0]:
                     if part[0]:
                         translated_parts.append(part[0])
                 
-                translated = ' '.join(translated_parts)
+                translated = separator.join(translated_parts)
                 logger.info(f"✅ تمت ترجمة {len(translated)} حرف")
                 return translated
             else:
-                logger.error(f"❌ فشل: {response.status_code}")
+                logger.error(f"❌ فشل: {status}")
                 return None
                 
         except Exception as e:
             logger.error(f"❌ خطأ: {e}")
             return None
+    
+    async def close(self):
+        if self.memory_thread:
+            self.memory_thread.close()
+        if self._own_http:
+            await self.http.close()
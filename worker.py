@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from config import (
+    JOB_STORE_PATH, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL, JOB_WORKERS, JOB_QUEUE_MAX,
+    JOB_WORKER_PROCESSES, METRICS_HOST, METRICS_WINDOW,
+)
+from job_store import JobStore
+from metrics import Metrics, MetricsServer
+from pipeline import Pipeline
+from worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """بياخد شغلانات من الطابور الدائم ويشغلها على Pipeline، والنتيجة بترجع للطابور والبوت بيبعتها
+
+    كل شغلانة ليها heartbeat بيجدد الـ lease كل ثلث مدته، ولو الـ lease راح لـ worker تاني
+    (الـ process كانت واقفة أكتر من المدة) الشغلانة هنا بتتلغي عشان ما تتبعتش مرتين.
+    """
+
+    def __init__(self, store, pipeline, worker_id, concurrency=2, lease_seconds=60.0, poll_interval=0.5):
+        self.store = store
+        self.pipeline = pipeline
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.tasks = {}  # id الشغلانة -> task
+        self.completed = 0
+        self.failed = 0
+        self._stop = None
+        # نداءات SQLite (ممكن تستنى lock لحد 10 ث) في thread واحد، عشان ما توقفش الـ OCR والـ heartbeat
+        self.store_thread = WorkerPool('thread', 1)
+    
+    async def store_call(self, func, *args):
+        """نداء على الطابور الدائم في الـ thread بتاعه"""
+        return await self.store_thread.run(func, *args)
+
+    async def run(self):
+        # الـ Event بيتعمل جوه الـ loop (Python 3.9 بيربطه بالـ loop وقت الإنشاء)
+        self._stop = asyncio.Event()
+        logger.info(f"👷 worker {self.worker_id}: {self.concurrency} شغلانات في نفس الوقت")
+        try:
+            while not self._stop.is_set():
+                if len(self.tasks) < self.concurrency:
+                    job = await self.store_call(self.store.lease, self.worker_id, self.lease_seconds)
+                    if job:
+                        self.tasks[job.id] = asyncio.create_task(self._process(job))
+                        continue
+                try:
+                    await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # الشغلانات اللي لسه شغالة بترجع للطابور لـ worker تاني
+            for task in list(self.tasks.values()):
+                task.cancel()
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+            self.store_thread.close()
+            logger.info(f"👋 worker {self.worker_id} وقف بعد {self.completed} شغلانة")
+
+    def stop(self):
+        if self._stop:
+            self._stop.set()
+
+    async def _process(self, job):
+        self.pipeline.metrics.observe('queue_wait', max(0.0, time.time() - job.created_at))
+        heartbeat = asyncio.create_task(self._heartbeat(job, asyncio.current_task()))
+
+        async def progress(text):
+            await self.store_call(self.store.set_progress, job.id, self.worker_id, text)
+
+        try:
+            await progress("🔄 **جاري التحميل والمعالجة...**")
+            payload = job.payload
+            if 'pages' in payload:
+                pages = [(page['url'], page['ext']) for page in payload['pages']]
+                result = await self.pipeline.run_chapter(pages, progress=progress)
+            else:
+                result = await self.pipeline.run(payload['url'], payload['ext'], progress=progress)
+            await self.store_call(self.store.complete, job.id, self.worker_id, result)
+            self.completed += 1
+        except asyncio.CancelledError:
+            # لو الـ lease لسه معانا بترجع من غير ما تتحسب محاولة
+            await self.store_call(self.store.release, job.id, self.worker_id)
+            raise
+        except Exception as e:
+            logger.error(f"الشغلانة {job.id} خطأ: {e}")
+            self.failed += 1
+            await self.store_call(self.store.fail, job.id, self.worker_id, str(e))
+        finally:
+            heartbeat.cancel()
+            del self.tasks[job.id]
+
+    async def _heartbeat(self, job, task):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await self.store_call(self.store.heartbeat, job.id, self.worker_id, self.lease_seconds):
+                logger.warning(f"⚠️ الـ lease بتاع الشغلانة {job.id} راح لـ worker تاني، بنلغيها هنا")
+                task.cancel()
+                return
+
+
+class LocalWorkers:
+    """processes worker على نفس الجهاز بيشغلها البوت، واللي يقع منها بيقوم تاني"""
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worker.py')
+
+    def __init__(self, count, concurrency=JOB_WORKERS):
+        self.count = count
+        self.concurrency = concurrency
+        self.procs = []
+        self.restarts = 0
+
+    def _spawn(self):
+        # كل process بتاخد 1/count من حد المفاتيح وميزانية الذاكرة
+        return subprocess.Popen([
+            sys.executable, self.script, '--concurrency', str(self.concurrency), '--processes', str(self.count),
+        ])
+
+    def start(self):
+        self.procs = [self._spawn() for _ in range(self.count)]
+        logger.info(f"👷 {self.count} worker processes × {self.concurrency}")
+
+    def check(self):
+        """بيرجع أي process وقعت (شغلاناتها بترجع للطابور لما الـ lease يخلص)"""
+        for i, proc in enumerate(self.procs):
+            code = proc.poll()
+            if code is not None:
+                logger.warning(f"⚠️ worker process {proc.pid} وقع (code {code})، بنشغل واحد جديد")
+                self.restarts += 1
+                self.procs[i] = self._spawn()
+
+    def alive(self):
+        return sum(1 for proc in self.procs if proc.poll() is None)
+
+    def stop(self, timeout=10.0):
+        for proc in self.procs:
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self.procs = []
+
+
+async def serve(args):
+    metrics = Metrics(window=METRICS_WINDOW)
+    pipeline = Pipeline(metrics, share=1 / args.processes)
+    logger.info(f"🔑 نصيب الـ worker ده: 1/{args.processes} من حد المفاتيح وميزانية الذاكرة")
+    store = JobStore(args.store, JOB_MAX_ATTEMPTS, JOB_QUEUE_MAX)
+    worker = Worker(store, pipeline, args.id, args.concurrency, JOB_LEASE_SECONDS, JOB_POLL_INTERVAL)
+    metrics.gauge('jobs_running', lambda: len(worker.tasks), "شغلانات شغالة في الـ worker ده")
+
+    server = None
+    if args.metrics_port is not None:
+        server = MetricsServer(metrics, METRICS_HOST, args.metrics_port)
+        try:
+            await server.start()
+        except OSError as e:
+            logger.error(f"❌ endpoint المقاييس ما اشتغلش: {e}")
+            server = None
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        if server:
+            await server.stop()
+        await pipeline.close()
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="worker بيترجم الصور من طابور JOB_STORE_PATH")
+    parser.add_argument('--id', default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument('--concurrency', type=int, default=JOB_WORKERS)
+    parser.add_argument('--store', default=JOB_STORE_PATH)
+    parser.add_argument(
+        '--processes', type=int, default=max(1, JOB_WORKER_PROCESSES),
+        help="عدد الـ workers كلهم على نفس المفاتيح، والـ worker ده بياخد نصيبه من OCR_KEY_RATE/BURST و MEMORY_BUDGET_MB",
+    )
+    parser.add_argument('--metrics-port', type=int, default=None, help="endpoint /metrics للـ worker ده (0 = أي port فاضي)")
+    args = parser.parse_args()
+    if not args.store:
+        print("❌ JOB_STORE_PATH مش متحدد!")
+        sys.exit(1)
+    args.processes = max(1, args.processes)
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,27 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """pool للشغل التقيل على الـ CPU (فك الصور، القص، الضغط) بعيد عن الـ event loop"""
+    
+    def __init__(self, kind='thread', size=None):
+        self.kind = kind
+        self.size = size or os.cpu_count() or 1
+        if kind == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=self.size)
+        else:
+            # Pillow بيسيب الـ GIL أثناء الفك والضغط، فالـ threads بتشتغل على كذا core
+            self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='cpu')
+        logger.info(f"🧵 worker pool: {self.kind} × {self.size}")
+    
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+    
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)